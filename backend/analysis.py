@@ -1,13 +1,18 @@
-import pandas as pd
+from ledger import as_ledger
+from rule_engine import assess
 
-def analyze_financials(df):
 
-    df["type"] = df["type"].astype(str).str.strip().str.lower()
+def type_total(summary, type_):
+    entry = summary.get(type_)
+    return entry["total"] if entry else 0.0
 
-    revenue = df[df["type"] == "revenue"]["amount"].sum()
-    expenses = df[df["type"] == "expense"]["amount"].sum()
-    receivable = df[df["type"] == "receivable"]["amount"].sum()
-    payable = df[df["type"] == "payable"]["amount"].sum()
+
+def metrics_from_summary(summary):
+
+    revenue = type_total(summary, "revenue")
+    expenses = type_total(summary, "expense")
+    receivable = type_total(summary, "receivable")
+    payable = type_total(summary, "payable")
 
     profit = revenue - expenses
 
@@ -15,7 +20,7 @@ def analyze_financials(df):
     if revenue != 0:
         profit_margin = (profit / revenue) * 100
 
-    metrics = {
+    return {
         "revenue": float(revenue),
         "expenses": float(expenses),
         "profit": float(profit),
@@ -24,24 +29,26 @@ def analyze_financials(df):
         "payable": float(payable)
     }
 
-    score = 100
 
-    if profit_margin < 10:
-        score -= 20
-    if payable > receivable:
-        score -= 15
-    if expenses > revenue:
-        score -= 30
+def credit_inputs(metrics):
+    """
+    The metrics as the credit rules read them. `metrics` carries the
+    profit margin rounded for display; the score and risk thresholds
+    compare the exact margin (a 9.996 % margin is still below 10), while
+    product rules see the displayed one as "profit_margin_rounded".
+    """
+    inputs = dict(metrics)
+    inputs["profit_margin_rounded"] = metrics["profit_margin"]
+
+    if metrics["revenue"] != 0:
+        inputs["profit_margin"] = (metrics["profit"] / metrics["revenue"]) * 100
 
-    risks = []
+    return inputs
 
-    if profit < 0:
-        risks.append("Negative profit")
 
-    if payable > receivable:
-        risks.append("High outstanding payables")
+def analyze_financials(ledger):
 
-    if profit_margin < 10:
-        risks.append("Low profit margin")
+    metrics = metrics_from_summary(as_ledger(ledger).summary)
+    assessment = assess(credit_inputs(metrics))
 
-    return metrics, risks, score
+    return metrics, assessment["risks"], assessment["credit_score"]
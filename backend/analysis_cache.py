@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+
+from fastapi.encoders import jsonable_encoder
+
+from report_cache import ReportCache
+
+# analytics of recent uploads, keyed on the upload's SHA-256; 0 disables
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "256"))
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# optional persistent tier, shared by every worker on the host
+ANALYSIS_CACHE_DB = os.getenv("ANALYSIS_CACHE_DB")
+ANALYSIS_CACHE_DB_SIZE = int(os.getenv("ANALYSIS_CACHE_DB_SIZE", "10000"))
+
+# bump when parsing, validation or the cached sections change so entries
+# computed by older code are not served; rule file edits are covered by
+# config_fingerprint()
+PARSER_VERSION = "5"
+
+# the parts of the analytics that depend only on the upload's contents
+LEDGER_SECTIONS = (
+    "metrics", "forecast", "bookkeeping", "tax_compliance", "tax_inputs", "data_quality"
+)
+
+analysis_cache = ReportCache(
+    max_entries=ANALYSIS_CACHE_SIZE,
+    ttl=ANALYSIS_CACHE_TTL,
+    db_path=ANALYSIS_CACHE_DB,
+    max_db_entries=ANALYSIS_CACHE_DB_SIZE,
+    table="analysis_cache"
+)
+
+
+_fingerprint = None
+
+
+def cache_enabled():
+    return ANALYSIS_CACHE_SIZE > 0 or bool(ANALYSIS_CACHE_DB)
+
+
+def config_fingerprint():
+    """
+    Hash of the tax and bookkeeping rule files and the settings the cached
+    sections depend on. Both rule files are loaded once per process, so
+    this is computed once as well.
+    """
+    global _fingerprint
+
+    if _fingerprint is None:
+        # loaded here rather than at import so app startup stays light
+        import bookkeeping
+        import tax
+
+        digest = hashlib.sha256()
+
+        for path in (tax.TAX_RULES_PATH, bookkeeping.RULES_PATH):
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+
+        digest.update(f"{tax.TAX_JURISDICTION}|{tax.MAX_FINDING_ROWS}".encode("utf-8"))
+        _fingerprint = digest.hexdigest()[:16]
+
+    return _fingerprint
+
+
+def upload_key(digest: str) -> str:
+    return f"{PARSER_VERSION}:{config_fingerprint()}:{digest}"
+
+
+def get_sections(digest):
+    """
+    Cached ledger sections of an upload, or None. Reads SQLite when the
+    persistent tier is enabled; call it through run_in_threadpool.
+    """
+    if digest is None:
+        return None
+
+    value = analysis_cache.get(upload_key(digest))
+    if value is None:
+        return None
+
+    return json.loads(value)
+
+
+def set_sections(digest, sections: dict):
+
+    if digest is None:
+        return
+
+    analysis_cache.set(
+        upload_key(digest),
+        json.dumps(jsonable_encoder(sections), separators=(",", ":"), ensure_ascii=False)
+    )
@@ -1,34 +1,93 @@
-from forecast import forecast_revenue
-from bookkeeping import auto_bookkeeping
-from benchmark import compare_with_benchmark
-from fastapi.responses import StreamingResponse
-from pdf_report import generate_pdf_report
-from recommendation import recommend_products
-from tax_rules import tax_compliance_checks
-from tax import check_tax_compliance, tax_compliance_checks
-from fastapi import FastAPI, UploadFile, Form, Depends, HTTPException
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from pdf_cache import (
+    PDF_PRERENDER, REPORT_SECTIONS, content_hash, prerender, render_to_cache, report_data
+)
+from fastapi import FastAPI, UploadFile, Form, Depends, HTTPException, Query, Header, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-import io
-
-from analysis import analyze_financials
-from database import SessionLocal, engine
-from models import Base, AnalysisResult
-from llm import generate_financial_report, translate_to_hindi
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+import json
+import asyncio
+import shutil
+import zipfile
+import tempfile
+
+from analysis_cache import analysis_cache, cache_enabled, get_sections, set_sections
+from instrumentation import InstrumentationMiddleware, record_bytes, record_rows, render_metrics, stage
+from formats import DOCUMENT_EXTENSIONS, SUPPORTED_EXTENSIONS, UNSUPPORTED_FORMAT, upload_bytes, upload_size
+from ledger_store import (
+    LEDGER_STORE_DIR, file_digest, has_ledger, iter_stored_chunks, open_ledger_writer
+)
+from database import SessionLocal, AsyncSessionLocal, engine, db_stats, is_async_session
+from models import AnalysisResult, METRIC_COLUMNS
+from migrations import migrate
+from report_cache import report_cache
+from jobs import QueueFull, job_queue
+from batch import BATCH_CONCURRENCY, BATCH_MAX_FILES, spool_copy, upload_items, zip_items
 
-from docx import Document
-import pdfplumber
+# pandas and the analytics (pipeline, ingest, benchmark), the document
+# parsers, reportlab and the OpenAI SDK are imported where they are first
+# used, so workers only load what their requests need; see warm_up()
 
 # create tables
 import os
 
 if os.getenv("DATABASE_URL"):
-    Base.metadata.create_all(bind=engine)
+    migrate(engine)
+
+
+# load the lazily imported modules and configs at startup rather than on
+# the first request that needs them
+WARM_UP = os.getenv("WARM_UP", "false").lower() in ("1", "true", "yes")
+
+
+def warm_up():
+    """
+    Import the analytics pipeline, document parsers and PDF renderer,
+    create the OpenAI client if a key is configured, and load the rule,
+    benchmark and tax configs. Runs at startup when WARM_UP is set;
+    process managers can also call it from a pre-fork hook so workers
+    share the imported modules.
+    """
+    import pdfplumber
+    import docx
+    import pdf_report
+
+    from benchmark import get_registry
+    from bookkeeping import get_classifier
+    from llm import get_async_client
+    from rule_engine import get_engine
+    from tax import load_config
+    import pipeline
+
+    get_engine()
+    get_classifier()
+    get_registry()
+    load_config()
+    get_async_client()
+
+    try:
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if WARM_UP:
+        await run_in_threadpool(warm_up)
+    yield
 
 
 app = FastAPI(title="SME Financial Health Assessment API",docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json")
+    openapi_url="/openapi.json",
+    lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +97,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(InstrumentationMiddleware)
+
 # DB dependency
 def get_db():
     db = SessionLocal()
@@ -47,127 +108,266 @@ def get_db():
         db.close()
 
 
+@asynccontextmanager
+async def write_session():
+    """
+    AsyncSession when ASYNC_DATABASE_URL is set, otherwise a regular Session.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def get_write_db():
+    async with write_session() as db:
+        yield db
+
+
+def _insert_analysis(db, values: dict) -> int:
+    row_id = db.execute(
+        insert(AnalysisResult).values(**values).returning(AnalysisResult.id)
+    ).scalar_one()
+    db.commit()
+    return row_id
+
+
+def _insert_analyses(db, rows: list) -> list:
+    ids = db.execute(
+        insert(AnalysisResult).returning(AnalysisResult.id, sort_by_parameter_order=True),
+        rows
+    ).scalars().all()
+    db.commit()
+    return ids
+
+
+async def store_analyses(db, rows: list) -> list:
+    """
+    Insert many AnalysisResult rows in one transaction; ids come back in
+    the order of `rows`.
+    """
+    if not rows:
+        return []
+
+    with stage("db_write"):
+        if is_async_session(db):
+            ids = (await db.execute(
+                insert(AnalysisResult).returning(AnalysisResult.id, sort_by_parameter_order=True),
+                rows
+            )).scalars().all()
+            await db.commit()
+            return ids
+
+        return await run_in_threadpool(_insert_analyses, db, rows)
+
+
+async def store_analysis(db, values: dict) -> int:
+    """
+    Insert one AnalysisResult and get its id back in the same round trip
+    (INSERT ... RETURNING) instead of commit() followed by refresh().
+    """
+    with stage("db_write"):
+        if is_async_session(db):
+            row_id = (await db.execute(
+                insert(AnalysisResult).values(**values).returning(AnalysisResult.id)
+            )).scalar_one()
+            await db.commit()
+            return row_id
+
+        return await run_in_threadpool(_insert_analysis, db, values)
+
+
 @app.get("/")
 def root():
     return {"status": "SME Financial Health API running"}
 
-def parse_text_lines_to_df(lines):
-    rows = []
+# job uploads stay in memory up to this size, then spill to disk
+JOB_SPOOL_MAX_BYTES = int(os.getenv("JOB_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
 
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
 
-        # try comma separated
-        if "," in line:
-            parts = [p.strip() for p in line.split(",")]
-        else:
-            # fallback: whitespace separated
-            parts = line.split()
+async def _aggregate(filename: str, fileobj, writer):
 
-        if len(parts) >= 2:
-            rows.append([parts[0], parts[1]])
+    from ingest import aggregate_chunks
+    from pipeline import aggregate_upload
 
-    if not rows:
-        return None
+    if filename.endswith(DOCUMENT_EXTENSIONS):
+        from parsers import DocumentTooLarge, parse_document
+
+        content = await run_in_threadpool(upload_bytes, fileobj)
+
+        try:
+            with stage("parse_document"):
+                df = await parse_document(filename, content)
+        except DocumentTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Parsing the document timed out.")
+
+        return await run_in_threadpool(aggregate_chunks, [df], writer)
+
+    return await run_in_threadpool(aggregate_upload, filename, fileobj, writer)
+
+
+async def upload_sections(filename: str, fileobj):
+    """
+    Ledger sections of one upload, from the analysis cache when possible,
+    and the upload's digest (None when nothing is keyed on it).
+    """
+    from pipeline import ledger_sections
+
+    # -----------------------------
+    # Read file
+    # -----------------------------
+    record_bytes("read", upload_size(fileobj))
+
+    digest = None
+    if LEDGER_STORE_DIR or cache_enabled():
+        with stage("hash"):
+            digest = await run_in_threadpool(file_digest, fileobj)
+
+    # a repeated upload skips parsing and the ledger analytics, unless its
+    # canonical ledger still has to be stored
+    sections = await run_in_threadpool(get_sections, digest)
+
+    if sections is not None and (not LEDGER_STORE_DIR or has_ledger(digest)):
+        return sections, digest
+
+    # the parsed ledger is kept in canonical form when LEDGER_STORE_DIR is set
+    with open_ledger_writer(digest) as writer, stage("read"):
+        aggregates = await _aggregate(filename, fileobj, writer)
+
+    # -----------------------------
+    # Basic validation
+    # -----------------------------
+    if aggregates is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Input file must contain 'amount' and 'type' columns."
+        )
 
-    # remove header if present
-    if rows[0][0].lower() == "amount":
-        rows = rows[1:]
+    # -----------------------------
+    # Analytics
+    # -----------------------------
+    record_rows("read", aggregates.data_quality.rows)
 
-    df = pd.DataFrame(rows, columns=["amount", "type"])
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+    sections = await run_in_threadpool(ledger_sections, aggregates)
+    await run_in_threadpool(set_sections, digest, sections)
 
-    return df
+    return sections, digest
 
-# -------- helpers for DOCX and PDF --------
 
-def read_docx_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
-    doc = Document(io.BytesIO(file_bytes))
+async def analyze_upload(filename: str, fileobj, industry: str) -> dict:
 
-    rows = []
+    from pipeline import analytics_from_sections
 
-    # -------- 1. Try tables first --------
-    for table in doc.tables:
-        for row in table.rows[1:]:
-            cells = [cell.text.strip() for cell in row.cells]
-            if len(cells) >= 2:
-                rows.append([cells[0], cells[1]])
+    sections, digest = await upload_sections(filename, fileobj)
 
-    if rows:
-        df = pd.DataFrame(rows, columns=["amount", "type"])
-        df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
-        return df
+    analytics = await run_in_threadpool(analytics_from_sections, sections, industry)
+    analytics["ledger_digest"] = digest if has_ledger(digest) else None
 
-    # -------- 2. Fallback: normal text lines --------
-    text_rows = []
+    return analytics
 
-    for para in doc.paragraphs:
-        line = para.text.strip()
-        if not line:
-            continue
 
-        # expect: amount,type
-        if "," in line:
-            parts = line.split(",")
-            if len(parts) >= 2:
-                text_rows.append([parts[0].strip(), parts[1].strip()])
+async def ai_reports(business_name: str, industry: str, analytics: dict):
+    """
+    English and Hindi reports, or the fallback texts if the AI call fails.
+    """
+    from llm import generate_reports
 
-    if not text_rows:
-        raise ValueError(
-            "No table or valid text lines found in Word document. "
-            "Use a table or lines like: 50000,Revenue"
+    try:
+        with stage("llm"):
+            return await generate_reports(
+                business_name=business_name,
+                industry=industry,
+                metrics=analytics["metrics"],
+                risks=analytics["risks"],
+                credit_score=analytics["credit_score"]
+            )
+
+    except Exception as e:
+        english_report = (
+            "AI report is temporarily unavailable due to API quota limits. "
+            "Financial metrics and risk analysis were generated successfully."
+        )
+        hindi_report = (
+            "एआई रिपोर्ट अस्थायी रूप से उपलब्ध नहीं है। "
+            "वित्तीय मेट्रिक्स और जोखिम विश्लेषण सफलतापूर्वक तैयार किए गए हैं।"
         )
+        return english_report, hindi_report
 
-    # remove header if present
-    if text_rows[0][0].lower() == "amount":
-        text_rows = text_rows[1:]
 
-    df = pd.DataFrame(text_rows, columns=["amount", "type"])
-    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+def analysis_values(
+    business_name: str, industry: str, analytics: dict, english_report, hindi_report=None
+) -> dict:
 
-    return df
+    details = {name: analytics.get(name) for name in REPORT_SECTIONS}
+    details["report_hi"] = hindi_report
 
+    values = {
+        "business_name": business_name,
+        "industry": industry,
+        "metrics": analytics["metrics"],
+        "risks": analytics["risks"],
+        "credit_score": analytics["credit_score"],
+        "ai_report": english_report,
+        "details": jsonable_encoder(details),
+        "ledger_digest": analytics.get("ledger_digest")
+    }
 
+    for name in METRIC_COLUMNS:
+        values[name] = analytics["metrics"][name]
 
-def read_pdf_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
-    rows = []
+    return values
 
-    all_text_lines = []
 
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-        for page in pdf.pages:
+async def run_analysis(filename: str, fileobj, business_name: str, industry: str, db) -> dict:
 
-            # -------- try tables first --------
-            tables = page.extract_tables()
-            for table in tables:
-                for row in table[1:]:
-                    if row and len(row) >= 2:
-                        rows.append([row[0], row[1]])
+    analytics = await analyze_upload(filename, fileobj, industry)
+    metrics = analytics["metrics"]
+    risks = analytics["risks"]
+    score = analytics["credit_score"]
 
-            # -------- collect text for fallback --------
-            text = page.extract_text()
-            if text:
-                all_text_lines.extend(text.splitlines())
+    # -----------------------------
+    # AI Report
+    # -----------------------------
+    english_report, hindi_report = await ai_reports(business_name, industry, analytics)
 
-    # ---- if table data found
-    if rows:
-        df = pd.DataFrame(rows, columns=["amount", "type"])
-        df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
-        return df
+    # -----------------------------
+    # Store in DB
+    # -----------------------------
+    row_id = await store_analysis(
+        db, analysis_values(business_name, industry, analytics, english_report, hindi_report)
+    )
 
-    # ---- fallback to normal text
-    df = parse_text_lines_to_df(all_text_lines)
+    return {
+        "id": row_id,
+        "business_name": business_name,
+        "industry": industry,
+        "metrics": metrics,
+        "risks": risks,
+        "credit_score": score,
+        "score_explanations": analytics["score_explanations"],
+        "forecast": analytics["forecast"],
+        "bookkeeping": analytics["bookkeeping"],
+        "benchmark": analytics["benchmark"],
+        "recommended_products": analytics["recommended_products"],
+        "tax_compliance": analytics["tax_compliance"],
+        "data_quality": analytics["data_quality"],
+        "ledger_digest": analytics["ledger_digest"],
+        "report_en": english_report,
+        "report_hi": hindi_report
+    }
 
-    if df is None:
-        raise ValueError(
-            "No table or valid text lines found in PDF. "
-            "Use table or lines like: 50000,Revenue"
-        )
 
-    return df
+async def run_analysis_job(filename: str, fileobj, business_name: str, industry: str) -> dict:
 
+    async with write_session() as db:
+        return await run_analysis(filename, fileobj, business_name, industry, db)
 
 
 # -------------------------------------------
@@ -175,156 +375,518 @@ def read_pdf_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
 @app.post("/analyze")
 async def analyze_file(
     file: UploadFile,
+    background_tasks: BackgroundTasks,
     business_name: str = Form(...),
     industry: str = Form(...),
-    db=Depends(get_db)
+    db=Depends(get_write_db)
 ):
 
     try:
-        filename = file.filename.lower()
-        content = await file.read()
+        result = await run_analysis(
+            file.filename.lower(), file.file, business_name, industry, db
+        )
 
-        # -----------------------------
-        # Read file
-        # -----------------------------
-        if filename.endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(content))
+        if PDF_PRERENDER:
+            background_tasks.add_task(prerender, result["id"], report_data(analysis_values(
+                business_name, industry, result, result["report_en"], result["report_hi"]
+            )))
 
-        elif filename.endswith(".xlsx") or filename.endswith(".xls"):
-            df = pd.read_excel(io.BytesIO(content))
+        return result
 
-        elif filename.endswith(".docx"):
-            df = read_docx_to_dataframe(content)
+    except HTTPException:
+        raise
 
-        elif filename.endswith(".pdf"):
-            df = read_pdf_to_dataframe(content)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
 
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Only CSV, Excel, Word (.docx) and PDF files are supported."
-            )
 
-        # -----------------------------
-        # Basic validation
-        # -----------------------------
-        required_cols = {"amount", "type"}
-        df.columns = [c.lower() for c in df.columns]
-        
-
-        if not required_cols.issubset(set(df.columns)):
-            raise HTTPException(
-                status_code=400,
-                detail="Input file must contain 'amount' and 'type' columns."
-            )
-        
-        df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
-        df["type"] = df["type"].astype(str).str.strip().str.lower()
-        full_df = df.copy()
-
-        # -----------------------------
-        # Analytics
-        # -----------------------------
-        analysis_df = df[["amount", "type"]].dropna()
-        metrics, risks, score = analyze_financials(analysis_df)
-        forecast = forecast_revenue(full_df)
-        bookkeeping = auto_bookkeeping(full_df)
-        benchmark = compare_with_benchmark(metrics, industry)
-        products = recommend_products(metrics, score)
-        tax_warnings = tax_compliance_checks(full_df, metrics)
-        tax_compliance = check_tax_compliance(full_df)
-
-        tax_compliance["warnings"] = tax_warnings
-
-
-
-        # -----------------------------
-        # AI Report
-        # -----------------------------
-        try:
-            english_report = generate_financial_report(
-                business_name=business_name,
-                industry=industry,
-                metrics=metrics,
-                risks=risks,
-                credit_score=score
-            )
+@app.post("/analyze/jobs", status_code=202)
+async def submit_analysis_job(
+    file: UploadFile,
+    business_name: str = Form(...),
+    industry: str = Form(...)
+):
+    """
+    Queue an analysis and return its job id straight away.
+    Poll /jobs/{job_id} for the outcome.
+    """
+    filename = file.filename.lower()
 
-            hindi_report = translate_to_hindi(english_report)
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail=UNSUPPORTED_FORMAT
+        )
 
-        except Exception as e:
-            english_report = (
-                "AI report is temporarily unavailable due to API quota limits. "
-                "Financial metrics and risk analysis were generated successfully."
-            )
-            hindi_report = (
-                "एआई रिपोर्ट अस्थायी रूप से उपलब्ध नहीं है। "
-                "वित्तीय मेट्रिक्स और जोखिम विश्लेषण सफलतापूर्वक तैयार किए गए हैं।"
-            )
+    # the request's upload is closed once we respond, so keep our own copy
+    upload = tempfile.SpooledTemporaryFile(max_size=JOB_SPOOL_MAX_BYTES)
+    await run_in_threadpool(shutil.copyfileobj, file.file, upload)
 
-        # -----------------------------
-        # Store in DB
-        # -----------------------------
-        row = AnalysisResult(
-            business_name=business_name,
-            industry=industry,
-            metrics=metrics,
-            risks=risks,
-            credit_score=score,
-            ai_report=english_report
+    try:
+        job_id = job_queue.submit(
+            run_analysis_job, filename, upload, business_name, industry,
+            cleanup=upload.close
         )
+    except QueueFull as e:
+        upload.close()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    }
 
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-
-        return {
-            "id": row.id,
-            "business_name": business_name,
-            "industry": industry,
-            "metrics": metrics,
-            "risks": risks,
-            "credit_score": score,
-            "forecast": forecast,
-            "bookkeeping": bookkeeping,
-            "benchmark": benchmark,
-            "recommended_products": products,
-            "tax_compliance": tax_compliance,
-            "report_en": english_report,
-            "report_hi": hindi_report
-            
-        }
 
-    except HTTPException:
-        raise
+async def stream_batch(items: list, include_ai_report: bool, spools: list):
+    """
+    Analyse batch items on a bounded pool and yield one NDJSON line per
+    business as it finishes, then store every successful result in one
+    transaction and yield a summary line with the new ids.
+
+    Uploads that finish together are scored as one portfolio: a single
+    credit rule and tax rule evaluation per group, the tax rules with each
+    business's own jurisdiction and financial year.
+    """
+    from pipeline import analytics_from_portfolio
+    from tax import tax_settings
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def process(index, item):
+        async with semaphore:
+            try:
+                # an unknown jurisdiction fails its own item, not the group
+                if item["jurisdiction"]:
+                    tax_settings(item["jurisdiction"])
+
+                fileobj = await run_in_threadpool(item["open"])
+                try:
+                    sections, digest = await upload_sections(item["filename"], fileobj)
+                finally:
+                    fileobj.close()
+
+                return index, (sections, digest), None
+
+            except Exception as e:
+                return index, None, getattr(e, "detail", None) or str(e)
+
+    def score(finished):
+        ok = [(index, parsed) for index, parsed, error in finished if error is None]
+        if not ok:
+            return {}
+
+        results = analytics_from_portfolio(
+            [sections for _, (sections, _) in ok],
+            [items[index]["industry"] for index, _ in ok],
+            [items[index]["jurisdiction"] for index, _ in ok]
+        )
 
-    except Exception as e:
+        for (_, (_, digest)), analytics in zip(ok, results):
+            analytics["ledger_digest"] = digest if has_ledger(digest) else None
+
+        return {index: analytics for (index, _), analytics in zip(ok, results)}
+
+    tasks = [asyncio.create_task(process(i, item)) for i, item in enumerate(items)]
+    pending = set(tasks)
+    stored = []
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            finished = sorted((task.result() for task in done), key=lambda result: result[0])
+
+            scored = await run_in_threadpool(score, finished)
+
+            reports = {}
+            if include_ai_report and scored:
+                texts = await asyncio.gather(*(
+                    ai_reports(items[index]["business_name"], items[index]["industry"], analytics)
+                    for index, analytics in scored.items()
+                ))
+                reports = dict(zip(scored, texts))
+
+            for index, _, error in finished:
+                item = items[index]
+
+                line = {
+                    "type": "result",
+                    "index": index,
+                    "file": item["file"],
+                    "business_name": item["business_name"],
+                    "industry": item["industry"]
+                }
+
+                if error is not None:
+                    line["status"] = "error"
+                    line["error"] = error
+                else:
+                    analytics = scored[index]
+                    english_report, hindi_report = reports.get(index, (None, None))
+
+                    line["status"] = "ok"
+                    line.update(analytics)
+                    if include_ai_report:
+                        line["report_en"] = english_report
+                        line["report_hi"] = hindi_report
+
+                    stored.append((index, analysis_values(
+                        item["business_name"], item["industry"], analytics,
+                        english_report, hindi_report
+                    )))
+
+                yield json.dumps(jsonable_encoder(line)) + "\n"
+
+        try:
+            async with write_session() as db:
+                ids = await store_analyses(db, [values for _, values in stored])
+        except Exception as e:
+            # the result lines are already out; the summary reports that
+            # none of them were saved
+            yield json.dumps({
+                "type": "summary",
+                "total": len(items),
+                "stored": 0,
+                "failed": len(items),
+                "ids": [],
+                "error": f"Storing the results failed: {e}"
+            }) + "\n"
+            return
+
+        yield json.dumps({
+            "type": "summary",
+            "total": len(items),
+            "stored": len(ids),
+            "failed": len(items) - len(ids),
+            "ids": [
+                {"index": index, "file": items[index]["file"], "id": row_id}
+                for (index, _), row_id in zip(stored, ids)
+            ]
+        }) + "\n"
+
+    finally:
+        for task in tasks:
+            task.cancel()
+        for spool in spools:
+            spool.close()
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    files: list[UploadFile],
+    industry: str = Form(...),
+    include_ai_report: bool = Form(False)
+):
+    """
+    Score many businesses in one request: either a single .zip (optionally
+    with a manifest.csv of filename,business_name,industry) or several
+    ledger files. Results stream back as NDJSON. The AI report is skipped
+    unless include_ai_report is set; it can be generated later through
+    POST /analysis/{id}/report.
+    """
+    spools = []
+
+    # uploads are closed once the endpoint returns, so keep our own copies
+    for upload in files:
+        spools.append((upload.filename, await run_in_threadpool(spool_copy, upload.file)))
+
+    if len(spools) == 1 and spools[0][0].lower().endswith(".zip"):
+        try:
+            archive = zipfile.ZipFile(spools[0][1])
+        except zipfile.BadZipFile:
+            spools[0][1].close()
+            raise HTTPException(status_code=400, detail="Invalid zip archive.")
+
+        items = zip_items(archive, industry, SUPPORTED_EXTENSIONS)
+    else:
+        items = upload_items(spools, industry)
+
+    spools = [spool for _, spool in spools]
+
+    if not items or len(items) > BATCH_MAX_FILES:
+        for spool in spools:
+            spool.close()
         raise HTTPException(
-            status_code=500,
-            detail=str(e)
+            status_code=400,
+            detail=f"A batch must contain between 1 and {BATCH_MAX_FILES} supported files."
         )
-@app.get("/report/pdf/{analysis_id}")
-def download_pdf(analysis_id: int, db=Depends(get_db)):
+
+    return StreamingResponse(
+        stream_batch(items, include_ai_report, spools),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.post("/analysis/{analysis_id}/report")
+async def generate_analysis_report(analysis_id: int, db=Depends(get_db)):
+    """
+    Deferred AI report step for analyses stored without one (e.g. batches).
+    """
+    row = await run_in_threadpool(
+        lambda: db.query(AnalysisResult).filter(AnalysisResult.id == analysis_id).first()
+    )
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    english_report, hindi_report = await ai_reports(row.business_name, row.industry, {
+        "metrics": row.metrics,
+        "risks": row.risks,
+        "credit_score": row.credit_score
+    })
+
+    row.ai_report = english_report
+    row.details = {**(row.details or {}), "report_hi": hindi_report}
+    await run_in_threadpool(db.commit)
+
+    return {
+        "id": analysis_id,
+        "report_en": english_report,
+        "report_hi": hindi_report
+    }
+
+
+@app.post("/analysis/{analysis_id}/reanalyze")
+async def reanalyze(
+    analysis_id: int,
+    industry: Optional[str] = Form(None),
+    db=Depends(get_db)
+):
+    """
+    Recompute the analytics of a stored analysis from its canonical
+    ledger (memory-mapped) rather than the original upload, optionally
+    for another industry. Nothing is stored.
+    """
+    row = await run_in_threadpool(
+        lambda: db.query(AnalysisResult).filter(AnalysisResult.id == analysis_id).first()
+    )
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not has_ledger(row.ledger_digest):
+        raise HTTPException(status_code=404, detail="No stored ledger for this analysis.")
+
+    from ingest import aggregate_normalised
+    from pipeline import analytics_from_aggregates
+
+    industry = industry or row.industry
+
+    aggregates = await run_in_threadpool(
+        aggregate_normalised, iter_stored_chunks(row.ledger_digest)
+    )
+    analytics = await run_in_threadpool(analytics_from_aggregates, aggregates, industry)
+
+    return {
+        "id": analysis_id,
+        "business_name": row.business_name,
+        "industry": industry,
+        **analytics
+    }
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+
+    job = job_queue.get(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    response = {k: v for k, v in job.items() if k != "result"}
+
+    if job["status"] == "done":
+        response["analysis_id"] = job["result"]["id"]
+        response["result"] = job["result"]
+
+    return response
+
+
+@app.get("/stats/db")
+def database_stats():
+    return db_stats()
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Stage and request latency histograms, row / byte counters, and the
+    database, cache and job queue statistics in Prometheus text format.
+    """
+    gauges = {"sme_job_queue_pending": job_queue.pending()}
+
+    for name, value in db_stats().items():
+        if isinstance(value, (int, float)):
+            gauges[f"sme_db_{name}"] = value
+
+    for prefix, cache in (("report_cache", report_cache), ("analysis_cache", analysis_cache)):
+        for name, value in cache.stats().items():
+            gauges[f"sme_{prefix}_{name}"] = value
+
+    return Response(
+        content=render_metrics(gauges),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.post("/benchmarks/refresh")
+def refresh_benchmarks(db=Depends(get_db)):
+    """
+    Fold analyses stored since the last refresh into the industry
+    percentile distributions.
+    """
+    from benchmark import refresh_from_history
+
+    return refresh_from_history(db)
+
+
+MAX_PAGE_SIZE = 500
+
+
+def analysis_summary(row) -> dict:
+    return {
+        "id": row.id,
+        "business_name": row.business_name,
+        "industry": row.industry,
+        "credit_score": row.credit_score,
+        "created_at": row.created_at,
+        **{name: getattr(row, name) for name in METRIC_COLUMNS}
+    }
+
+
+@app.get("/analyses")
+def list_analyses(
+    industry: Optional[str] = None,
+    business_name: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db=Depends(get_db)
+):
+    """
+    Portfolio query over the scalar columns, newest first. Pass the
+    returned next_after_id back as after_id for the next page.
+    """
+    query = db.query(AnalysisResult.__table__)
+
+    if industry is not None:
+        query = query.filter(AnalysisResult.industry == industry)
+    if business_name is not None:
+        query = query.filter(AnalysisResult.business_name == business_name)
+    if min_score is not None:
+        query = query.filter(AnalysisResult.credit_score >= min_score)
+    if max_score is not None:
+        query = query.filter(AnalysisResult.credit_score <= max_score)
+    if created_after is not None:
+        query = query.filter(AnalysisResult.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(AnalysisResult.created_at < created_before)
+    if after_id is not None:
+        query = query.filter(AnalysisResult.id < after_id)
+
+    rows = query.order_by(AnalysisResult.id.desc()).limit(limit).all()
+
+    return {
+        "items": [analysis_summary(row) for row in rows],
+        "next_after_id": rows[-1].id if len(rows) == limit else None
+    }
+
+
+@app.get("/analyses/history/{business_name}")
+def analysis_history(
+    business_name: str,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db=Depends(get_db)
+):
+    """
+    Metric trend for one business, oldest first.
+    """
+    query = db.query(AnalysisResult.__table__).filter(
+        AnalysisResult.business_name == business_name
+    )
+
+    if after_id is not None:
+        query = query.filter(AnalysisResult.id > after_id)
+
+    rows = query.order_by(AnalysisResult.id).limit(limit).all()
+
+    return {
+        "business_name": business_name,
+        "items": [analysis_summary(row) for row in rows],
+        "next_after_id": rows[-1].id if len(rows) == limit else None
+    }
+
+
+@app.get("/analysis/{analysis_id}")
+def get_analysis(analysis_id: int, db=Depends(get_db)):
 
     row = db.query(AnalysisResult).filter(AnalysisResult.id == analysis_id).first()
 
     if not row:
         raise HTTPException(status_code=404, detail="Not found")
 
-    data = {
+    return {
+        "id": row.id,
         "business_name": row.business_name,
         "industry": row.industry,
         "metrics": row.metrics,
+        "risks": row.risks,
         "credit_score": row.credit_score,
         "report_en": row.ai_report
     }
 
-    pdf = generate_pdf_report(data)
 
-    return StreamingResponse(
-        iter([pdf]),
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=report_{analysis_id}.pdf"
-        }
-    )
+def matches_etag(if_none_match: Optional[str], etag: str) -> bool:
+
+    if not if_none_match:
+        return False
+
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+@app.get("/report/pdf/{analysis_id}")
+def download_pdf(
+    analysis_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db=Depends(get_db)
+):
+
+    row = db.query(AnalysisResult).filter(AnalysisResult.id == analysis_id).first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    data = report_data(row)
+    digest = content_hash(data)
+    etag = f'"{digest}"'
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename=report_{analysis_id}.pdf"
+    }
+
+    if matches_etag(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = render_to_cache(analysis_id, data, digest)
+    except OSError:
+        from pdf_report import iter_pdf_report
+
+        # cache dir unavailable: render per request, still in chunks
+        return StreamingResponse(
+            iter_pdf_report(data),
+            media_type="application/pdf",
+            headers=headers
+        )
+
+    return FileResponse(path, media_type="application/pdf", headers=headers)
@@ -0,0 +1,88 @@
+import io
+import os
+import csv
+import shutil
+import tempfile
+
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "5000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_SPOOL_MAX_BYTES = int(os.getenv("BATCH_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# optional file inside a batch zip: filename,business_name,industry and
+# optionally jurisdiction (tax rules; the default jurisdiction otherwise)
+MANIFEST_NAME = "manifest.csv"
+
+
+def spool_copy(fileobj):
+    """
+    Copy a file object into a SpooledTemporaryFile positioned at the start.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_MAX_BYTES)
+    shutil.copyfileobj(fileobj, spool)
+    spool.seek(0)
+    return spool
+
+
+def business_name_from_filename(filename):
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def read_manifest(archive):
+
+    if MANIFEST_NAME not in archive.namelist():
+        return {}
+
+    with archive.open(MANIFEST_NAME) as f:
+        reader = csv.DictReader(io.TextIOWrapper(f, encoding="utf-8-sig"))
+        return {
+            row["filename"].strip(): row
+            for row in reader
+            if row.get("filename")
+        }
+
+
+def zip_items(archive, industry, supported_extensions):
+    """
+    One batch item per supported file in the archive. Members are only
+    extracted (into a spooled temp file) when their item is opened.
+    """
+    manifest = read_manifest(archive)
+    items = []
+
+    for info in archive.infolist():
+        name = info.filename
+
+        if info.is_dir() or name == MANIFEST_NAME:
+            continue
+        if not name.lower().endswith(supported_extensions):
+            continue
+
+        entry = manifest.get(name, {})
+
+        items.append({
+            "file": name,
+            "filename": name.lower(),
+            "business_name": entry.get("business_name") or business_name_from_filename(name),
+            "industry": entry.get("industry") or industry,
+            "jurisdiction": entry.get("jurisdiction") or None,
+            "open": lambda name=name: spool_copy(archive.open(name))
+        })
+
+    return items
+
+
+def upload_items(spooled_uploads, industry):
+    """
+    Batch items for plain multi-file uploads: [(filename, spool), ...].
+    """
+    return [
+        {
+            "file": name,
+            "filename": name.lower(),
+            "business_name": business_name_from_filename(name),
+            "industry": industry,
+            "jurisdiction": None,
+            "open": lambda spool=spool: spool
+        }
+        for name, spool in spooled_uploads
+    ]
@@ -1,34 +1,393 @@
-BENCHMARKS = {
-    "Retail": {
-        "avg_profit_margin": 12
-    },
-    "Manufacturing": {
-        "avg_profit_margin": 15
-    },
-    "Services": {
-        "avg_profit_margin": 18
-    },
-    "Agriculture": {
-        "avg_profit_margin": 10
+import os
+import json
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from models import AnalysisResult
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+
+# CSV or Parquet: industry,size_band,metric,p10,p25,p50,p75,p90
+BENCHMARKS_PATH = os.getenv(
+    "BENCHMARKS_PATH", os.path.join(CONFIG_DIR, "industry_benchmarks.csv")
+)
+INDUSTRY_ALIASES_PATH = os.getenv(
+    "INDUSTRY_ALIASES_PATH", os.path.join(CONFIG_DIR, "industry_aliases.json")
+)
+
+# where refresh_from_history writes its table (same columns); rows there
+# override the shipped ones for the same industry, band and metric. Every
+# worker reloads it when its mtime changes; unset, a refresh only reaches
+# the worker that ran it
+BENCHMARKS_HISTORY_PATH = os.getenv("BENCHMARKS_HISTORY_PATH")
+
+# how often get_registry() looks at the history table's mtime; 0 checks on every call
+BENCHMARKS_CHECK_SECONDS = float(os.getenv("BENCHMARKS_CHECK_SECONDS", "5"))
+
+# groups with fewer stored analyses than this keep the shipped numbers
+BENCHMARK_MIN_SAMPLES = int(os.getenv("BENCHMARK_MIN_SAMPLES", "30"))
+BENCHMARK_REFRESH_BATCH = 5000
+
+PERCENTILES = (10, 25, 50, 75, 90)
+PERCENTILE_COLUMNS = [f"p{p}" for p in PERCENTILES]
+
+METRICS = ("profit_margin", "expense_ratio", "receivable_payable_ratio")
+
+# upper revenue bound of each band (MSME turnover limits); "all" is the
+# fallback when a band has no distribution
+SIZE_BANDS = (("micro", 5e7), ("small", 5e8), ("medium", float("inf")))
+ALL_BANDS = "all"
+
+_registry = None
+_registry_mtime = None
+_registry_checked = None
+_history = None
+_lock = threading.Lock()
+
+
+def normalise_name(name):
+    return " ".join(str(name).lower().split())
+
+
+def size_band(revenue):
+    for band, limit in SIZE_BANDS:
+        if revenue < limit:
+            return band
+    return SIZE_BANDS[-1][0]
+
+
+def benchmark_values(metrics):
+    """
+    The benchmarked ratios of one metrics dict; None where undefined.
+    """
+    revenue = metrics.get("revenue", 0)
+    payable = metrics.get("payable", 0)
+
+    return {
+        "profit_margin": metrics.get("profit_margin", 0),
+        "expense_ratio": metrics["expenses"] / revenue * 100 if revenue else None,
+        "receivable_payable_ratio": metrics["receivable"] / payable if payable else None
     }
-}
+
+
+def percentile_rank(knots, values):
+    """
+    Percentile of each value within a p10..p90 distribution, by binary
+    search over the knots and linear interpolation between them. Values
+    outside the distribution clamp to 10 / 90.
+    """
+    values = np.asarray(values, dtype=float)
+    pct = np.asarray(PERCENTILES, dtype=float)
+
+    i = np.clip(np.searchsorted(knots, values, side="right"), 1, len(knots) - 1)
+    lo, hi = knots[i - 1], knots[i]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac = np.where(hi > lo, (values - lo) / (hi - lo), 0.5)
+
+    return np.clip(pct[i - 1] + np.clip(frac, 0, 1) * (pct[i] - pct[i - 1]), pct[0], pct[-1])
+
+
+def load_aliases(path=INDUSTRY_ALIASES_PATH):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def read_table(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_table(table, path):
+    """
+    Replace `path` atomically, so a worker reloading it never reads a
+    partly written table.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+
+    if path.endswith(".parquet"):
+        table.to_parquet(tmp, index=False)
+    else:
+        table.to_csv(tmp, index=False)
+
+    os.replace(tmp, path)
+
+
+def history_mtime():
+    if not BENCHMARKS_HISTORY_PATH:
+        return None
+
+    try:
+        return os.stat(BENCHMARKS_HISTORY_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+class BenchmarkRegistry:
+    """
+    Percentile distributions per (industry, size band, metric), with a
+    case-insensitive index over industry names and their aliases.
+    """
+
+    def __init__(self, table, aliases=None):
+        self.table = table
+        self.names = {}
+        self.index = {}
+        self.distributions = {}
+
+        for row in table.itertuples(index=False):
+            key = normalise_name(row.industry)
+            self.names.setdefault(key, str(row.industry).strip())
+            self.index[key] = key
+
+            knots = np.array([getattr(row, c) for c in PERCENTILE_COLUMNS], dtype=float)
+            self.distributions[(key, normalise_name(row.size_band), row.metric)] = knots
+
+        for industry, alias_list in (aliases or {}).items():
+            key = normalise_name(industry)
+            for alias in alias_list:
+                self.index.setdefault(normalise_name(alias), key)
+
+    @classmethod
+    def from_files(cls, path=BENCHMARKS_PATH, aliases_path=INDUSTRY_ALIASES_PATH,
+                   history_path=BENCHMARKS_HISTORY_PATH):
+
+        table = read_table(path)
+
+        if history_path and os.path.exists(history_path):
+            table = merge_tables(table, read_table(history_path))
+
+        return cls(table, load_aliases(aliases_path))
+
+    def resolve(self, industry):
+        """
+        Registry key for an industry name or alias, or None.
+        """
+        return self.index.get(normalise_name(industry))
+
+    def distribution(self, key, band, metric):
+        knots = self.distributions.get((key, band, metric))
+        if knots is None:
+            knots = self.distributions.get((key, ALL_BANDS, metric))
+        return knots
+
+
+def merge_tables(base, override):
+    key = ["_industry", "size_band", "metric"]
+
+    frames = []
+    for frame in (override, base):
+        frame = frame.copy()
+        frame["_industry"] = frame["industry"].map(normalise_name)
+        frames.append(frame)
+
+    merged = pd.concat(frames, ignore_index=True).drop_duplicates(subset=key, keep="first")
+    return merged.drop(columns="_industry")
+
+
+def get_registry():
+    """
+    Load the benchmark files on first use, and again when the history
+    table changes, e.g. after a refresh in another worker. Its mtime is
+    looked at most every BENCHMARKS_CHECK_SECONDS.
+    """
+    global _registry, _registry_mtime, _registry_checked
+
+    now = time.monotonic()
+
+    if _registry is not None and (
+        not BENCHMARKS_HISTORY_PATH or now - _registry_checked < BENCHMARKS_CHECK_SECONDS
+    ):
+        return _registry
+
+    with _lock:
+        if _registry is not None and now - _registry_checked < BENCHMARKS_CHECK_SECONDS:
+            return _registry
+
+        mtime = history_mtime()
+
+        if _registry is None or mtime != _registry_mtime:
+            try:
+                _registry = BenchmarkRegistry.from_files(
+                    BENCHMARKS_PATH, INDUSTRY_ALIASES_PATH, BENCHMARKS_HISTORY_PATH
+                )
+            except Exception:
+                if _registry is None:
+                    raise
+            _registry_mtime = mtime
+
+        _registry_checked = now
+
+    return _registry
+
 
 def compare_with_benchmark(metrics, industry):
 
-    if industry not in BENCHMARKS:
+    registry = get_registry()
+    key = registry.resolve(industry)
+
+    if key is None:
         return {
             "enabled": False,
             "message": "No benchmark available for this industry"
         }
 
-    industry_avg = BENCHMARKS[industry]["avg_profit_margin"]
+    band = size_band(metrics.get("revenue", 0))
+    margin_knots = registry.distribution(key, band, "profit_margin")
+
+    if margin_knots is None:
+        return {
+            "enabled": False,
+            "message": "No benchmark available for this industry"
+        }
+
+    industry_avg = float(margin_knots[PERCENTILES.index(50)])
     your_margin = metrics.get("profit_margin", 0)
 
+    percentiles = {}
+    for metric, value in benchmark_values(metrics).items():
+        knots = registry.distribution(key, band, metric)
+        if knots is None or value is None:
+            continue
+
+        percentiles[metric] = {
+            "value": round(float(value), 2),
+            "percentile_rank": round(float(percentile_rank(knots, value)), 1),
+            **{c: float(k) for c, k in zip(PERCENTILE_COLUMNS, knots)}
+        }
+
     return {
         "enabled": True,
+        "industry": registry.names.get(key, key),
+        "size_band": band,
         "industry_avg_profit_margin": industry_avg,
         "your_profit_margin": your_margin,
         "performance":
             "Above industry average" if your_margin >= industry_avg
-            else "Below industry average"
+            else "Below industry average",
+        "percentiles": percentiles
+    }
+
+
+# -------- refresh from stored analyses --------
+
+class HistoryAggregator:
+    """
+    Sorted samples per (industry, band, metric) of stored analyses. Each
+    refresh only reads rows past the last id it has seen; samples live in
+    memory, so the first refresh after a restart reads the whole table.
+    """
+
+    def __init__(self):
+        self.last_id = 0
+        self.samples = {}
+
+    def _add(self, key, values):
+        values = np.sort(np.asarray(values, dtype=float))
+        current = self.samples.get(key)
+        self.samples[key] = values if current is None else np.sort(np.concatenate([current, values]))
+
+    def update(self, db, registry, batch_size=BENCHMARK_REFRESH_BATCH):
+
+        columns = (
+            AnalysisResult.id, AnalysisResult.industry, AnalysisResult.revenue,
+            AnalysisResult.expenses, AnalysisResult.profit_margin,
+            AnalysisResult.receivable, AnalysisResult.payable
+        )
+        read = 0
+
+        while True:
+            rows = db.execute(
+                select(*columns)
+                .where(AnalysisResult.id > self.last_id, AnalysisResult.revenue.isnot(None))
+                .order_by(AnalysisResult.id)
+                .limit(batch_size)
+            ).all()
+
+            if not rows:
+                return read
+
+            frame = pd.DataFrame(rows, columns=[c.key for c in columns])
+            self.last_id = int(frame["id"].iloc[-1])
+            read += len(frame)
+
+            frame["key"] = [
+                registry.resolve(name) or normalise_name(name)
+                for name in frame["industry"].fillna("")
+            ]
+            frame["band"] = [size_band(r) for r in frame["revenue"]]
+
+            revenue = frame["revenue"].where(frame["revenue"] != 0)
+            payable = frame["payable"].where(frame["payable"] != 0)
+            frame["expense_ratio"] = frame["expenses"] / revenue * 100
+            frame["receivable_payable_ratio"] = frame["receivable"] / payable
+
+            for metric in METRICS:
+                valid = frame[frame["key"] != ""].dropna(subset=[metric])
+                for (key, band), values in valid.groupby(["key", "band"])[metric]:
+                    self._add((key, band, metric), values)
+                for key, values in valid.groupby("key")[metric]:
+                    self._add((key, ALL_BANDS, metric), values)
+
+    def table(self, registry, min_samples=BENCHMARK_MIN_SAMPLES):
+
+        records = []
+
+        for (key, band, metric), values in self.samples.items():
+            if len(values) < min_samples:
+                continue
+
+            knots = np.percentile(values, PERCENTILES)
+            records.append({
+                "industry": registry.names.get(key, key),
+                "size_band": band,
+                "metric": metric,
+                **{c: round(float(k), 4) for c, k in zip(PERCENTILE_COLUMNS, knots)}
+            })
+
+        return pd.DataFrame(
+            records, columns=["industry", "size_band", "metric"] + PERCENTILE_COLUMNS
+        )
+
+
+def refresh_from_history(db, min_samples=BENCHMARK_MIN_SAMPLES):
+    """
+    Fold newly stored analyses into the history distributions and swap in
+    a registry where groups with enough samples override the shipped
+    table. With BENCHMARKS_HISTORY_PATH set the table is written there and
+    the other workers pick it up on their next mtime check.
+    """
+    global _registry, _registry_mtime, _registry_checked, _history
+
+    with _lock:
+        registry = _registry or BenchmarkRegistry.from_files(
+            BENCHMARKS_PATH, INDUSTRY_ALIASES_PATH, BENCHMARKS_HISTORY_PATH
+        )
+        _history = _history or HistoryAggregator()
+
+        read = _history.update(db, registry)
+        history = _history.table(registry, min_samples)
+
+        if BENCHMARKS_HISTORY_PATH:
+            write_table(history, BENCHMARKS_HISTORY_PATH)
+
+        base = read_table(BENCHMARKS_PATH)
+        _registry = BenchmarkRegistry(
+            merge_tables(base, history) if len(history) else base,
+            load_aliases(INDUSTRY_ALIASES_PATH)
+        )
+        _registry_mtime = history_mtime()
+        _registry_checked = time.monotonic()
+
+    return {
+        "rows_read": read,
+        "last_id": _history.last_id,
+        "distributions": len(history)
     }
@@ -1,33 +1,130 @@
-def auto_bookkeeping(df):
+import json
+import os
+import re
 
-    if "description" not in df.columns:
-        return {
-            "enabled": False,
-            "message": "No description column found."
-        }
+import numpy as np
+import pandas as pd
+
+from ledger import as_ledger
+
+RULES_PATH = os.getenv(
+    "BOOKKEEPING_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "bookkeeping_rules.json")
+)
+
+_classifier = None
+
+
+class KeywordClassifier:
+    """
+    Category -> keyword rules, one regex alternation per rule.
+
+    Rules are tried in file order and the first category with a keyword
+    anywhere in the (lowercased) description wins, like an if/elif chain.
+    Each distinct description is matched once, on Arrow strings with one
+    vectorised contains per rule; rows share the result through their
+    factorised codes.
+    """
+
+    def __init__(self, rules, default_category="Other"):
+        self.categories = [rule["category"] for rule in rules] + [default_category]
+        self.default_index = len(rules)
+
+        self.patterns = [
+            "|".join(re.escape(k.lower()) for k in rule["keywords"])
+            for rule in rules
+        ]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+
+        return cls(config["rules"], config.get("default_category", "Other"))
+
+    def classify_codes(self, descriptions):
+        """
+        Index into self.categories for every row of a description Series.
+        """
+        codes, uniques = pd.factorize(descriptions)
+
+        unique_index = np.full(len(uniques), self.default_index, dtype=np.intp)
+
+        if len(uniques) and self.default_index:
+            texts = pd.Series(uniques, dtype=object).astype(str).astype("string[pyarrow]").str.lower()
+            masks = [
+                texts.str.contains(pattern, regex=True).to_numpy(dtype=bool, na_value=False)
+                for pattern in self.patterns
+            ]
+            # np.select takes the first true mask: the first rule in file order
+            unique_index = np.select(masks, np.arange(self.default_index), self.default_index)
+
+        # missing descriptions (code -1) fall through to the default
+        return np.where(codes >= 0, unique_index[codes], self.default_index)
 
-    categories = []
+    def classify(self, descriptions):
+        return pd.Categorical.from_codes(
+            self.classify_codes(descriptions), categories=self.categories
+        )
 
-    for text in df["description"].fillna("").str.lower():
 
-        if "rent" in text:
-            categories.append("Rent")
-        elif "electric" in text or "power" in text:
-            categories.append("Utilities")
-        elif "salary" in text or "wage" in text:
-            categories.append("Payroll")
-        elif "transport" in text or "fuel" in text:
-            categories.append("Logistics")
-        elif "amazon" in text or "purchase" in text:
-            categories.append("Office Supplies")
-        else:
-            categories.append("Other")
+def get_classifier():
+    """
+    Load the rule file on first use.
+    """
+    global _classifier
 
-    df["auto_category"] = categories
+    if _classifier is None:
+        _classifier = KeywordClassifier.from_file(RULES_PATH)
 
-    summary = df["auto_category"].value_counts().to_dict()
+    return _classifier
 
-    return {
+
+def summarise_categories(ledger):
+    """
+    Category -> row count and category -> amount total for one ledger;
+    results from several chunks of one ledger can be added together.
+    """
+    classifier = get_classifier()
+    index = classifier.classify_codes(ledger.frame["description"])
+
+    size = len(classifier.categories)
+    counts = np.bincount(index, minlength=size)
+    totals = np.bincount(
+        index, weights=np.nan_to_num(ledger.amount.to_numpy(dtype=float)), minlength=size
+    )
+
+    return (
+        {c: int(n) for c, n in zip(classifier.categories, counts) if n},
+        {c: float(t) for c, n, t in zip(classifier.categories, counts, totals) if n}
+    )
+
+
+def bookkeeping_from_counts(counts, totals=None):
+
+    summary = pd.Series(counts, dtype="int64").sort_values(
+        ascending=False, kind="stable"
+    )
+
+    result = {
         "enabled": True,
-        "category_summary": summary
+        "category_summary": {k: int(v) for k, v in summary.items()}
     }
+
+    if totals is not None:
+        result["category_totals"] = {k: round(float(totals.get(k, 0)), 2) for k in summary.index}
+
+    return result
+
+
+def auto_bookkeeping(ledger):
+
+    ledger = as_ledger(ledger)
+
+    if not ledger.has_description:
+        return {
+            "enabled": False,
+            "message": "No description column found."
+        }
+
+    return bookkeeping_from_counts(*summarise_categories(ledger))
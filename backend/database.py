@@ -1,18 +1,161 @@
 import os
-from sqlalchemy import create_engine
+import time
+import threading
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# optional async driver URL, e.g. postgresql+asyncpg://...
+# (needs sqlalchemy[asyncio] and the driver installed)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "queries": 0,
+    "query_errors": 0,
+    "query_seconds_sum": 0.0,
+    "query_seconds_max": 0.0,
+    "checkouts": 0,
+    "checkout_wait_seconds_sum": 0.0,
+    "checkout_wait_seconds_max": 0.0,
+}
+
+
+def _record(prefix, seconds):
+    with _stats_lock:
+        _stats[prefix + "_seconds_sum"] += seconds
+        _stats[prefix + "_seconds_max"] = max(_stats[prefix + "_seconds_max"], seconds)
+
+
+class _TimedCheckout:
+    """
+    Pool mixin that records how long each checkout waited for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            with _stats_lock:
+                _stats["checkouts"] += 1
+            _record("checkout_wait", time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(url):
+    # sqlite keeps SQLAlchemy's own pool choice (single connection / per thread)
+    if url.startswith("sqlite"):
+        return {}
+
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _time_queries(sync_engine):
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        with _stats_lock:
+            _stats["queries"] += 1
+        _record("query", elapsed)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        # a failed statement never reaches after_cursor_execute; drop its
+        # start time so the next query on this connection pairs correctly
+        conn = exception_context.connection
+        if conn is None:
+            return
+
+        starts = conn.info.get("query_start")
+        if starts:
+            starts.pop()
+            with _stats_lock:
+                _stats["query_errors"] += 1
+
+
+def db_stats():
+    """
+    Query latency, pool checkout waits and current pool state.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    if engine is not None:
+        pool = engine.pool
+        stats["pool"] = pool.status()
+        if isinstance(pool, QueuePool):
+            stats["pool_checked_out"] = pool.checkedout()
+            stats["pool_overflow"] = pool.overflow()
+
+    return stats
+
+
 engine = None
 SessionLocal = None
 
 if DATABASE_URL:
-    engine = create_engine(DATABASE_URL)
+    options = _pool_options(DATABASE_URL)
+    if options:
+        options["poolclass"] = TimedQueuePool
+
+    engine = create_engine(DATABASE_URL, **options)
+    _time_queries(engine)
+
     SessionLocal = sessionmaker(
         autocommit=False,
         autoflush=False,
         bind=engine
     )
 
+async_engine = None
+AsyncSessionLocal = None
+
+if ASYNC_DATABASE_URL:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    options = _pool_options(ASYNC_DATABASE_URL)
+    if options:
+        options["poolclass"] = TimedAsyncQueuePool
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **options)
+    _time_queries(async_engine.sync_engine)
+
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+def is_async_session(db):
+    return AsyncSessionLocal is not None and isinstance(db, AsyncSessionLocal.class_)
+
+
 Base = declarative_base()
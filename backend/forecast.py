@@ -1,56 +1,181 @@
-import pandas as pd
+import numpy as np
 
-def forecast_revenue(df, periods=3):
-    # needs: date, amount, type
+from ledger import as_ledger
+from forecast_models import backtest_and_forecast
+
+FORECAST_TYPES = ("revenue", "expense", "receivable", "payable")
+
+# sign of each type in the net cash position: outstanding receivables are
+# assumed to be collected and payables to be settled
+CASH_SIGNS = {"revenue": 1, "receivable": 1, "expense": -1, "payable": -1}
+
+# types whose forecast moves the position month by month. Receivables and
+# payables are balances, settled once in the opening position; adding their
+# forecasts as monthly flows would count them a second time.
+FLOW_TYPES = ("revenue", "expense")
+
+
+def monthly_by_type(ledger):
+    """
+    (month x type) frame of amount totals from one grouped pass.
+    Frames from several chunks of one ledger can be added together.
+    """
+    if ledger.date_error is not None:
+        raise ValueError(ledger.date_error)
+
+    pivot = ledger.amount.groupby(
+        [ledger.dates.dt.to_period("M"), ledger.type], observed=True
+    ).sum().unstack(fill_value=0.0)
+
+    pivot.columns = pivot.columns.astype(str)
+
+    return pivot
+
+
+def monthly_matrix(pivot, types):
+    """
+    First month and a dense (types x months) float array of totals, with
+    months that have no rows counted as zero.
+    """
+    pivot = pivot.sort_index()
+    start = pivot.index[0]
+
+    # period ordinals count months, so offsets from the first are positions
+    ordinals = pivot.index.asi8
+    positions = ordinals - ordinals[0]
+
+    values = np.zeros((len(types), positions[-1] + 1))
+    values[:, positions] = pivot.reindex(columns=list(types)).fillna(0.0).to_numpy(dtype=float).T
+
+    return start, values
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def cash_flow_projection(summary, months, net_flows):
+    """
+    Net cash position after each forecast month, and the runway in months
+    when the projected flow is negative.
+
+    The opening position is the ledger's signed totals, with outstanding
+    receivables and payables settled in it; `net_flows` are the forecast
+    revenue less expenses (FLOW_TYPES) only.
+    """
+    position = sum(
+        sign * summary[type_]["total"]
+        for type_, sign in CASH_SIGNS.items()
+        if type_ in summary
+    )
+
+    projection = {
+        "opening_position": round(position, 2),
+        "months": [],
+        "runway_months": None
+    }
 
-    if "date" not in df.columns:
+    for month, net in zip(months, net_flows):
+        position += net
+        projection["months"].append({
+            "month": month,
+            "net_flow": round(float(net), 2),
+            "position": round(float(position), 2)
+        })
+
+    burn = -float(np.mean(net_flows))
+    if burn > 0:
+        projection["runway_months"] = round(max(projection["opening_position"], 0.0) / burn, 1)
+
+    return projection
+
+
+def forecast_from_pivot(summary, pivot, periods=3):
+    """
+    Forecast every transaction type from one (types x months) array, then
+    project the net cash position. The revenue forecast keeps its
+    original "forecast" key.
+    """
+    revenue = summary.get("revenue")
+
+    if not revenue or revenue["rows"] == 0:
         return {
             "enabled": False,
-            "message": "No date column found. Forecast skipped."
+            "message": "No revenue rows found."
         }
 
-    try:
-        df["date"] = pd.to_datetime(df["date"])
+    if pivot is None or pivot.empty or "revenue" not in pivot.columns:
+        return {
+            "enabled": False,
+            "message": "Not enough data for forecasting."
+        }
 
-        revenue_df = df[df["type"].str.lower() == "revenue"]
+    start, values = monthly_matrix(pivot, FORECAST_TYPES)
+    result = backtest_and_forecast(values, periods)
 
-        if revenue_df.empty:
-            return {
-                "enabled": False,
-                "message": "No revenue rows found."
-            }
+    last_month = start + (values.shape[1] - 1)
+    months = [(last_month + i).strftime("%Y-%m") for i in range(1, periods + 1)]
+
+    by_type = {}
 
-        monthly = revenue_df.groupby(
-            pd.Grouper(key="date", freq="M")
-        )["amount"].sum().reset_index()
+    for row, type_ in enumerate(FORECAST_TYPES):
+        by_type[type_] = {
+            "model": result["model"][row],
+            "backtest_mae": {
+                name: _rounded(mae[row]) for name, mae in result["mae"].items()
+            },
+            "forecast": [
+                {
+                    "month": month,
+                    "amount": _rounded(result["forecast"][row, i]),
+                    "lower": _rounded(result["lower"][row, i]),
+                    "upper": _rounded(result["upper"][row, i])
+                }
+                for i, month in enumerate(months)
+            ]
+        }
 
-        # very simple forecast (average of last 3 months)
-        last_values = monthly["amount"].tail(3)
+    signs = np.array(
+        [CASH_SIGNS[type_] if type_ in FLOW_TYPES else 0 for type_ in FORECAST_TYPES],
+        dtype=float
+    )
+    net_flows = signs @ result["forecast"]
 
-        if len(last_values) == 0:
-            return {
-                "enabled": False,
-                "message": "Not enough data for forecasting."
+    revenue_forecast = by_type["revenue"]
+
+    return {
+        "enabled": True,
+        "model": revenue_forecast["model"],
+        "backtest_mae": revenue_forecast["backtest_mae"],
+        "forecast": [
+            {
+                "month": point["month"],
+                "forecast_revenue": point["amount"],
+                "lower": point["lower"],
+                "upper": point["upper"]
             }
+            for point in revenue_forecast["forecast"]
+        ],
+        "by_type": by_type,
+        "cash_flow": cash_flow_projection(summary, months, net_flows)
+    }
 
-        avg = float(last_values.mean())
 
-        forecast = []
-        last_date = monthly["date"].iloc[-1]
+def forecast_revenue(ledger, periods=3):
+    # needs: date, amount, type
 
-        for i in range(periods):
-            last_date = last_date + pd.offsets.MonthEnd(1)
-            forecast.append({
-                "month": last_date.strftime("%Y-%m"),
-                "forecast_revenue": round(avg, 2)
-            })
+    ledger = as_ledger(ledger)
 
+    if not ledger.has_date:
         return {
-            "enabled": True,
-            "forecast": forecast
+            "enabled": False,
+            "message": "No date column found. Forecast skipped."
         }
 
-    except Exception as e:
+    try:
+        return forecast_from_pivot(ledger.summary, monthly_by_type(ledger), periods)
+
+    except ValueError as e:
         return {
             "enabled": False,
             "message": str(e)
@@ -0,0 +1,202 @@
+import os
+
+import numpy as np
+
+# Forecasting models over a (series x months) float array. Every model
+# returns its one-step-ahead prediction for each month (NaN where it has
+# too little history) together with the next `periods` months, so a
+# single pass doubles as a rolling-origin backtest.
+
+SEASON_LENGTH = int(os.getenv("FORECAST_SEASON_LENGTH", "12"))
+BACKTEST_WINDOW = int(os.getenv("FORECAST_BACKTEST_WINDOW", "12"))
+
+# two-sided 80% normal interval
+INTERVAL_Z = float(os.getenv("FORECAST_INTERVAL_Z", "1.2816"))
+
+SES_ALPHAS = np.array([0.2, 0.4, 0.6, 0.8])
+
+HW_ALPHA = 0.3
+HW_BETA = 0.1
+HW_GAMMA = 0.2
+
+
+def moving_average(Y, periods, window=3):
+
+    n = Y.shape[1]
+    csum = np.concatenate([np.zeros((Y.shape[0], 1)), np.cumsum(Y, axis=1)], axis=1)
+
+    # means[:, t] is the mean of the (up to) `window` months before month t
+    t = np.arange(1, n + 1)
+    lo = np.maximum(t - window, 0)
+    means = (csum[:, t] - csum[:, lo]) / (t - lo)
+
+    one_step = np.full(Y.shape, np.nan)
+    one_step[:, 1:] = means[:, :-1]
+
+    return one_step, np.repeat(means[:, -1:], periods, axis=1)
+
+
+def _ses(Y, alphas):
+    # alphas broadcasts against the series axis
+    level = Y[:, 0].copy()
+    one_step = np.full(Y.shape, np.nan)
+
+    for t in range(1, Y.shape[1]):
+        one_step[:, t] = level
+        level = level + alphas * (Y[:, t] - level)
+
+    return one_step, level
+
+
+def exponential_smoothing(Y, periods):
+    """
+    Simple exponential smoothing with alpha picked per series from
+    SES_ALPHAS by one-step squared error; all alphas run in one pass.
+    """
+    k, n = Y.shape
+    a = len(SES_ALPHAS)
+
+    one_step, level = _ses(np.repeat(Y, a, axis=0), np.tile(SES_ALPHAS, k))
+    one_step = one_step.reshape(k, a, n)
+    level = level.reshape(k, a)
+
+    sse = np.nansum((one_step - Y[:, None, :]) ** 2, axis=2)
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(k)
+
+    return one_step[rows, best], np.repeat(level[rows, best][:, None], periods, axis=1)
+
+
+def linear_trend(Y, periods):
+    """
+    Least-squares line over all months so far, refitted at every origin
+    from running sums.
+    """
+    n = Y.shape[1]
+    x = np.arange(n, dtype=float)
+
+    # sums over months [0, t) for t = 1..n
+    cnt = x + 1
+    sx = np.cumsum(x)
+    sxx = np.cumsum(x * x)
+    sy = np.cumsum(Y, axis=1)
+    sxy = np.cumsum(Y * x, axis=1)
+
+    denom = cnt * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(denom > 0, (cnt * sxy - sx * sy) / denom, 0.0)
+    intercept = (sy - slope * sx) / cnt
+
+    # a fit on months [0, t) predicts month t
+    one_step = np.full(Y.shape, np.nan)
+    one_step[:, 2:] = intercept[:, 1:-1] + slope[:, 1:-1] * x[2:]
+
+    ahead = np.arange(n, n + periods, dtype=float)
+    forecast = intercept[:, -1:] + slope[:, -1:] * ahead
+
+    return one_step, forecast
+
+
+def holt_winters(Y, periods, season=SEASON_LENGTH):
+    """
+    Additive Holt-Winters. Needs two full seasons; returns None otherwise.
+    """
+    k, n = Y.shape
+    if n < 2 * season:
+        return None
+
+    # season means sit mid-season, at month (season - 1) / 2: detrend the
+    # first season around that point and start the level at its last month
+    mean = Y[:, :season].mean(axis=1)
+    trend = (Y[:, season:2 * season].mean(axis=1) - mean) / season
+    offset = np.arange(season) - (season - 1) / 2
+    seasonal = Y[:, :season] - (mean[:, None] + offset * trend[:, None])
+    level = mean + (season - 1) / 2 * trend
+
+    one_step = np.full(Y.shape, np.nan)
+
+    for t in range(season, n):
+        s = seasonal[:, t % season]
+        one_step[:, t] = level + trend + s
+
+        previous = level
+        level = HW_ALPHA * (Y[:, t] - s) + (1 - HW_ALPHA) * (level + trend)
+        trend = HW_BETA * (level - previous) + (1 - HW_BETA) * trend
+        seasonal[:, t % season] = HW_GAMMA * (Y[:, t] - level) + (1 - HW_GAMMA) * s
+
+    steps = np.arange(1, periods + 1)
+    forecast = (
+        level[:, None] + steps * trend[:, None]
+        + seasonal[:, (n + steps - 1) % season]
+    )
+
+    return one_step, forecast
+
+
+MODELS = {
+    "moving_average": moving_average,
+    "exponential_smoothing": exponential_smoothing,
+    "linear_trend": linear_trend,
+    "holt_winters": holt_winters,
+}
+
+
+def backtest_and_forecast(Y, periods):
+    """
+    Run every model that has enough history on Y (series x months), score
+    each on the same last BACKTEST_WINDOW one-step origins, and keep the
+    lowest-MAE model per series.
+
+    Returns a dict of arrays: model (names), forecast, lower, upper
+    (series x periods; intervals are NaN without a backtest) and mae
+    ({model: per-series MAE}).
+    """
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[None, :]
+
+    k, n = Y.shape
+
+    names = []
+    one_steps = []
+    forecasts = []
+
+    for name, model in MODELS.items():
+        out = model(Y, periods)
+        if out is not None:
+            names.append(name)
+            one_steps.append(out[0])
+            forecasts.append(out[1])
+
+    one_step = np.stack(one_steps)          # models x series x months
+    forecast = np.stack(forecasts)          # models x series x periods
+
+    # compare models on origins where all of them have a prediction
+    available = ~np.isnan(one_step).any(axis=(0, 1))
+    origins = np.flatnonzero(available)[-BACKTEST_WINDOW:]
+
+    if len(origins) < 2:
+        # too short to backtest: the plain moving average, no interval
+        best = np.zeros(k, dtype=int)
+        rmse = np.full(k, np.nan)
+        mae = {}
+    else:
+        errors = one_step[:, :, origins] - Y[None, :, origins]
+        model_mae = np.abs(errors).mean(axis=2)
+        best = np.argmin(model_mae, axis=0)
+        rows = np.arange(k)
+        rmse = np.sqrt((errors[best, rows] ** 2).mean(axis=1))
+        mae = {name: model_mae[i] for i, name in enumerate(names)}
+
+    chosen = forecast[best, np.arange(k)]
+
+    # widen with the horizon as for a random walk on the one-step error
+    spread = INTERVAL_Z * rmse[:, None] * np.sqrt(np.arange(1, periods + 1))
+
+    return {
+        "model": [names[i] for i in best],
+        "forecast": chosen,
+        "lower": chosen - spread,
+        "upper": chosen + spread,
+        "mae": mae,
+    }
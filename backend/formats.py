@@ -0,0 +1,37 @@
+import os
+
+# kept free of heavy imports: app.py checks uploads against these before
+# any parser or pandas is loaded
+
+# parsed into text lines (pdfplumber / python-docx)
+DOCUMENT_EXTENSIONS = (".docx", ".pdf")
+
+# columnar inputs (needs pyarrow); always read batch by batch
+ARROW_EXTENSIONS = (".parquet", ".arrow", ".feather")
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xls") + DOCUMENT_EXTENSIONS + ARROW_EXTENSIONS
+
+UNSUPPORTED_FORMAT = "Only CSV, Excel, Word (.docx), PDF, Parquet and Arrow files are supported."
+
+
+def upload_size(fileobj):
+    """
+    Size in bytes of a seekable upload without reading it.
+    """
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def upload_bytes(fileobj):
+    """
+    The whole contents of a seekable upload. Blocks on a spooled file that
+    has spilled to disk; call it through run_in_threadpool from async code.
+    """
+    fileobj.seek(0)
+    return fileobj.read()
+
+
+def supports_streaming(filename):
+    return filename.endswith((".csv", ".xlsx") + ARROW_EXTENSIONS)
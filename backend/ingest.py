@@ -0,0 +1,264 @@
+import os
+from collections import Counter
+
+import pandas as pd
+
+from bookkeeping import summarise_categories
+from forecast import monthly_by_type
+from instrumentation import stage
+from ledger import LedgerContext
+from tax import TaxRowScan
+from validation import DataQualityReport, check_types, parse_amounts, parse_dates
+
+REQUIRED_COLUMNS = {"amount", "type"}
+
+# uploads at or above this size are analysed chunk by chunk
+STREAMING_MIN_BYTES = int(os.getenv("STREAMING_INGEST_MIN_BYTES", str(20 * 1024 * 1024)))
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "100000"))
+
+# the only columns read from columnar inputs
+LEDGER_COLUMNS = ("amount", "type", "date", "description")
+
+
+def normalise_frame(df, report=None):
+    """
+    Lowercase column names and coerce "amount" / "type" / "date" in place,
+    recording rejected and normalised values in `report` if given.
+    Returns False when the required columns are missing.
+    """
+    df.columns = [str(c).lower() for c in df.columns]
+
+    if not REQUIRED_COLUMNS.issubset(set(df.columns)):
+        return False
+
+    df["amount"] = parse_amounts(df["amount"], report)
+    df["type"] = df["type"].astype(str).str.strip().str.lower()
+    check_types(df["type"], report)
+
+    if "date" in df.columns:
+        df["date"] = parse_dates(df["date"], report)
+
+    if report is not None:
+        report.advance(len(df))
+
+    return True
+
+
+# -------- chunk readers --------
+
+def iter_csv_chunks(fileobj, chunk_rows=CHUNK_ROWS):
+    fileobj.seek(0)
+    yield from pd.read_csv(fileobj, chunksize=chunk_rows)
+
+
+def iter_excel_chunks(fileobj, chunk_rows=CHUNK_ROWS):
+    # openpyxl is what pandas uses for .xlsx; read-only mode walks the sheet
+    # row by row instead of building the whole workbook in memory
+    from openpyxl import load_workbook
+
+    fileobj.seek(0)
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+
+        if header is None:
+            return
+
+        columns = [
+            f"Unnamed: {i}" if name is None else name
+            for i, name in enumerate(header)
+        ]
+
+        batch = []
+        blank = []
+
+        for row in rows:
+            # pandas drops trailing blank rows but keeps interior ones
+            if all(value is None for value in row):
+                blank.append(row)
+                continue
+
+            if blank:
+                batch.extend(blank)
+                blank = []
+
+            batch.append(row)
+
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+
+    finally:
+        workbook.close()
+
+
+def _projection(names):
+    # ledger columns in the file's own spelling, matched case-insensitively
+    return [name for name in names if str(name).lower() in LEDGER_COLUMNS]
+
+
+def iter_parquet_chunks(fileobj, chunk_rows=CHUNK_ROWS):
+    import pyarrow.parquet as pq
+
+    fileobj.seek(0)
+    parquet = pq.ParquetFile(fileobj)
+
+    columns = _projection(parquet.schema_arrow.names)
+
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def iter_arrow_chunks(fileobj, chunk_rows=CHUNK_ROWS):
+    """
+    Arrow IPC file (Feather v2) or stream. Batches are sliced and
+    projected without copying; only to_pandas materialises them.
+    """
+    import pyarrow as pa
+
+    fileobj.seek(0)
+    source = pa.PythonFile(fileobj, mode="r")
+
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        fileobj.seek(0)
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+
+    columns = _projection(reader.schema.names)
+
+    for batch in batches:
+        batch = batch.select(columns)
+        for start in range(0, batch.num_rows, chunk_rows):
+            yield batch.slice(start, chunk_rows).to_pandas()
+
+
+def iter_upload_chunks(filename, fileobj, chunk_rows=CHUNK_ROWS):
+    if filename.endswith(".parquet"):
+        return iter_parquet_chunks(fileobj, chunk_rows)
+
+    if filename.endswith((".arrow", ".feather")):
+        return iter_arrow_chunks(fileobj, chunk_rows)
+
+    if filename.endswith(".csv"):
+        return iter_csv_chunks(fileobj, chunk_rows)
+
+    return iter_excel_chunks(fileobj, chunk_rows)
+
+
+# -------- running aggregates --------
+
+class LedgerAggregates:
+    """
+    Running totals that the analytics modules need, built from one frame
+    or from many chunks of the same ledger.
+
+    Feeding the whole frame in one add() call and feeding it in chunks give
+    identical results, so the in-memory and streaming paths share the same
+    downstream code.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.summary = {}
+
+        self.has_date = False
+        self.monthly = None
+        self.forecast_error = None
+
+        self.has_description = False
+        self.category_counts = Counter()
+        self.category_totals = Counter()
+
+        self.tax_scan = TaxRowScan()
+        self.data_quality = DataQualityReport()
+
+    def add(self, df):
+
+        ledger = LedgerContext(df)
+        self.rows += len(df)
+
+        # the per-chunk work behind the forecast, bookkeeping and tax
+        # sections has its own stages, nested in "aggregate"
+        with stage("tax_scan"):
+            self.tax_scan.add(ledger)
+
+        for type_, stats in ledger.summary.items():
+            current = self.summary.get(type_)
+            if current is None:
+                self.summary[type_] = dict(stats)
+                continue
+
+            current["rows"] += stats["rows"]
+            current["count"] += stats["count"]
+            current["total"] += stats["total"]
+            if stats["count"]:
+                current["min"] = stats["min"] if current["min"] is None else min(current["min"], stats["min"])
+                current["max"] = stats["max"] if current["max"] is None else max(current["max"], stats["max"])
+
+        if ledger.has_date:
+            self.has_date = True
+
+            if self.forecast_error is None:
+                try:
+                    with stage("forecast_monthly"):
+                        monthly = monthly_by_type(ledger)
+                    self.monthly = (
+                        monthly if self.monthly is None
+                        else self.monthly.add(monthly, fill_value=0)
+                    )
+                except Exception as e:
+                    self.forecast_error = str(e)
+
+        if ledger.has_description:
+            self.has_description = True
+            with stage("bookkeeping_categories"):
+                counts, totals = summarise_categories(ledger)
+            self.category_counts.update(counts)
+            self.category_totals.update(totals)
+
+        return self
+
+
+def aggregate_chunks(chunks, writer=None):
+    """
+    Normalise each chunk and fold it into a LedgerAggregates, handing the
+    normalised chunks to `writer` (a ledger_store.LedgerWriter) if given.
+    Returns None when the first chunk lacks the required columns.
+    """
+    aggregates = LedgerAggregates()
+
+    for chunk in chunks:
+        with stage("validate"):
+            if not normalise_frame(chunk, aggregates.data_quality):
+                return None
+
+        if writer is not None:
+            with stage("ledger_store"):
+                writer.write(chunk)
+
+        with stage("aggregate"):
+            aggregates.add(chunk)
+
+    return aggregates
+
+
+def aggregate_normalised(chunks):
+    """
+    LedgerAggregates of chunks that are already normalised, such as a
+    stored canonical ledger; no validation is repeated.
+    """
+    aggregates = LedgerAggregates()
+
+    for chunk in chunks:
+        aggregates.data_quality.advance(len(chunk))
+        aggregates.add(chunk)
+
+    return aggregates
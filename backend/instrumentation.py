@@ -0,0 +1,226 @@
+import os
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# add a Server-Timing header with the stage durations to every response
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+# upper bounds in seconds, as in the Prometheus client defaults plus a
+# longer tail for LLM calls and large documents
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+_lock = threading.Lock()
+
+# (name, labels) -> [bucket counts..., +Inf count], sum
+_histograms = {}
+
+# (name, labels) -> value
+_counters = {}
+
+HELP = {
+    "sme_stage_duration_seconds": "Time spent in each pipeline stage.",
+    "sme_stage_errors_total": "Pipeline stages that ended with an exception.",
+    "sme_rows_processed_total": "Ledger rows processed per stage.",
+    "sme_bytes_processed_total": "Upload bytes processed per stage.",
+    "sme_http_request_duration_seconds": "HTTP request latency by route.",
+}
+
+# stage durations of the current request, for the Server-Timing header
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def observe(name, labels, seconds):
+    """
+    Add one observation to the histogram `name`; `labels` is a tuple of
+    (label, value) pairs.
+    """
+    index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+
+    with _lock:
+        entry = _histograms.get((name, labels))
+        if entry is None:
+            entry = _histograms[(name, labels)] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+        entry[0][index] += 1
+        entry[1] += seconds
+
+
+def count(name, labels, value=1):
+
+    with _lock:
+        _counters[(name, labels)] = _counters.get((name, labels), 0) + value
+
+
+def record_rows(stage_name, rows):
+    count("sme_rows_processed_total", (("stage", stage_name),), rows)
+
+
+def record_bytes(stage_name, size):
+    count("sme_bytes_processed_total", (("stage", stage_name),), size)
+
+
+def record_stage(name, seconds):
+    observe("sme_stage_duration_seconds", (("stage", name),), seconds)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a pipeline stage. The duration goes into the stage histogram and,
+    inside a request, its Server-Timing entries; an exception is counted
+    and re-raised. Stages may nest (e.g. "validate" runs inside "read").
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        count("sme_stage_errors_total", (("stage", name),))
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+class StageTimer:
+    """
+    A stage made of separate steps, e.g. the awaits of a streamed model
+    response, with the consumer's time between them left out. Each step
+    runs in part(); finish() records their total as one observation.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.elapsed = 0.0
+
+    @contextmanager
+    def part(self):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            count("sme_stage_errors_total", (("stage", self.name),))
+            raise
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def finish(self):
+        record_stage(self.name, self.elapsed)
+
+
+def server_timing(timings, total):
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware recording the latency of every HTTP request by route
+    template, and adding the Server-Timing header when SERVER_TIMING is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings = {}
+        token = _request_timings.set(timings)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+
+                if SERVER_TIMING:
+                    header = server_timing(timings, time.perf_counter() - start)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+
+            observe(
+                "sme_http_request_duration_seconds",
+                (("method", scope["method"]), ("route", path), ("status", str(status[0]))),
+                time.perf_counter() - start
+            )
+
+
+# -------- Prometheus text format --------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _header(lines, name, kind):
+    lines.append(f"# HELP {name} {HELP.get(name, name)}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render_metrics(gauges=None):
+    """
+    All histograms and counters, plus the given {name: value} gauges, in
+    the Prometheus text exposition format.
+    """
+    with _lock:
+        histograms = {k: (list(v[0]), v[1]) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+
+    for name in sorted({name for name, _ in histograms}):
+        _header(lines, name, "histogram")
+
+        for (metric, labels), (buckets, total) in sorted(histograms.items()):
+            if metric != name:
+                continue
+
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, buckets):
+                cumulative += n
+                lines.append(f"{name}_bucket{_label_text(labels + (('le', str(bound)),))} {cumulative}")
+
+            cumulative += buckets[-1]
+            lines.append(f"{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(labels)} {total}")
+            lines.append(f"{name}_count{_label_text(labels)} {cumulative}")
+
+    for name in sorted({name for name, _ in counters}):
+        _header(lines, name, "counter")
+
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_label_text(labels)} {value}")
+
+    for name, value in sorted((gauges or {}).items()):
+        _header(lines, name, "gauge")
+        lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
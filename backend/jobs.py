@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+import asyncio
+import contextvars
+from collections import OrderedDict
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+
+# finished jobs kept for polling; oldest are dropped first
+JOB_RESULTS_KEPT = int(os.getenv("JOB_RESULTS_KEPT", "1000"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    In-process job queue: a bounded asyncio.Queue drained by a fixed number
+    of worker tasks on the serving event loop.
+
+    submit() fails fast with QueueFull when JOB_QUEUE_SIZE jobs are already
+    waiting, and at most JOB_WORKERS jobs run at once. Job state lives in
+    this worker process only.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, keep=JOB_RESULTS_KEPT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep = keep
+
+        self._queue = None
+        self._tasks = []
+        self._jobs = OrderedDict()
+
+    def _start(self):
+        # the queue has to be created on the loop that serves requests
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+
+        # workers outlive the request that starts them; created in an empty
+        # context they do not carry its context variables (e.g. the
+        # Server-Timing dict) into every later job
+        self._tasks = [
+            contextvars.Context().run(asyncio.create_task, self._worker())
+            for _ in range(self.workers)
+        ]
+
+    def submit(self, func, *args, cleanup=None):
+        """
+        Queue `await func(*args)` and return its job id.
+        `cleanup()` runs once the job has finished, whatever the outcome.
+        """
+        if self._queue is None:
+            self._start()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "status_code": None
+        }
+
+        try:
+            self._queue.put_nowait((job, func, args, cleanup))
+        except asyncio.QueueFull:
+            raise QueueFull("Job queue is full, retry later.")
+
+        self._jobs[job_id] = job
+        self._trim()
+
+        return job_id
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def pending(self):
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def _worker(self):
+
+        while True:
+            job, func, args, cleanup = await self._queue.get()
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+            try:
+                job["result"] = await func(*args)
+                job["status"] = "done"
+
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = getattr(e, "detail", None) or str(e)
+                job["status_code"] = getattr(e, "status_code", 500)
+
+            finally:
+                job["finished_at"] = time.time()
+                if cleanup is not None:
+                    cleanup()
+                self._queue.task_done()
+
+    def _trim(self):
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in ("done", "failed")
+        ]
+
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+
+job_queue = JobQueue()
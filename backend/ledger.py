@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+# transaction types the analytics understand; others are kept but ignored
+KNOWN_TYPES = ("revenue", "expense", "receivable", "payable")
+
+
+def summarise_amounts(amount, types):
+    """
+    Per-type row count, amount count, total, min and max in one grouped pass.
+    Rows with a missing amount are counted in "rows" but skipped by every
+    other statistic.
+    """
+    if len(amount) == 0:
+        return {}
+
+    grouped = amount.groupby(types, sort=False, observed=True).agg(
+        ["size", "count", "sum", "min", "max"]
+    )
+
+    summary = {}
+
+    for type_, rows, count, total, lo, hi in grouped.itertuples():
+        summary[type_] = {
+            "rows": int(rows),
+            "count": int(count),
+            "total": float(total),
+            "min": float(lo) if count else None,
+            "max": float(hi) if count else None,
+        }
+
+    return summary
+
+
+class LedgerContext:
+    """
+    Read-only view of one normalised ledger frame, built once per upload
+    (or once per chunk when streaming) and shared by every analytics module.
+
+    Holds the categorical type column, cached per-type masks, the parsed
+    date column and the per-type summary, so no module has to lowercase,
+    mask or reparse the frame again. Modules must not write to the frame.
+    """
+
+    def __init__(self, df):
+        self.frame = df
+        self.columns = frozenset(df.columns)
+
+        self.amount = df["amount"]
+        self.type = df["type"].astype("category")
+        self._codes = self.type.cat.codes.to_numpy()
+        self._masks = {}
+
+        self.summary = summarise_amounts(self.amount, self.type)
+
+        self.dates = None
+        self.date_error = None
+
+        if "date" in self.columns:
+            try:
+                self.dates = pd.to_datetime(df["date"])
+            except Exception as e:
+                self.date_error = str(e)
+
+    @property
+    def has_date(self):
+        return "date" in self.columns
+
+    @property
+    def has_description(self):
+        return "description" in self.columns
+
+    def mask(self, type_):
+        """
+        Read-only boolean mask of the rows with the given (lowercase) type.
+        """
+        mask = self._masks.get(type_)
+
+        if mask is None:
+            categories = self.type.cat.categories
+
+            if type_ in categories:
+                mask = self._codes == categories.get_loc(type_)
+            else:
+                mask = np.zeros(len(self._codes), dtype=bool)
+
+            mask.flags.writeable = False
+            self._masks[type_] = mask
+
+        return mask
+
+    def total(self, type_):
+        entry = self.summary.get(type_)
+        return entry["total"] if entry else 0.0
+
+
+def as_ledger(data):
+    """
+    Accept either a LedgerContext or a normalised DataFrame.
+    """
+    if isinstance(data, LedgerContext):
+        return data
+
+    return LedgerContext(data)
@@ -0,0 +1,168 @@
+import os
+import hashlib
+import tempfile
+from contextlib import contextmanager
+
+# directory for canonical ledgers; unset disables persistence (needs pyarrow)
+LEDGER_STORE_DIR = os.getenv("LEDGER_STORE_DIR")
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(fileobj):
+    """
+    SHA-256 of a seekable upload, read in blocks; leaves it at the start.
+    """
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+
+    for block in iter(lambda: fileobj.read(HASH_CHUNK_BYTES), b""):
+        digest.update(block)
+
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def ledger_path(digest):
+    return os.path.join(LEDGER_STORE_DIR, f"ledger_{digest}.arrow")
+
+
+def has_ledger(digest):
+    return bool(LEDGER_STORE_DIR) and digest is not None and os.path.exists(ledger_path(digest))
+
+
+def _schema(has_date, has_description):
+    import pyarrow as pa
+
+    fields = [
+        ("type", pa.dictionary(pa.int32(), pa.string())),
+        ("amount_paise", pa.int64()),
+    ]
+    if has_date:
+        fields.append(("date", pa.date32()))
+    if has_description:
+        fields.append(("description", pa.string()))
+
+    return pa.schema(fields)
+
+
+class LedgerWriter:
+    """
+    Writes normalised ledger chunks as an uncompressed Arrow IPC file:
+    dictionary-encoded type, int64 paise amounts, date32 dates. The file
+    only appears under its final name once close() succeeds.
+    """
+
+    def __init__(self, digest):
+        os.makedirs(LEDGER_STORE_DIR, exist_ok=True)
+
+        self.path = ledger_path(digest)
+        fd, self.tmp_path = tempfile.mkstemp(dir=LEDGER_STORE_DIR, suffix=".tmp")
+        os.close(fd)
+
+        self.schema = None
+        self.writer = None
+        self.categories = []
+
+    def _open(self, df):
+        import pyarrow as pa
+
+        # every chunk of one upload has the columns of the first
+        self.schema = _schema("date" in df.columns, "description" in df.columns)
+        self.writer = pa.ipc.new_file(
+            self.tmp_path, self.schema,
+            options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        )
+
+    def write(self, df):
+        import numpy as np
+        import pandas as pd
+        import pyarrow as pa
+
+        if self.writer is None:
+            self._open(df)
+
+        # the type dictionary only ever grows, so each batch's dictionary
+        # is a delta on the previous one
+        types = df["type"].astype(str)
+        new = pd.unique(types[~types.isin(self.categories)])
+        self.categories.extend(new.tolist())
+
+        codes = pd.Categorical(types, categories=self.categories).codes
+        type_array = pa.DictionaryArray.from_arrays(
+            pa.array(codes, type=pa.int32()), pa.array(self.categories, type=pa.string())
+        )
+
+        amount = df["amount"].to_numpy(dtype=float, na_value=np.nan)
+        missing = np.isnan(amount)
+        paise = np.round(np.where(missing, 0, amount) * 100).astype(np.int64)
+
+        columns = [type_array, pa.array(paise, mask=missing)]
+
+        if "date" in self.schema.names:
+            days = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+            columns.append(pa.array(days, type=pa.date32(), from_pandas=True))
+
+        if "description" in self.schema.names:
+            description = df["description"]
+            columns.append(pa.array(
+                description.where(description.isna(), description.astype(str)),
+                type=pa.string(), from_pandas=True
+            ))
+
+        self.writer.write_batch(pa.record_batch(columns, schema=self.schema))
+
+    def close(self):
+        if self.writer is None:
+            # nothing was written: no ledger to keep
+            os.unlink(self.tmp_path)
+            return
+
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        try:
+            if self.writer is not None:
+                self.writer.close()
+        finally:
+            os.unlink(self.tmp_path)
+
+
+@contextmanager
+def open_ledger_writer(digest):
+    """
+    A LedgerWriter for this upload, or None when persistence is off or the
+    ledger is already stored.
+    """
+    if not LEDGER_STORE_DIR or digest is None or has_ledger(digest):
+        yield None
+        return
+
+    writer = LedgerWriter(digest)
+    try:
+        yield writer
+    except BaseException:
+        writer.abort()
+        raise
+
+    writer.close()
+
+
+def iter_stored_chunks(digest):
+    """
+    Normalised frames of a stored ledger, one per record batch, read from
+    a memory map instead of being loaded or reparsed.
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(ledger_path(digest)) as source:
+        reader = pa.ipc.open_file(source)
+
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+
+            df = batch.to_pandas(date_as_object=False)
+            df.insert(0, "amount", df.pop("amount_paise") / 100)
+
+            yield df
@@ -1,39 +1,97 @@
 import os
 import json
-from openai import OpenAI
+import asyncio
 
-_client = None
+from starlette.concurrency import run_in_threadpool
 
+from instrumentation import StageTimer, stage
+from report_cache import cache_key, report_cache
 
-def get_client():
+MODEL = os.getenv("OPENAI_MODEL", "gpt-5")
+
+# per model call; the whole English + Hindi pipeline gets LLM_PIPELINE_TIMEOUT
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_PIPELINE_TIMEOUT = float(os.getenv("LLM_PIPELINE_TIMEOUT", "120"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# translations have their own limit: a streaming report holds its slot until
+# the last delta, and its translations must be able to run alongside it
+LLM_TRANSLATION_CONCURRENCY = int(
+    os.getenv("LLM_TRANSLATION_CONCURRENCY", str(LLM_MAX_CONCURRENCY))
+)
+
+# English paragraphs are sent for translation in batches of at least this size
+TRANSLATION_SEGMENT_CHARS = int(os.getenv("TRANSLATION_SEGMENT_CHARS", "1500"))
+
+REPORT_UNAVAILABLE = (
+    "AI report is temporarily unavailable because the AI service "
+    "is not configured. Financial metrics and risk analysis were "
+    "generated successfully."
+)
+HINDI_UNAVAILABLE = (
+    "एआई सेवा कॉन्फ़िगर नहीं की गई है। इसलिए हिंदी रिपोर्ट उपलब्ध नहीं है।"
+)
+
+_async_client = None
+_semaphores = {}
+
+
+def get_async_client():
     """
-    Create OpenAI client only when needed.
-    If API key is missing, return None instead of crashing.
+    Create the OpenAI client only when needed; None if no API key is
+    configured. OPENAI_BASE_URL can point it at a local stub server for
+    testing.
     """
-    global _client
+    global _async_client
 
-    if _client is not None:
-        return _client
+    if _async_client is not None:
+        return _async_client
 
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return None
 
-    _client = OpenAI(api_key=api_key)
-    return _client
+    from openai import AsyncOpenAI
+
+    _async_client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=os.getenv("OPENAI_BASE_URL"),
+        timeout=LLM_TIMEOUT_SECONDS
+    )
+    return _async_client
+
+
+def _get_semaphore(kind="report"):
+    # caps in-flight model calls of one kind per worker, across all requests
+    if kind not in _semaphores:
+        limit = LLM_TRANSLATION_CONCURRENCY if kind == "translation" else LLM_MAX_CONCURRENCY
+        _semaphores[kind] = asyncio.Semaphore(limit)
+
+    return _semaphores[kind]
+
+
+class ReportFailed(RuntimeError):
+    """
+    The model call failed, stopped early or returned no text.
+    """
 
 
 def _extract_text(response):
     """
-    Safely extract text from OpenAI Responses API output.
+    Text of a finished Responses API call.
     """
-    try:
-        return response.output[0].content[0].text
-    except Exception:
-        return str(response)
+    status = getattr(response, "status", None)
+    if status != "completed":
+        raise ReportFailed(f"response ended with status {status!r}")
+
+    text = response.output_text
+    if not text or not text.strip():
+        raise ReportFailed("response contained no text")
 
+    return text
 
-def generate_financial_report(
+
+def build_report_prompt(
     business_name: str,
     industry: str,
     metrics: dict,
@@ -41,17 +99,7 @@ def generate_financial_report(
     credit_score: int
 ):
 
-    client = get_client()
-
-    # ✅ Safe fallback when API key is not configured
-    if client is None:
-        return (
-            "AI report is temporarily unavailable because the AI service "
-            "is not configured. Financial metrics and risk analysis were "
-            "generated successfully."
-        )
-
-    prompt = f"""
+    return f"""
 You are a professional financial advisor for Small and Medium Enterprises (SMEs).
 
 Business name: {business_name}
@@ -81,25 +129,10 @@ The report must contain:
 Keep the language simple and business friendly.
 """
 
-    response = client.responses.create(
-        model="gpt-5",
-        input=prompt
-    )
 
-    return _extract_text(response)
-
-
-def translate_to_hindi(english_report: str):
-
-    client = get_client()
-
-    # ✅ Safe fallback when API key is not configured
-    if client is None:
-        return (
-            "एआई सेवा कॉन्फ़िगर नहीं की गई है। इसलिए हिंदी रिपोर्ट उपलब्ध नहीं है।"
-        )
+def build_translation_prompt(english_report: str):
 
-    prompt = f"""
+    return f"""
 Translate the following financial report into simple Hindi
 suitable for small business owners in India.
 
@@ -107,9 +140,171 @@ Report:
 {english_report}
 """
 
-    response = client.responses.create(
-        model="gpt-5",
-        input=prompt
-    )
+
+# -------- async pipeline --------
+
+async def stream_financial_report(
+    business_name: str,
+    industry: str,
+    metrics: dict,
+    risks: list,
+    credit_score: int
+):
+    """
+    Yield the English report as text deltas while the model writes it.
+    Raises ReportFailed if the response fails, is cut short or the stream
+    ends without response.completed.
+    """
+    client = get_async_client()
+
+    if client is None:
+        yield REPORT_UNAVAILABLE
+        return
+
+    prompt = build_report_prompt(business_name, industry, metrics, risks, credit_score)
+
+    # only the model's time; the consumer's work between deltas is not counted
+    timer = StageTimer("llm_report")
+
+    async with _get_semaphore():
+        try:
+            with timer.part():
+                stream = await client.responses.create(model=MODEL, input=prompt, stream=True)
+
+            completed = False
+
+            try:
+                while True:
+                    with timer.part():
+                        try:
+                            event = await stream.__anext__()
+                        except StopAsyncIteration:
+                            break
+
+                    if event.type == "response.output_text.delta":
+                        yield event.delta
+                    elif event.type == "response.completed":
+                        completed = True
+                    elif event.type in ("response.failed", "response.incomplete", "error"):
+                        raise ReportFailed(f"report stream ended with {event.type}")
+
+                if not completed:
+                    raise ReportFailed("report stream ended before response.completed")
+            finally:
+                # release the connection when the consumer stops early
+                await stream.close()
+
+        finally:
+            timer.finish()
+
+
+async def translate_to_hindi_async(english_report: str):
+
+    client = get_async_client()
+
+    if client is None:
+        return HINDI_UNAVAILABLE
+
+    async with _get_semaphore("translation"):
+        with stage("llm_translation"):
+            response = await client.responses.create(
+                model=MODEL,
+                input=build_translation_prompt(english_report)
+            )
 
     return _extract_text(response)
+
+
+async def _generate_reports(business_name, industry, metrics, risks, credit_score):
+
+    english = []
+    pending = ""
+    translations = []
+
+    report = stream_financial_report(business_name, industry, metrics, risks, credit_score)
+
+    try:
+        async for delta in report:
+            english.append(delta)
+            pending += delta
+
+            # hand finished paragraphs to translation while the rest streams
+            cut = pending.rfind("\n\n")
+            if cut >= TRANSLATION_SEGMENT_CHARS:
+                segment, pending = pending[:cut], pending[cut + 2:]
+                translations.append(asyncio.create_task(translate_to_hindi_async(segment)))
+
+        if pending.strip():
+            translations.append(asyncio.create_task(translate_to_hindi_async(pending)))
+
+        hindi = await asyncio.gather(*translations)
+
+    except BaseException:
+        for task in translations:
+            task.cancel()
+        raise
+
+    finally:
+        # on a timeout, close the stream now rather than when it is collected
+        await report.aclose()
+
+    english = "".join(english)
+    if not english.strip():
+        raise ReportFailed("report stream contained no text")
+
+    return english, "\n\n".join(hindi)
+
+
+async def generate_reports(
+    business_name: str,
+    industry: str,
+    metrics: dict,
+    risks: list,
+    credit_score: int
+):
+    """
+    English report and its Hindi translation without blocking the event loop.
+
+    The English report is streamed and translated paragraph batch by
+    paragraph batch as it arrives, so the two calls overlap. Both texts are
+    cached on a hash of the prompt inputs and model, so identical inputs
+    skip the model entirely; failed or empty responses are never cached.
+    Raises ReportFailed, or asyncio.TimeoutError after
+    LLM_PIPELINE_TIMEOUT seconds.
+    """
+    if get_async_client() is None:
+        return REPORT_UNAVAILABLE, HINDI_UNAVAILABLE
+
+    report_key = cache_key("report", MODEL, {
+        "business_name": business_name,
+        "industry": industry,
+        "metrics": metrics,
+        "risks": risks,
+        "credit_score": credit_score
+    })
+
+    english = await run_in_threadpool(report_cache.get, report_key)
+
+    if english is not None:
+        translation_key = cache_key("translation_hi", MODEL, english)
+        hindi = await run_in_threadpool(report_cache.get, translation_key)
+
+        if hindi is None:
+            hindi = await asyncio.wait_for(
+                translate_to_hindi_async(english), timeout=LLM_PIPELINE_TIMEOUT
+            )
+            await run_in_threadpool(report_cache.set, translation_key, hindi)
+
+        return english, hindi
+
+    english, hindi = await asyncio.wait_for(
+        _generate_reports(business_name, industry, metrics, risks, credit_score),
+        timeout=LLM_PIPELINE_TIMEOUT
+    )
+
+    await run_in_threadpool(report_cache.set, report_key, english)
+    await run_in_threadpool(
+        report_cache.set, cache_key("translation_hi", MODEL, english), hindi
+    )
+
+    return english, hindi
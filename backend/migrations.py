@@ -0,0 +1,117 @@
+# Table creation and schema upgrades for databases created before the
+# scalar metric columns. Runs at startup in every worker and can also be
+# run by hand (e.g. as a deploy step):  python migrations.py
+from sqlalchemy import (
+    Column, Integer, MetaData, Table, bindparam, func, inspect, select, text, update
+)
+
+from database import engine
+from models import AnalysisResult, Base, METRIC_COLUMNS
+
+BACKFILL_BATCH = 1000
+
+# bump when a step is added to migrate(); databases already at this version
+# skip it, so startup costs one query and the backfill runs once
+SCHEMA_VERSION = 1
+
+# Postgres advisory lock held while migrating, so workers starting together
+# run the DDL and the backfill one at a time; the first one does the work
+# and the others find the schema up to date
+MIGRATION_LOCK_KEY = 0x534D4501
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    Column("version", Integer, nullable=False)
+)
+
+
+def add_missing_columns(conn):
+
+    table = AnalysisResult.__table__
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+
+    for column in table.columns:
+        if column.name in existing:
+            continue
+
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def create_missing_indexes(conn):
+    for index in AnalysisResult.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+
+def backfill_metric_columns(conn, batch_size=BACKFILL_BATCH):
+    """
+    Copy metric values out of the JSON blob for rows that predate the
+    columns, walking the table by id so each batch is an index seek.
+    """
+    last_id = 0
+    updated = 0
+
+    stmt = update(AnalysisResult.__table__).where(
+        AnalysisResult.__table__.c.id == bindparam("row_id")
+    ).values({name: bindparam(name) for name in METRIC_COLUMNS})
+
+    while True:
+        rows = conn.execute(
+            select(AnalysisResult.id, AnalysisResult.metrics)
+            .where(AnalysisResult.id > last_id, AnalysisResult.revenue.is_(None))
+            .order_by(AnalysisResult.id)
+            .limit(batch_size)
+        ).all()
+
+        if not rows:
+            return updated
+
+        params = []
+        for row_id, metrics in rows:
+            metrics = metrics or {}
+            values = {"row_id": row_id}
+            for name in METRIC_COLUMNS:
+                value = metrics.get(name)
+                values[name] = None if value is None else float(value)
+            params.append(values)
+
+        conn.execute(stmt, params)
+        updated += len(params)
+        last_id = rows[-1][0]
+
+
+def current_version(conn):
+    schema_version.create(bind=conn, checkfirst=True)
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def migrate(bind=None):
+    """
+    Create missing tables, bring the database up to SCHEMA_VERSION and
+    return the number of rows backfilled (0 when it already was). On
+    Postgres the whole run holds an advisory lock.
+    """
+    bind = bind or engine
+
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # released when the transaction ends
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+        Base.metadata.create_all(bind=conn)
+
+        if current_version(conn) >= SCHEMA_VERSION:
+            return 0
+
+        add_missing_columns(conn)
+        create_missing_indexes(conn)
+        updated = backfill_metric_columns(conn)
+
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert().values(version=SCHEMA_VERSION))
+
+        return updated
+
+
+if __name__ == "__main__":
+    print(f"Backfilled {migrate()} rows")
@@ -1,6 +1,10 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Integer, String, JSON, Float, DateTime, Index, func
 from database import Base
 
+# metric keys copied out of the `metrics` JSON into their own columns
+METRIC_COLUMNS = ("revenue", "expenses", "profit", "profit_margin", "receivable", "payable")
+
+
 class AnalysisResult(Base):
     __tablename__ = "analysis_results"
 
@@ -11,3 +15,26 @@ class AnalysisResult(Base):
     risks = Column(JSON)
     credit_score = Column(Integer)
     ai_report = Column(String)
+
+    # forecast, bookkeeping, benchmark, tax_compliance and report_hi,
+    # kept for the PDF report
+    details = Column(JSON)
+
+    # SHA-256 of the upload; names its canonical ledger in LEDGER_STORE_DIR
+    ledger_digest = Column(String)
+
+    revenue = Column(Float)
+    expenses = Column(Float)
+    profit = Column(Float)
+    profit_margin = Column(Float)
+    receivable = Column(Float)
+    payable = Column(Float)
+    created_at = Column(DateTime, default=func.now())
+
+    # every index ends in id so keyset pagination can seek on it
+    __table_args__ = (
+        Index("ix_analysis_results_business", "business_name", "id"),
+        Index("ix_analysis_results_industry_score", "industry", "credit_score", "id"),
+        Index("ix_analysis_results_score", "credit_score", "id"),
+        Index("ix_analysis_results_created", "created_at", "id"),
+    )
@@ -0,0 +1,299 @@
+import io
+import os
+import math
+import asyncio
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+# 0 parses in the request's thread pool instead of a process pool
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "120"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))
+
+_pool = None
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+def parse_text_lines_to_df(lines):
+    rows = []
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # try comma separated
+        if "," in line:
+            parts = [p.strip() for p in line.split(",")]
+        else:
+            # fallback: whitespace separated
+            parts = line.split()
+
+        if len(parts) >= 2:
+            rows.append([parts[0], parts[1]])
+
+    if not rows:
+        return None
+
+    # remove header if present
+    if rows[0][0].lower() == "amount":
+        rows = rows[1:]
+
+    return pd.DataFrame(rows, columns=["amount", "type"])
+
+# -------- helpers for DOCX and PDF --------
+# amounts are left as text; ingest.normalise_frame parses and validates them
+
+def read_docx_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
+    from docx import Document
+
+    doc = Document(io.BytesIO(file_bytes))
+
+    rows = []
+
+    # -------- 1. Try tables first --------
+    for table in doc.tables:
+        for row in table.rows[1:]:
+            cells = [cell.text.strip() for cell in row.cells]
+            if len(cells) >= 2:
+                rows.append([cells[0], cells[1]])
+
+    if rows:
+        return pd.DataFrame(rows, columns=["amount", "type"])
+
+    # -------- 2. Fallback: normal text lines --------
+    text_rows = []
+
+    for para in doc.paragraphs:
+        line = para.text.strip()
+        if not line:
+            continue
+
+        # expect: amount,type
+        if "," in line:
+            parts = line.split(",")
+            if len(parts) >= 2:
+                text_rows.append([parts[0].strip(), parts[1].strip()])
+
+    if not text_rows:
+        raise ValueError(
+            "No table or valid text lines found in Word document. "
+            "Use a table or lines like: 50000,Revenue"
+        )
+
+    # remove header if present
+    if text_rows[0][0].lower() == "amount":
+        text_rows = text_rows[1:]
+
+    return pd.DataFrame(text_rows, columns=["amount", "type"])
+
+
+def extract_pdf_pages(source, start=0, stop=None):
+    """
+    Table rows and fallback text lines of pages [start, stop) of a PDF.
+    `source` is a path or a file object; runs inside pool workers.
+
+    Text is only extracted while no table rows have turned up, and it
+    reuses the characters pdfplumber already parsed for the table pass.
+    Each page's caches are released before moving on, so memory stays
+    flat over long statements.
+    """
+    import pdfplumber
+
+    rows = []
+
+    all_text_lines = []
+
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages[start:stop]:
+
+            # -------- try tables first --------
+            tables = page.extract_tables()
+            for table in tables:
+                for row in table[1:]:
+                    if row and len(row) >= 2:
+                        rows.append([row[0], row[1]])
+
+            # -------- collect text for fallback --------
+            if not rows:
+                text = page.extract_text()
+                if text:
+                    all_text_lines.extend(text.splitlines())
+
+            page.close()
+
+    # text is only needed when the whole document has no tables
+    if rows:
+        all_text_lines = []
+
+    return rows, all_text_lines
+
+
+def pdf_parts_to_dataframe(rows, all_text_lines) -> pd.DataFrame:
+
+    # ---- if table data found
+    if rows:
+        return pd.DataFrame(rows, columns=["amount", "type"])
+
+    # ---- fallback to normal text
+    df = parse_text_lines_to_df(all_text_lines)
+
+    if df is None:
+        raise ValueError(
+            "No table or valid text lines found in PDF. "
+            "Use table or lines like: 50000,Revenue"
+        )
+
+    return df
+
+
+def read_pdf_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
+    return pdf_parts_to_dataframe(*extract_pdf_pages(io.BytesIO(file_bytes)))
+
+
+def pdf_page_count(source) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(source) as pdf:
+        return len(pdf.pages)
+
+
+def check_page_count(pages: int):
+    if pages > PDF_MAX_PAGES:
+        raise DocumentTooLarge(
+            f"PDF has {pages} pages; at most {PDF_MAX_PAGES} are supported."
+        )
+
+
+# -------- process pool --------
+
+def get_pool():
+    """
+    Create the parsing process pool on first use. Workers are spawned, not
+    forked, so they never inherit the server's threads or sockets.
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    return _pool
+
+
+def _remove_when_done(path, futures):
+    """
+    Delete `path` once every worker future reading it has finished or been
+    cancelled; running workers cannot be stopped and still need the file
+    after the request has given up on them.
+    """
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def remove():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            remove()
+
+    if not futures:
+        remove()
+        return
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def _write_fd(fd, file_bytes: bytes):
+    # blocking write and close of a mkstemp descriptor; runs in the thread pool
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(file_bytes)
+
+
+async def _parse_pdf_in_pool(file_bytes: bytes) -> pd.DataFrame:
+
+    pages = await run_in_threadpool(pdf_page_count, io.BytesIO(file_bytes))
+    check_page_count(pages)
+
+    per_task = max(1, math.ceil(pages / PARSE_WORKERS))
+
+    # workers open the file by path instead of each receiving a pickled copy
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+
+    futures = []
+    try:
+        await run_in_threadpool(_write_fd, fd, file_bytes)
+
+        pool = get_pool()
+        for start in range(0, pages, per_task):
+            futures.append(pool.submit(extract_pdf_pages, path, start, start + per_task))
+
+        parts = await asyncio.gather(*[asyncio.wrap_future(f) for f in futures])
+
+    except BaseException:
+        # on a timeout, drop the page ranges no worker has picked up yet
+        for future in futures:
+            future.cancel()
+        raise
+
+    finally:
+        _remove_when_done(path, futures)
+
+    # merge page ranges back in document order
+    rows = []
+    all_text_lines = []
+
+    for part_rows, part_lines in parts:
+        rows.extend(part_rows)
+        all_text_lines.extend(part_lines)
+
+    return pdf_parts_to_dataframe(rows, all_text_lines)
+
+
+async def _parse_document(filename: str, file_bytes: bytes) -> pd.DataFrame:
+
+    if PARSE_WORKERS <= 0:
+        if filename.endswith(".pdf"):
+            pages = await run_in_threadpool(pdf_page_count, io.BytesIO(file_bytes))
+            check_page_count(pages)
+            return await run_in_threadpool(read_pdf_to_dataframe, file_bytes)
+
+        return await run_in_threadpool(read_docx_to_dataframe, file_bytes)
+
+    if filename.endswith(".pdf"):
+        return await _parse_pdf_in_pool(file_bytes)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), read_docx_to_dataframe, file_bytes)
+
+
+async def parse_document(filename: str, file_bytes: bytes) -> pd.DataFrame:
+    """
+    Parse a .docx or .pdf upload off the event loop.
+
+    PDF pages are split across the PARSE_WORKERS process pool and merged
+    in page order. Raises DocumentTooLarge above PDF_MAX_PAGES and
+    asyncio.TimeoutError after PARSE_TIMEOUT_SECONDS; on a timeout, page
+    ranges not yet started are cancelled and a running worker finishes
+    its range in the background.
+    """
+    return await asyncio.wait_for(
+        _parse_document(filename, file_bytes), timeout=PARSE_TIMEOUT_SECONDS
+    )
@@ -0,0 +1,125 @@
+import os
+import json
+import glob
+import time
+import hashlib
+import tempfile
+
+PDF_CACHE_DIR = os.getenv(
+    "PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sme-pdf-cache")
+)
+
+# render in the background right after /analyze stores a result
+PDF_PRERENDER = os.getenv("PDF_PRERENDER", "false").lower() in ("1", "true", "yes")
+
+# bump when the report layout changes so old renders are not served
+RENDERER_VERSION = "6"
+
+# renders of older content for an analysis are deleted once they are this
+# old, so a download that has just been handed one can still open it
+PDF_CACHE_STALE_SECONDS = float(os.getenv("PDF_CACHE_STALE_SECONDS", "300"))
+
+# analysis sections stored in AnalysisResult.details and rendered in the PDF
+REPORT_SECTIONS = ("forecast", "bookkeeping", "benchmark", "tax_compliance")
+
+
+def report_data(row_or_values) -> dict:
+    """
+    The fields build_pdf_report reads, from a row or an insert dict.
+    Rows stored before `details` existed render without the extra sections.
+    """
+    get = (
+        row_or_values.get if isinstance(row_or_values, dict)
+        else lambda name: getattr(row_or_values, name)
+    )
+
+    details = get("details") or {}
+
+    data = {
+        "business_name": get("business_name"),
+        "industry": get("industry"),
+        "metrics": get("metrics"),
+        "risks": get("risks"),
+        "credit_score": get("credit_score"),
+        "report_en": get("ai_report"),
+        "report_hi": details.get("report_hi")
+    }
+
+    for name in REPORT_SECTIONS:
+        data[name] = details.get(name)
+
+    return data
+
+
+def content_hash(data: dict) -> str:
+    canonical = json.dumps(
+        {"renderer": RENDERER_VERSION, "data": data},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cache_path(analysis_id: int, digest: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"report_{analysis_id}_{digest}.pdf")
+
+
+def render_to_cache(analysis_id: int, data: dict, digest: str = None) -> str:
+    """
+    Path of the rendered PDF for this analysis and content, rendering it
+    first if needed. Writes go through a temp file and an atomic rename,
+    so concurrent renders never serve a half-written file.
+    """
+    digest = digest or content_hash(data)
+    path = cache_path(analysis_id, digest)
+
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+
+    # reportlab is only loaded by workers that render
+    from pdf_report import build_pdf_report
+
+    fd, tmp_path = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+    try:
+        # render straight into the file rather than via an in-memory copy
+        with os.fdopen(fd, "wb") as f:
+            build_pdf_report(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    remove_stale_renders(analysis_id, path)
+
+    return path
+
+
+def remove_stale_renders(analysis_id: int, keep: str):
+    """
+    Delete renders of older content for the same analysis that were
+    written more than PDF_CACHE_STALE_SECONDS ago; younger ones go on a
+    later render.
+    """
+    cutoff = time.time() - PDF_CACHE_STALE_SECONDS
+
+    for stale in glob.glob(os.path.join(PDF_CACHE_DIR, f"report_{analysis_id}_*.pdf")):
+        if stale == keep:
+            continue
+
+        try:
+            if os.path.getmtime(stale) < cutoff:
+                os.unlink(stale)
+        except FileNotFoundError:
+            pass
+
+
+def prerender(analysis_id: int, data: dict):
+    try:
+        render_to_cache(analysis_id, data)
+    except Exception:
+        # a failed pre-render just means the first download renders it
+        pass
@@ -1,14 +1,160 @@
+import os
+import tempfile
+from xml.sax.saxutils import escape
+
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
-from io import BytesIO
 
+from instrumentation import stage
+
+PDF_CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", str(64 * 1024)))
+PDF_SPOOL_MAX_BYTES = int(os.getenv("PDF_SPOOL_MAX_BYTES", str(1024 * 1024)))
+
+# the built-in PDF fonts have no Devanagari glyphs; the Hindi section is
+# only rendered when a TTF that covers it is configured
+PDF_HINDI_FONT = os.getenv("PDF_HINDI_FONT")
+
+REPORT_PENDING = "The AI report has not been generated for this analysis yet."
+
+_hindi_font_name = None
+
+
+def _hindi_style(styles):
+    global _hindi_font_name
+
+    if not PDF_HINDI_FONT:
+        return None
+
+    if _hindi_font_name is None:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        pdfmetrics.registerFont(TTFont("HindiReport", PDF_HINDI_FONT))
+        _hindi_font_name = "HindiReport"
+
+    return ParagraphStyle("Hindi", parent=styles["Normal"], fontName=_hindi_font_name)
+
+
+def _text_paragraphs(text, style):
+    # blank lines separate paragraphs; single newlines become line breaks
+    for block in str(text).split("\n\n"):
+        block = block.strip()
+        if block:
+            yield Paragraph(escape(block).replace("\n", "<br/>"), style)
+
+
+def _section(elements, title, styles):
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(title, styles["Heading2"]))
+
+
+def _forecast_elements(elements, forecast, styles):
+
+    if not forecast or not forecast.get("enabled"):
+        return
+
+    _section(elements, "Revenue forecast", styles)
+
+    rows = [["Month", "Forecast revenue", "Low", "High"]]
+    for point in forecast["forecast"]:
+        rows.append([
+            point["month"],
+            point["forecast_revenue"],
+            point.get("lower", ""),
+            point.get("upper", "")
+        ])
+
+    if forecast.get("model"):
+        elements.append(Paragraph(f"Model : {forecast['model']}", styles["Normal"]))
+
+    elements.append(Table(rows))
+
+    cash_flow = forecast.get("cash_flow")
+    if not cash_flow:
+        return
+
+    _section(elements, "Cash flow projection", styles)
+
+    rows = [["Month", "Net flow", "Position"]]
+    rows.append(["Opening", "", cash_flow["opening_position"]])
+    for point in cash_flow["months"]:
+        rows.append([point["month"], point["net_flow"], point["position"]])
+
+    if cash_flow["runway_months"] is not None:
+        elements.append(Paragraph(
+            f"Runway : {cash_flow['runway_months']} months", styles["Normal"]
+        ))
 
-def generate_pdf_report(data: dict):
+    elements.append(Table(rows))
 
-    buffer = BytesIO()
 
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
+def _bookkeeping_elements(elements, bookkeeping, styles):
+
+    if not bookkeeping or not bookkeeping.get("enabled"):
+        return
+
+    _section(elements, "Expense categories", styles)
+
+    totals = bookkeeping.get("category_totals", {})
+    rows = [["Category", "Transactions", "Amount"]]
+    for category, count in bookkeeping["category_summary"].items():
+        rows.append([category, count, totals.get(category, "")])
+
+    elements.append(Table(rows))
+
+
+def _benchmark_elements(elements, benchmark, styles):
+
+    if not benchmark or not benchmark.get("enabled"):
+        return
+
+    _section(elements, "Industry benchmark", styles)
+
+    elements.append(Table([
+        ["Industry average profit margin", f"{benchmark['industry_avg_profit_margin']} %"],
+        ["Your profit margin", f"{benchmark['your_profit_margin']} %"],
+        ["Performance", benchmark["performance"]]
+    ]))
+
+    percentiles = benchmark.get("percentiles")
+    if percentiles:
+        rows = [["Metric", "Value", "Industry median", "Percentile rank"]]
+        for metric, entry in percentiles.items():
+            rows.append([
+                metric.replace("_", " ").capitalize(),
+                entry["value"],
+                entry["p50"],
+                entry["percentile_rank"]
+            ])
+
+        elements.append(Spacer(1, 6))
+        elements.append(Table(rows))
+
+
+def _tax_elements(elements, tax_compliance, styles):
+
+    if not tax_compliance:
+        return
+
+    findings = list(tax_compliance.get("issues", [])) + list(tax_compliance.get("warnings", []))
+    if not findings:
+        return
+
+    _section(elements, "Tax compliance", styles)
+
+    for finding in findings:
+        elements.append(Paragraph("- " + escape(str(finding)), styles["Normal"]))
+
+
+def build_pdf_report(data: dict, out):
+    """
+    Render the report into the binary file object `out`.
+
+    Sections beyond the metrics table are included when `data` carries
+    them (forecast, bookkeeping, benchmark, tax_compliance, report_hi).
+    """
+    doc = SimpleDocTemplate(out, pagesize=A4)
     styles = getSampleStyleSheet()
 
     elements = []
@@ -16,8 +162,8 @@ def generate_pdf_report(data: dict):
     elements.append(Paragraph("SME Financial Health Report", styles["Title"]))
     elements.append(Spacer(1, 12))
 
-    elements.append(Paragraph(f"Business : {data['business_name']}", styles["Normal"]))
-    elements.append(Paragraph(f"Industry : {data['industry']}", styles["Normal"]))
+    elements.append(Paragraph(f"Business : {escape(str(data['business_name']))}", styles["Normal"]))
+    elements.append(Paragraph(f"Industry : {escape(str(data['industry']))}", styles["Normal"]))
     elements.append(Spacer(1, 12))
 
     m = data["metrics"]
@@ -34,14 +180,45 @@ def generate_pdf_report(data: dict):
     ]
 
     elements.append(Table(table_data))
-    elements.append(Spacer(1, 12))
 
-    elements.append(Paragraph("AI Report (English)", styles["Heading2"]))
-    elements.append(Paragraph(data["report_en"], styles["Normal"]))
+    if data.get("risks"):
+        _section(elements, "Risks", styles)
+        for risk in data["risks"]:
+            elements.append(Paragraph("- " + escape(str(risk)), styles["Normal"]))
+
+    _forecast_elements(elements, data.get("forecast"), styles)
+    _bookkeeping_elements(elements, data.get("bookkeeping"), styles)
+    _benchmark_elements(elements, data.get("benchmark"), styles)
+    _tax_elements(elements, data.get("tax_compliance"), styles)
+
+    _section(elements, "AI Report (English)", styles)
+    if data.get("report_en"):
+        elements.extend(_text_paragraphs(data["report_en"], styles["Normal"]))
+    else:
+        # batch analyses are stored without one until /analysis/{id}/report runs
+        elements.append(Paragraph(REPORT_PENDING, styles["Normal"]))
+
+    hindi_style = _hindi_style(styles)
+    if hindi_style is not None and data.get("report_hi"):
+        _section(elements, "AI Report (Hindi)", styles)
+        elements.extend(_text_paragraphs(data["report_hi"], hindi_style))
+
+    with stage("pdf_render"):
+        doc.build(elements)
+
 
-    doc.build(elements)
+def iter_pdf_report(data: dict, chunk_size: int = PDF_CHUNK_SIZE):
+    """
+    Render into a spooled temp file and yield it in fixed-size chunks, so
+    the finished document is never held as one bytes object.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_BYTES) as out:
+        build_pdf_report(data, out)
+        out.seek(0)
 
-    pdf = buffer.getvalue()
-    buffer.close()
+        while True:
+            chunk = out.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
 
-    return pdf
@@ -0,0 +1,365 @@
+"""
+Benchmarks of the analytics pipeline on synthetic ledgers.
+
+    python -m perf.harness --rows 1000,100000 --formats csv,xlsx,docx,pdf
+    python -m perf.harness --save-baseline        # record perf/baseline.json
+    python -m perf.harness --baseline perf/baseline.json --tolerance 0.25
+
+Each stage runs once to warm up and then --repeat times. Results are
+printed as JSON; with a baseline, the median latency of every case is
+compared against it and the exit status is 1 if any case got slower by
+more than the tolerance. Baselines are only meaningful on the machine
+that recorded them.
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import statistics
+import tempfile
+
+# the full /analyze runs in-process against a throwaway SQLite database,
+# without the analysis cache (repeats would only measure cache hits)
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="sme-perf-"), "perf.db"
+))
+os.environ.setdefault("ANALYSIS_CACHE_SIZE", "0")
+
+from perf.ledgers import FORMATS, XLSX_MAX_ROWS, synthetic_ledger, write_ledger
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+WORK_DIR = os.path.join(tempfile.gettempdir(), "sme-perf-ledgers")
+
+# DOCX / PDF parsing is per line and PDFs stop at PDF_MAX_PAGES
+DOCUMENT_MAX_ROWS = 20_000
+
+STUB_REPORT_EN = "Benchmark report.\n\nThe AI service is stubbed out."
+STUB_REPORT_HI = "बेंचमार्क रिपोर्ट।"
+
+
+# -------- measurement --------
+
+def reset_peak_rss():
+    # Linux: writing 5 to clear_refs resets the VmHWM high-water mark
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # whole-process peak; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure(func, repeat):
+    """
+    Latencies of `repeat` calls after one warm-up call, and the peak RSS
+    of the process while they ran.
+    """
+    func()
+
+    reset_peak_rss()
+    latencies = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    return latencies, peak_rss_mb()
+
+
+def result(name, fmt, rows, size, latencies, peak_rss):
+
+    median = statistics.median(latencies)
+
+    return {
+        "name": name,
+        "format": fmt,
+        "rows": rows,
+        "bytes": size,
+        "latency_s": {
+            "min": min(latencies),
+            "median": median,
+            "max": max(latencies),
+        },
+        "rows_per_s": rows / median if median else None,
+        "mb_per_s": size / median / 1e6 if size and median else None,
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+# -------- cases --------
+
+def ledger_file(fmt, rows, seed, work_dir):
+    """
+    Path of a synthetic ledger, generated on first use.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    path = os.path.join(work_dir, f"ledger_{rows}_{seed}.{fmt}")
+
+    if not os.path.exists(path):
+        write_ledger(fmt, rows, path, seed)
+
+    return path
+
+
+def normalised_ledger(rows, seed):
+    from ingest import normalise_frame
+
+    df = synthetic_ledger(rows, seed)
+    normalise_frame(df)
+    return df
+
+
+def stage_cases(rows, seed):
+    """
+    The analytics modules on an already normalised in-memory ledger.
+    """
+    from analysis import analyze_financials
+    from bookkeeping import auto_bookkeeping
+    from forecast import forecast_revenue
+    from ledger import LedgerContext
+    from tax import check_tax_compliance
+
+    df = normalised_ledger(rows, seed)
+
+    # high cardinality: every description distinct, as with invoice or
+    # UPI reference numbers, so the classifier cannot share matches
+    distinct = df.assign(
+        description=df["description"].fillna("") + [f" #{i}" for i in range(len(df))]
+    )
+
+    return {
+        "ledger_context": lambda: LedgerContext(df),
+        "analyze_financials": lambda: analyze_financials(df),
+        "auto_bookkeeping": lambda: auto_bookkeeping(df),
+        "auto_bookkeeping_distinct": lambda: auto_bookkeeping(distinct),
+        "forecast_revenue": lambda: forecast_revenue(df),
+        "check_tax_compliance": lambda: check_tax_compliance(df),
+    }
+
+
+def read_case(fmt, path):
+    """
+    Parse, validate and aggregate one upload, as /analyze does.
+    """
+    from ingest import aggregate_chunks
+
+    with open(path, "rb") as f:
+        content = f.read()
+
+    if fmt == "docx":
+        from parsers import read_docx_to_dataframe
+        return lambda: aggregate_chunks([read_docx_to_dataframe(content)])
+
+    if fmt == "pdf":
+        from parsers import read_pdf_to_dataframe
+        return lambda: aggregate_chunks([read_pdf_to_dataframe(content)])
+
+    from pipeline import aggregate_upload
+    filename = os.path.basename(path)
+    return lambda: aggregate_upload(filename, io.BytesIO(content))
+
+
+def stub_llm():
+    import llm
+
+    async def generate_reports(**kwargs):
+        return STUB_REPORT_EN, STUB_REPORT_HI
+
+    llm.generate_reports = generate_reports
+
+
+def analyze_case(client, path):
+
+    filename = os.path.basename(path)
+
+    def call():
+        with open(path, "rb") as f:
+            response = client.post(
+                "/analyze",
+                files={"file": (filename, f)},
+                data={"business_name": "Benchmark Traders", "industry": "Retail"}
+            )
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}: {response.text[:200]}")
+
+    return call
+
+
+def skip_reason(fmt, rows, max_document_rows):
+
+    if fmt == "xlsx" and rows > XLSX_MAX_ROWS:
+        return f"an Excel sheet holds at most {XLSX_MAX_ROWS} rows"
+
+    if fmt in ("docx", "pdf") and rows > max_document_rows:
+        return f"documents are benchmarked up to {max_document_rows} rows"
+
+    return None
+
+
+def run(rows_list, formats, repeat, seed, work_dir, max_document_rows, log):
+
+    from fastapi.testclient import TestClient
+    import app
+
+    stub_llm()
+    client = TestClient(app.app)
+
+    results = []
+    skipped = []
+
+    for rows in rows_list:
+        log(f"{rows} rows: stages")
+
+        for name, func in stage_cases(rows, seed).items():
+            latencies, peak = measure(func, repeat)
+            results.append(result(name, None, rows, None, latencies, peak))
+
+        for fmt in formats:
+            reason = skip_reason(fmt, rows, max_document_rows)
+            if reason:
+                skipped.append({"format": fmt, "rows": rows, "reason": reason})
+                continue
+
+            log(f"{rows} rows: {fmt}")
+            path = ledger_file(fmt, rows, seed, work_dir)
+            size = os.path.getsize(path)
+
+            latencies, peak = measure(read_case(fmt, path), repeat)
+            results.append(result("read", fmt, rows, size, latencies, peak))
+
+            latencies, peak = measure(analyze_case(client, path), repeat)
+            results.append(result("analyze", fmt, rows, size, latencies, peak))
+
+    return results, skipped
+
+
+# -------- baseline --------
+
+def case_key(entry):
+    return f"{entry['name']}|{entry['format'] or '-'}|{entry['rows']}"
+
+
+def compare(results, baseline, tolerance):
+    """
+    Median latency of every case against the baseline; a ratio above
+    1 + tolerance is a regression.
+    """
+    previous = {case_key(entry): entry for entry in baseline.get("results", [])}
+    comparison = []
+
+    for entry in results:
+        old = previous.get(case_key(entry))
+        if old is None:
+            continue
+
+        ratio = entry["latency_s"]["median"] / old["latency_s"]["median"]
+
+        comparison.append({
+            "case": case_key(entry),
+            "baseline_median_s": old["latency_s"]["median"],
+            "median_s": entry["latency_s"]["median"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance,
+        })
+
+    return comparison
+
+
+def environment():
+    import numpy
+    import pandas
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analytics pipeline.")
+    parser.add_argument("--rows", default="1000,10000,100000",
+                        help="comma-separated ledger sizes, up to 10000000")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=WORK_DIR,
+                        help="where generated ledgers are kept between runs")
+    parser.add_argument("--max-document-rows", type=int, default=DOCUMENT_MAX_ROWS)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown of the median before a case counts as a regression")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    rows_list = [int(r) for r in args.rows.split(",") if r]
+    formats = [f for f in args.formats.split(",") if f]
+
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    results, skipped = run(
+        rows_list, formats, args.repeat, args.seed, args.work_dir, args.max_document_rows, log
+    )
+
+    report = {
+        "environment": environment(),
+        "repeat": args.repeat,
+        "results": results,
+        "skipped": skipped,
+    }
+
+    regressions = []
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        log(f"baseline written to {args.baseline}")
+
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        report["comparison"] = compare(results, baseline, args.tolerance)
+        regressions = [c["case"] for c in report["comparison"] if c["regression"]]
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Synthetic SME ledgers for the benchmark suite.
+
+    python -m perf.ledgers --rows 100000 --format csv --out ledger.csv
+
+Rows are generated in chunks from a seeded generator, so the same
+arguments always give the same file and 10M-row CSVs never sit in memory
+at once.
+"""
+import io
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+
+# share of rows per type, roughly that of a small trading business; a few
+# rows carry types the analytics do not recognise
+TYPE_MIX = {
+    "revenue": 0.36,
+    "expense": 0.44,
+    "receivable": 0.09,
+    "payable": 0.09,
+    "transfer": 0.02,
+}
+
+# log-normal amount parameters (median in rupees, sigma) per type
+AMOUNTS = {
+    "revenue": (18000, 1.0),
+    "expense": (6000, 1.1),
+    "receivable": (25000, 0.8),
+    "payable": (15000, 0.8),
+    "transfer": (50000, 0.5),
+}
+
+DESCRIPTIONS = {
+    "revenue": ["Sales invoice", "Counter sales", "Online order", "Service charges", "UPI collection"],
+    "expense": [
+        "Shop rent", "Office rent", "Electricity bill", "Power backup diesel",
+        "Staff salary", "Daily wages", "Fuel", "Transport charges",
+        "Amazon purchase", "Stationery purchase", "Bank charges", "Tea and snacks",
+    ],
+    "receivable": ["Credit sale", "Invoice due", "Pending from distributor"],
+    "payable": ["Supplier credit", "Vendor bill due", "GST payable"],
+    "transfer": ["Owner transfer", "Fixed deposit"],
+}
+
+# how the type column is spelled, to exercise normalisation
+TYPE_SPELLINGS = {
+    "revenue": ["Revenue", "revenue", "REVENUE"],
+    "expense": ["Expense", "expense", " expense"],
+    "receivable": ["Receivable", "receivable"],
+    "payable": ["Payable", "payable"],
+    "transfer": ["Transfer"],
+}
+
+FORMATS = ("csv", "xlsx", "docx", "pdf")
+
+# one sheet holds 1,048,576 rows including the header
+XLSX_MAX_ROWS = 1_048_575
+
+# text lines per PDF page
+PDF_LINES_PER_PAGE = 60
+
+
+def synthetic_chunks(rows, seed=0, start="2022-04-01", months=24,
+                     dirty=0.0, chunk_rows=CHUNK_ROWS):
+    """
+    DataFrames of amount, type, date and description adding up to `rows`
+    rows, dated in order over `months` months from `start`. A `dirty`
+    fraction of amounts is written as text with currency symbols and digit
+    grouping, as in exported statements.
+    """
+    rng = np.random.default_rng(seed)
+
+    types = np.array(list(TYPE_MIX))
+    weights = np.array(list(TYPE_MIX.values()))
+
+    first = pd.Timestamp(start)
+    span_days = (first + pd.DateOffset(months=months) - first).days
+
+    done = 0
+    while done < rows:
+        n = min(chunk_rows, rows - done)
+
+        type_index = rng.choice(len(types), size=n, p=weights / weights.sum())
+
+        amount = np.empty(n)
+        description = np.empty(n, dtype=object)
+        spelled = np.empty(n, dtype=object)
+
+        for i, name in enumerate(types):
+            mask = type_index == i
+            k = int(mask.sum())
+            median, sigma = AMOUNTS[name]
+
+            amount[mask] = np.round(rng.lognormal(np.log(median), sigma, k), 2)
+            description[mask] = rng.choice(DESCRIPTIONS[name], size=k)
+            spelled[mask] = rng.choice(TYPE_SPELLINGS[name], size=k)
+
+        # dates run through the period in order, chunk after chunk
+        day = (np.arange(done, done + n) * span_days) // max(rows, 1)
+        date = (first + pd.to_timedelta(day, unit="D")).strftime("%Y-%m-%d")
+
+        frame = pd.DataFrame({
+            "amount": amount,
+            "type": spelled,
+            "date": date,
+            "description": description,
+        })
+
+        if dirty:
+            messy = rng.random(n) < dirty
+            if messy.any():
+                text = frame["amount"].astype(object)
+                text[messy] = [f"₹{value:,.2f}" for value in amount[messy]]
+                frame["amount"] = text
+
+        yield frame
+        done += n
+
+
+def synthetic_ledger(rows, seed=0, **kwargs):
+    """
+    The whole ledger as one DataFrame.
+    """
+    return pd.concat(list(synthetic_chunks(rows, seed, **kwargs)), ignore_index=True)
+
+
+# -------- writers --------
+
+def write_csv(chunks, out):
+
+    if isinstance(out, str):
+        with open(out, "w", encoding="utf-8", newline="") as f:
+            return write_csv(chunks, f)
+
+    header = True
+    for frame in chunks:
+        frame.to_csv(out, index=False, header=header)
+        header = False
+
+
+def write_xlsx(chunks, out):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["amount", "type", "date", "description"])
+
+    written = 0
+    for frame in chunks:
+        written += len(frame)
+        if written > XLSX_MAX_ROWS:
+            raise ValueError(f"An Excel sheet holds at most {XLSX_MAX_ROWS} rows")
+
+        for row in frame.itertuples(index=False):
+            sheet.append(list(row))
+
+    workbook.save(out)
+
+
+def write_docx(chunks, out):
+    # one "amount,type" paragraph per row, the text fallback of the parser;
+    # python-docx tables take minutes beyond a few thousand rows
+    from docx import Document
+
+    document = Document()
+    document.add_paragraph("amount,type")
+
+    for frame in chunks:
+        for amount, type_ in zip(frame["amount"], frame["type"]):
+            # digit grouping would split the line
+            document.add_paragraph(f"{str(amount).replace(',', '')},{type_.strip()}")
+
+    document.save(out)
+
+
+def write_pdf(chunks, out):
+    # "amount,type" text lines, PDF_LINES_PER_PAGE to a page
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(out, pagesize=A4)
+    width, height = A4
+
+    lines = ["amount,type"]
+
+    def flush():
+        text = pdf.beginText(40, height - 40)
+        text.setFont("Helvetica", 9)
+        for line in lines:
+            text.textLine(line)
+        pdf.drawText(text)
+        pdf.showPage()
+
+    for frame in chunks:
+        for amount, type_ in zip(frame["amount"], frame["type"]):
+            lines.append(f"{str(amount).replace(',', '')},{type_.strip()}")
+
+            if len(lines) == PDF_LINES_PER_PAGE:
+                flush()
+                lines = []
+
+    if lines:
+        flush()
+
+    pdf.save()
+
+
+WRITERS = {
+    "csv": write_csv,
+    "xlsx": write_xlsx,
+    "docx": write_docx,
+    "pdf": write_pdf,
+}
+
+
+def write_ledger(fmt, rows, out, seed=0, **kwargs):
+    """
+    Write a synthetic ledger of `rows` rows to `out` (a path or a binary
+    file object) in one of FORMATS.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+    if fmt == "csv" and not isinstance(out, str):
+        # pandas writes text; wrap binary file objects
+        text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+        WRITERS[fmt](synthetic_chunks(rows, seed, **kwargs), text)
+        text.flush()
+        text.detach()
+        return
+
+    WRITERS[fmt](synthetic_chunks(rows, seed, **kwargs), out)
+
+
+def ledger_bytes(fmt, rows, seed=0, **kwargs):
+    buffer = io.BytesIO()
+    write_ledger(fmt, rows, buffer, seed, **kwargs)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic SME ledger.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--dirty", type=float, default=0.0,
+                        help="fraction of amounts written with currency symbols")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    write_ledger(args.format, args.rows, args.out, args.seed,
+                 months=args.months, dirty=args.dirty)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Import-time and cold-start benchmarks, each measured in fresh interpreters.
+
+    python -m perf.startup
+    python -m perf.startup --save-baseline        # record perf/startup_baseline.json
+
+Reports:
+  import:<module>      cumulative import time (python -X importtime) of
+                       app and of the modules it pulls in at startup
+  first_use:<module>   import cost of a lazily loaded module once app is up
+  cold_start:<case>    process start to first response, in-process
+                       through the ASGI test client
+
+Compared against the baseline like perf.harness; exit status 1 on a
+regression.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+from perf.harness import compare, environment
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(BACKEND_DIR, "perf", "startup_baseline.json")
+
+# modules app.py loads on first use of their format or endpoint
+LAZY_MODULES = ("pipeline", "parsers", "pdfplumber", "docx", "pdf_report", "openai", "pyarrow")
+
+# app's own imports below this many seconds are left out of the report
+MIN_IMPORT_SECONDS = 0.002
+
+# runs in a fresh interpreter: first response of one request, timed from
+# interpreter start by the parent
+COLD_START = """
+import sys
+from fastapi.testclient import TestClient
+
+import app
+import llm
+
+async def generate_reports(**kwargs):
+    return "Benchmark report.", "बेंचमार्क रिपोर्ट।"
+
+llm.generate_reports = generate_reports
+
+case = sys.argv[1]
+
+with TestClient(app.app) as client:
+    if case == "health":
+        response = client.get("/")
+    else:
+        csv = "amount,type,date,description\\n" + "".join(
+            f"{100 + i},{'revenue' if i % 3 else 'expense'},2024-{i % 12 + 1:02d}-01,rent\\n"
+            for i in range(1000)
+        )
+        response = client.post(
+            "/analyze",
+            files={"file": ("ledger.csv", csv.encode())},
+            data={"business_name": "Benchmark Traders", "industry": "Retail"}
+        )
+
+    assert response.status_code == 200, response.text
+
+from perf.harness import peak_rss_mb
+print(peak_rss_mb())
+"""
+
+COLD_START_CASES = {
+    "health": {},
+    "analyze": {},
+    "analyze_warm_up": {"WARM_UP": "true"},
+}
+
+
+def child_env(extra=None):
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(prefix="sme-perf-"), "startup.db"
+    ))
+    env["ANALYSIS_CACHE_SIZE"] = "0"
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.update(extra or {})
+    return env
+
+
+def import_times(code="import app"):
+    """
+    {module: cumulative seconds} from `python -X importtime`, keeping the
+    first (outermost) import of each module.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True
+    )
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.setdefault(name.strip(), int(cumulative) / 1e6)
+
+    return times
+
+
+def lazy_import_time(module):
+    """
+    Seconds to import `module` in an interpreter that has already
+    imported app, or None when it is not installed.
+    """
+    code = (
+        "import time, app\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True
+    )
+
+    if completed.returncode != 0:
+        return None
+
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def cold_start(case, extra_env):
+    """
+    Wall-clock seconds from starting the interpreter to the first
+    response, and the child's peak RSS in MB.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", COLD_START, case],
+        cwd=BACKEND_DIR, env=child_env(extra_env), capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"cold start {case} failed:\n{completed.stderr[-2000:]}")
+
+    return elapsed, float(completed.stdout.strip().splitlines()[-1])
+
+
+def entry(name, latencies, peak_rss=None):
+    return {
+        "name": name,
+        "format": None,
+        "rows": None,
+        "bytes": None,
+        "latency_s": {
+            "min": min(latencies),
+            "median": statistics.median(latencies),
+            "max": max(latencies),
+        },
+        "rows_per_s": None,
+        "mb_per_s": None,
+        "peak_rss_mb": None if peak_rss is None else round(peak_rss, 1),
+    }
+
+
+def run(repeat, log):
+
+    results = []
+
+    log("import times")
+    samples = [import_times() for _ in range(repeat)]
+
+    # the backend's own modules plus the third-party packages app loads
+    # directly at startup
+    names = sorted(
+        name for name in samples[0]
+        if "." not in name and statistics.median(s.get(name, 0) for s in samples) >= MIN_IMPORT_SECONDS
+    )
+    for name in names:
+        results.append(entry(f"import:{name}", [s.get(name, 0) for s in samples]))
+
+    for module in LAZY_MODULES:
+        log(f"first use of {module}")
+        latencies = [lazy_import_time(module) for _ in range(repeat)]
+        if None in latencies:
+            continue
+        results.append(entry(f"first_use:{module}", latencies))
+
+    for case, extra_env in COLD_START_CASES.items():
+        log(f"cold start: {case}")
+        runs = [cold_start(case, extra_env) for _ in range(repeat)]
+        results.append(entry(
+            f"cold_start:{case}", [r[0] for r in runs], max(r[1] for r in runs)
+        ))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time and cold start.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    report = {
+        "environment": environment(),
+        "repeat": args.repeat,
+        "results": run(args.repeat, log),
+    }
+
+    regressions = []
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        log(f"baseline written to {args.baseline}")
+
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        report["comparison"] = compare(report["results"], baseline, args.tolerance)
+        regressions = [c["case"] for c in report["comparison"] if c["regression"]]
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import io
+
+import pandas as pd
+from fastapi import HTTPException
+
+from analysis import credit_inputs, metrics_from_summary
+from benchmark import compare_with_benchmark
+from bookkeeping import bookkeeping_from_counts
+from forecast import forecast_from_pivot
+from formats import ARROW_EXTENSIONS, UNSUPPORTED_FORMAT, supports_streaming, upload_size
+from ingest import LedgerAggregates, STREAMING_MIN_BYTES, aggregate_chunks, iter_upload_chunks
+from instrumentation import stage
+from parsers import read_docx_to_dataframe, read_pdf_to_dataframe
+from rule_engine import assess, assess_portfolio
+from tax import check_tax_compliance_batch, scan_inputs
+
+
+def read_upload(filename: str, content: bytes) -> pd.DataFrame:
+
+    if filename.endswith(".csv"):
+        return pd.read_csv(io.BytesIO(content))
+
+    elif filename.endswith(".xlsx") or filename.endswith(".xls"):
+        return pd.read_excel(io.BytesIO(content))
+
+    elif filename.endswith(".docx"):
+        return read_docx_to_dataframe(content)
+
+    elif filename.endswith(".pdf"):
+        return read_pdf_to_dataframe(content)
+
+    raise HTTPException(
+        status_code=400,
+        detail=UNSUPPORTED_FORMAT
+    )
+
+
+def ledger_sections(aggregates: LedgerAggregates) -> dict:
+    """
+    The analytics that depend only on the upload's contents, i.e. what
+    the analysis cache keeps per upload.
+    """
+    with stage("metrics"):
+        metrics = metrics_from_summary(aggregates.summary)
+
+    if not aggregates.has_date:
+        forecast = {
+            "enabled": False,
+            "message": "No date column found. Forecast skipped."
+        }
+    elif aggregates.forecast_error is not None:
+        forecast = {
+            "enabled": False,
+            "message": aggregates.forecast_error
+        }
+    else:
+        with stage("forecast"):
+            forecast = forecast_from_pivot(aggregates.summary, aggregates.monthly)
+
+    if aggregates.has_description:
+        with stage("bookkeeping"):
+            bookkeeping = bookkeeping_from_counts(
+                aggregates.category_counts, aggregates.category_totals
+            )
+    else:
+        bookkeeping = {
+            "enabled": False,
+            "message": "No description column found."
+        }
+
+    with stage("tax_compliance"):
+        tax_inputs = scan_inputs(aggregates.summary, metrics, aggregates.tax_scan)
+        tax_compliance = check_tax_compliance_batch([tax_inputs])[0]
+
+    return {
+        "metrics": metrics,
+        "forecast": forecast,
+        "bookkeeping": bookkeeping,
+        "tax_compliance": tax_compliance,
+        # lets a batch re-run the tax rules with each business's jurisdiction
+        "tax_inputs": tax_inputs,
+        "data_quality": aggregates.data_quality.as_dict()
+    }
+
+
+def combine_analytics(sections, assessment, benchmark, tax_compliance):
+
+    return {
+        "metrics": sections["metrics"],
+        "risks": assessment["risks"],
+        "credit_score": int(assessment["credit_score"]),
+        "score_explanations": assessment["score_explanations"],
+        "forecast": sections["forecast"],
+        "bookkeeping": sections["bookkeeping"],
+        "benchmark": benchmark,
+        "recommended_products": assessment["recommended_products"],
+        "tax_compliance": tax_compliance,
+        "data_quality": sections["data_quality"]
+    }
+
+
+def analytics_from_sections(sections: dict, industry: str) -> dict:
+    """
+    Add the rule engine assessment and the industry benchmark, which are
+    recomputed on every request, to the ledger sections.
+    """
+    metrics = sections["metrics"]
+
+    with stage("assessment"):
+        assessment = assess(credit_inputs(metrics))
+
+    with stage("benchmark"):
+        benchmark = compare_with_benchmark(metrics, industry)
+
+    return combine_analytics(sections, assessment, benchmark, sections["tax_compliance"])
+
+
+def analytics_from_portfolio(sections: list, industries: list, jurisdictions=None) -> list:
+    """
+    analytics_from_sections for many businesses at once: the credit rules
+    and the tax rules each run as one evaluation over the whole portfolio,
+    the tax rules with every business's own jurisdiction and year.
+    """
+    with stage("assessment"):
+        frame = pd.DataFrame([credit_inputs(s["metrics"]) for s in sections])
+        assessments = assess_portfolio(frame)
+
+    with stage("tax_compliance"):
+        tax_results = check_tax_compliance_batch([s["tax_inputs"] for s in sections], jurisdictions)
+
+    results = []
+
+    for i, (section, industry) in enumerate(zip(sections, industries)):
+        with stage("benchmark"):
+            benchmark = compare_with_benchmark(section["metrics"], industry)
+
+        results.append(combine_analytics(
+            section, assessments.iloc[i], benchmark, tax_results[i]
+        ))
+
+    return results
+
+
+def analytics_from_aggregates(aggregates: LedgerAggregates, industry: str) -> dict:
+    return analytics_from_sections(ledger_sections(aggregates), industry)
+
+
+def aggregate_upload(filename: str, fileobj, writer=None):
+    """
+    Parse a CSV / Excel / Parquet / Arrow upload into LedgerAggregates.
+    CPU bound; callers on the event loop run it in the thread pool.
+    """
+    if filename.endswith(ARROW_EXTENSIONS):
+        try:
+            return aggregate_chunks(iter_upload_chunks(filename, fileobj), writer)
+        except ImportError:
+            raise HTTPException(
+                status_code=400,
+                detail="Parquet and Arrow uploads need pyarrow installed on the server."
+            )
+
+    if supports_streaming(filename) and upload_size(fileobj) >= STREAMING_MIN_BYTES:
+        # large CSV / Excel uploads are folded in chunk by chunk from
+        # the spooled temp file instead of being loaded whole
+        aggregates = aggregate_chunks(iter_upload_chunks(filename, fileobj), writer)
+    else:
+        fileobj.seek(0)
+        df = read_upload(filename, fileobj.read())
+        aggregates = aggregate_chunks([df], writer)
+
+    return aggregates
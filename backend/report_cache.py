@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "512"))
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# optional persistent tier, shared by every worker on the host
+REPORT_CACHE_DB = os.getenv("REPORT_CACHE_DB")
+REPORT_CACHE_DB_SIZE = int(os.getenv("REPORT_CACHE_DB_SIZE", "10000"))
+
+
+def cache_key(kind: str, model: str, payload) -> str:
+    """
+    SHA-256 of the canonical JSON of the prompt inputs and model name.
+    """
+    canonical = json.dumps(
+        {"kind": kind, "model": model, "payload": payload},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """
+    Two-tier cache for generated report text: an in-process LRU in front of
+    an optional SQLite table. Entries expire after ttl seconds; each tier
+    evicts its least recently used entries beyond its size limit.
+    """
+
+    def __init__(self, max_entries=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL,
+                 db_path=REPORT_CACHE_DB, max_db_entries=REPORT_CACHE_DB_SIZE,
+                 table="report_cache"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_db_entries = max_db_entries
+        self.table = table
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # SQLite work runs under its own lock, so stats() and memory hits
+        # never wait on a commit
+        self._db_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_accessed "
+                f"ON {table} (accessed)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """
+        Blocks on SQLite when the persistent tier is enabled; call it
+        through run_in_threadpool from async code.
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            if entry is not None:
+                del self._memory[key]
+
+        value = self._db_get(key, now)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.db_hits += 1
+            self._memory_set(key, value[0], value[1])
+            return value[0]
+
+    def set(self, key, value):
+
+        now = time.time()
+
+        with self._lock:
+            self._memory_set(key, value, now)
+
+        if self._db is None:
+            return
+
+        with self._db_lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_db_entries,)
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.db_hits,
+                "entries": len(self._memory)
+            }
+
+    def _memory_set(self, key, value, created):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _db_get(self, key, now):
+
+        if self._db is None:
+            return None
+
+        with self._db_lock:
+            row = self._db.execute(
+                f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            if now - row[1] > self.ttl:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+
+            self._db.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row
+
+
+report_cache = ReportCache()
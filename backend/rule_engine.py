@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import operator
+import threading
+
+import numpy as np
+import pandas as pd
+
+# JSON, or YAML when PyYAML is installed
+CREDIT_RULES_PATH = os.getenv(
+    "CREDIT_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "credit_rules.json")
+)
+
+# how often get_engine() looks at the rule file's mtime; 0 checks on every call
+CREDIT_RULES_CHECK_SECONDS = float(os.getenv("CREDIT_RULES_CHECK_SECONDS", "5"))
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_engine = None
+_engine_mtime = None
+_engine_checked = None
+_lock = threading.Lock()
+
+
+def compile_condition(spec):
+    """
+    Turn a condition into a function of {column: array} -> bool array.
+
+    Leaves compare a metric with a constant ("value") or another metric
+    ("other"); "all", "any" and "not" combine them.
+    """
+    if "all" in spec or "any" in spec:
+        combine = np.logical_and if "all" in spec else np.logical_or
+        parts = [compile_condition(s) for s in spec.get("all", spec.get("any"))]
+
+        def predicate(columns):
+            return combine.reduce([part(columns) for part in parts])
+
+        return predicate
+
+    if "not" in spec:
+        inner = compile_condition(spec["not"])
+        return lambda columns: ~inner(columns)
+
+    op = OPERATORS.get(spec.get("op"))
+    if op is None or "metric" not in spec:
+        raise ValueError(f"Invalid rule condition: {spec!r}")
+
+    metric = spec["metric"]
+
+    if "other" in spec:
+        other = spec["other"]
+        return lambda columns: op(columns[metric], columns[other])
+
+    value = spec["value"]
+    return lambda columns: op(columns[metric], value)
+
+
+class RuleEngine:
+    """
+    Credit score, risk and product rules compiled once and evaluated over
+    whole columns, so one call scores a single ledger or a portfolio.
+
+    Score rules run first; product rules may use the resulting
+    "credit_score" column.
+    """
+
+    def __init__(self, config):
+        self.base_score = config.get("base_score", 100)
+        self.default_product = config.get("default_product")
+
+        self.rules = [
+            (rule["id"], compile_condition(rule["when"]), rule.get("score", 0), rule.get("risk"))
+            for rule in config.get("rules", [])
+        ]
+        self.products = [
+            (rule["id"], compile_condition(rule["when"]), rule["product"])
+            for rule in config.get("products", [])
+        ]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            if path.endswith((".yaml", ".yml")):
+                import yaml
+                config = yaml.safe_load(f)
+            else:
+                config = json.load(f)
+
+        return cls(config)
+
+    def evaluate(self, columns):
+        """
+        Fire every rule over {metric: array}. Returns the score array,
+        per-row risks and products, and per-row explanations of the score
+        (rule id and delta of each rule that fired).
+        """
+        columns = {k: np.asarray(v) for k, v in columns.items()}
+        n = len(next(iter(columns.values())))
+
+        score = np.full(n, self.base_score)
+        fired = []
+
+        for rule_id, predicate, delta, risk in self.rules:
+            hit = np.broadcast_to(predicate(columns), (n,))
+            score = score + np.where(hit, delta, 0)
+            fired.append(hit)
+
+        # a caller-supplied score takes precedence for the product rules
+        columns.setdefault("credit_score", score)
+        offered = [
+            np.broadcast_to(predicate(columns), (n,))
+            for _, predicate, _ in self.products
+        ]
+
+        risks = [[] for _ in range(n)]
+        explanations = [[] for _ in range(n)]
+
+        for (rule_id, _, delta, risk), hit in zip(self.rules, fired):
+            for row in np.flatnonzero(hit):
+                if risk:
+                    risks[row].append(risk)
+                if delta:
+                    explanations[row].append({"rule": rule_id, "score": delta})
+
+        products = [[] for _ in range(n)]
+
+        for (_, _, product), hit in zip(self.products, offered):
+            for row in np.flatnonzero(hit):
+                products[row].append(product)
+
+        if self.default_product:
+            for row_products in products:
+                if not row_products:
+                    row_products.append(self.default_product)
+
+        return {
+            "credit_score": score,
+            "risks": risks,
+            "recommended_products": products,
+            "score_explanations": explanations
+        }
+
+
+def get_engine():
+    """
+    The rule engine for CREDIT_RULES_PATH, recompiled when the file's
+    mtime changes; the mtime is looked at most every
+    CREDIT_RULES_CHECK_SECONDS. A file that is missing or fails to load
+    keeps the previous rules.
+    """
+    global _engine, _engine_mtime, _engine_checked
+
+    now = time.monotonic()
+
+    if (
+        _engine is not None
+        and _engine_checked is not None
+        and now - _engine_checked < CREDIT_RULES_CHECK_SECONDS
+    ):
+        return _engine
+
+    with _lock:
+        if _engine_checked is not None and now - _engine_checked < CREDIT_RULES_CHECK_SECONDS:
+            return _engine
+
+        try:
+            mtime = os.stat(CREDIT_RULES_PATH).st_mtime_ns
+        except OSError:
+            if _engine is None:
+                raise
+            mtime = _engine_mtime
+
+        if mtime != _engine_mtime:
+            try:
+                _engine = RuleEngine.from_file(CREDIT_RULES_PATH)
+            except Exception:
+                if _engine is None:
+                    raise
+            _engine_mtime = mtime
+
+        _engine_checked = now
+
+    return _engine
+
+
+def assess(metrics):
+    """
+    Score, risks, products and score explanations of one metrics dict.
+    """
+    result = get_engine().evaluate({k: [v] for k, v in metrics.items()})
+
+    return {
+        "credit_score": int(result["credit_score"][0]),
+        "risks": result["risks"][0],
+        "recommended_products": result["recommended_products"][0],
+        "score_explanations": result["score_explanations"][0]
+    }
+
+
+def assess_portfolio(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    The same evaluation for a frame with one row of metrics per business,
+    in a single pass over the metric columns.
+    """
+    result = get_engine().evaluate({c: frame[c].to_numpy() for c in frame.columns})
+
+    return pd.DataFrame({
+        "credit_score": result["credit_score"],
+        "risks": result["risks"],
+        "recommended_products": result["recommended_products"],
+        "score_explanations": result["score_explanations"]
+    }, index=frame.index)
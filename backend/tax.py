@@ -1,53 +1,262 @@
+import os
+import json
+
+import numpy as np
 import pandas as pd
 
+from ledger import KNOWN_TYPES, as_ledger
+from analysis import metrics_from_summary
+
+TAX_RULES_PATH = os.getenv(
+    "TAX_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "tax_rules.json")
+)
+TAX_JURISDICTION = os.getenv("TAX_JURISDICTION")
+
+# offending row indices reported per finding; row_count has the full number
+MAX_FINDING_ROWS = int(os.getenv("TAX_MAX_FINDING_ROWS", "50"))
+
+# (rule id, severity, message, test) in report order. Tests take the
+# per-business input columns and the thresholds of each business's
+# jurisdiction and financial year, all as arrays.
+RULES = (
+    ("no_revenue", "issue",
+     "No revenue records found – GST / sales tax may be missing",
+     lambda c, t: c["revenue_rows"] == 0),
+    ("negative_values", "issue",
+     "Negative transaction values found",
+     lambda c, t: c["negative_rows"] > 0),
+    ("high_revenue", "issue",
+     "High revenue detected – verify GST filing and returns",
+     lambda c, t: c["revenue"] > t["high_revenue_review"]),
+    ("high_margin", "warning",
+     "High profit margin – verify correct tax classification",
+     lambda c, t: c["profit_margin"] > t["high_margin_percent"]),
+    ("zero_revenue", "warning",
+     "Zero revenue detected – verify tax return data",
+     lambda c, t: c["revenue"] == 0),
+    ("gst_registration", "warning",
+     "Turnover exceeds GST registration threshold. GST registration may be required.",
+     lambda c, t: c["revenue"] > t["gst_registration_turnover"]),
+    ("expense_invoices", "warning",
+     "Ensure expense invoices are properly maintained for GST and audit.",
+     lambda c, t: c["expense_rows"] > 0),
+    ("unrecognised_type", "warning",
+     "Transactions with unrecognised types found – verify their tax classification",
+     lambda c, t: c["unrecognised_rows"] > 0),
+)
+
+# rules whose findings point at ledger rows
+ROW_RULES = ("negative_values", "unrecognised_type")
+
+_config = None
+
+
+def load_config():
+    global _config
 
-def check_tax_compliance(df: pd.DataFrame):
+    if _config is None:
+        with open(TAX_RULES_PATH, encoding="utf-8") as f:
+            _config = json.load(f)
+
+    return _config
+
+
+def financial_year(date, start_month):
+    """
+    Label like "2024-25" of the financial year containing `date`.
     """
-    Very simple rule based tax compliance checker
+    first = date.year if date.month >= start_month else date.year - 1
+    if start_month == 1:
+        return str(first)
+    return f"{first}-{(first + 1) % 100:02d}"
+
+
+def tax_settings(jurisdiction=None, latest_date=None):
     """
+    Jurisdiction, financial year and thresholds to apply. The year is the
+    one containing the ledger's latest date; years without their own
+    entry use "default".
+    """
+    config = load_config()
+    jurisdiction = jurisdiction or TAX_JURISDICTION or config["default_jurisdiction"]
+
+    entry = config["jurisdictions"].get(jurisdiction)
+    if entry is None:
+        raise ValueError(f"No tax rules configured for jurisdiction {jurisdiction!r}")
+
+    year = None
+    if latest_date is not None and not pd.isna(latest_date):
+        year = financial_year(latest_date, entry.get("financial_year_start_month", 1))
+
+    thresholds = {**entry["years"]["default"], **entry["years"].get(year, {})}
+
+    return jurisdiction, year, thresholds
+
+
+class TaxRowScan:
+    """
+    Row-level inputs of the tax rules: row counts and the first offending
+    row indices, fed one ledger or one chunk at a time. Indices are row
+    positions in the upload, counted across chunks.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = {rule: 0 for rule in ROW_RULES}
+        self.rows = {rule: [] for rule in ROW_RULES}
+        self.latest_date = None
+
+    def add(self, ledger):
+
+        ledger = as_ledger(ledger)
+
+        known = np.zeros(len(ledger.amount), dtype=bool)
+        for type_ in KNOWN_TYPES:
+            known |= ledger.mask(type_)
+
+        # NaN amounts compare False
+        hits = {
+            "negative_values": ledger.amount.to_numpy(dtype=float, na_value=np.nan) < 0,
+            "unrecognised_type": ~known,
+        }
+
+        for rule, mask in hits.items():
+            positions = np.flatnonzero(mask)
+            self.counts[rule] += len(positions)
+
+            room = MAX_FINDING_ROWS - len(self.rows[rule])
+            if room > 0:
+                self.rows[rule].extend(int(p) + self.offset for p in positions[:room])
+
+        if ledger.dates is not None:
+            latest = ledger.dates.max()
+            if not pd.isna(latest) and (self.latest_date is None or latest > self.latest_date):
+                self.latest_date = latest
+
+        self.offset += len(ledger.amount)
+        return self
+
+
+def rule_inputs(summary, metrics, scan):
+
+    revenue = summary.get("revenue")
+    expense = summary.get("expense")
+
+    return {
+        "revenue": metrics.get("revenue", 0),
+        "profit_margin": metrics.get("profit_margin", 0),
+        "revenue_rows": revenue["rows"] if revenue else 0,
+        "expense_rows": expense["rows"] if expense else 0,
+        "negative_rows": scan.counts["negative_values"],
+        "unrecognised_rows": scan.counts["unrecognised_type"],
+    }
+
+
+def scan_inputs(summary, metrics, scan):
+    """
+    Everything the tax rules need from one ledger, JSON-ready so it can be
+    cached with the ledger sections: the rule input columns, the latest
+    date (for the financial year) and the offending rows.
+    """
+    latest = scan.latest_date
+
+    return {
+        "columns": rule_inputs(summary, metrics, scan),
+        "latest_date": None if latest is None else pd.Timestamp(latest).isoformat(),
+        "row_counts": dict(scan.counts),
+        "rows": {rule: list(rows) for rule, rows in scan.rows.items()},
+    }
+
+
+def evaluate_rules(columns, thresholds):
+    """
+    Fire every rule over arrays of inputs, one element per business.
+    Returns {rule id: bool array}.
+    """
+    columns = {k: np.asarray(v) for k, v in columns.items()}
+    thresholds = {k: np.asarray(v) for k, v in thresholds.items()}
+
+    return {rule: np.asarray(test(columns, thresholds)) for rule, _, _, test in RULES}
+
+
+def build_result(fired, row_index=0, inputs=None, jurisdiction=None, year=None):
 
     result = {
         "enabled": True,
-        "issues": []
+        "jurisdiction": jurisdiction,
+        "financial_year": year,
+        "issues": [],
+        "warnings": [],
+        "findings": []
     }
 
-    # Basic validation
-    if "amount" not in df.columns or "type" not in df.columns:
-        result["enabled"] = False
-        result["issues"].append("Missing required columns for tax checking")
-        return result
+    for rule, severity, message, _ in RULES:
+        if not fired[rule][row_index]:
+            continue
 
-    # Check if revenue exists
-    revenue_rows = df[df["type"].str.lower() == "revenue"]
+        result["issues" if severity == "issue" else "warnings"].append(message)
 
-    if revenue_rows.empty:
-        result["issues"].append("No revenue records found – GST / sales tax may be missing")
+        finding = {"rule": rule, "severity": severity, "message": message}
+        if inputs is not None and rule in inputs["rows"]:
+            finding["row_count"] = inputs["row_counts"][rule]
+            finding["rows"] = inputs["rows"][rule]
 
-    # Check negative values
-    if (df["amount"] < 0).any():
-        result["issues"].append("Negative transaction values found")
+        result["findings"].append(finding)
 
-    # Check very large cash flow (dummy threshold)
-    total_revenue = revenue_rows["amount"].sum()
+    return result
 
-    if total_revenue > 1_000_000:
-        result["issues"].append("High revenue detected – verify GST filing and returns")
 
-    return result
+def check_tax_compliance_batch(inputs, jurisdictions=None):
+    """
+    Tax rules over many businesses in one evaluation. `inputs` holds one
+    scan_inputs dict per business and `jurisdictions` an optional
+    jurisdiction per business (None: the default); each business gets the
+    thresholds of its own jurisdiction and of the financial year of its
+    latest date. Returns one result per business, with the row indices
+    of its findings.
+    """
+    if jurisdictions is None:
+        jurisdictions = [None] * len(inputs)
 
+    settings = [
+        tax_settings(jurisdiction, None if i["latest_date"] is None else pd.Timestamp(i["latest_date"]))
+        for i, jurisdiction in zip(inputs, jurisdictions)
+    ]
 
-def tax_compliance_checks(df: pd.DataFrame, metrics: dict):
+    columns = {key: [i["columns"][key] for i in inputs] for key in inputs[0]["columns"]}
+    thresholds = {key: [t[key] for _, _, t in settings] for key in settings[0][2]}
+
+    fired = evaluate_rules(columns, thresholds)
+
+    return [
+        build_result(fired, row, i, jurisdiction, year)
+        for row, (i, (jurisdiction, year, _)) in enumerate(zip(inputs, settings))
+    ]
+
+
+def tax_compliance_from_scan(summary, metrics, scan, jurisdiction=None):
     """
-    Soft warnings based on metrics
+    Tax compliance of one ledger from its summary, metrics and row scan.
     """
-    warnings = []
+    return check_tax_compliance_batch([scan_inputs(summary, metrics, scan)], [jurisdiction])[0]
 
-    profit_margin = metrics.get("profit_margin", 0)
 
-    if profit_margin > 60:
-        warnings.append("High profit margin – verify correct tax classification")
+def check_tax_compliance(ledger, metrics=None, jurisdiction=None):
+    """
+    Every tax rule over one ledger: a single row scan plus the summary.
+    """
+    if isinstance(ledger, pd.DataFrame) and not {"amount", "type"}.issubset(ledger.columns):
+        return {
+            "enabled": False,
+            "issues": ["Missing required columns for tax checking"]
+        }
+
+    ledger = as_ledger(ledger)
 
-    if metrics.get("revenue", 0) == 0:
-        warnings.append("Zero revenue detected – verify tax return data")
+    if metrics is None:
+        metrics = metrics_from_summary(ledger.summary)
 
-    return warnings
+    return tax_compliance_from_scan(
+        ledger.summary, metrics, TaxRowScan().add(ledger), jurisdiction
+    )
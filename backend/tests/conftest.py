@@ -0,0 +1,38 @@
+import os
+import tempfile
+
+import pytest
+
+# app, database and the caches read their settings at import, so the test
+# environment is set before any of them is loaded
+_TMP = tempfile.mkdtemp(prefix="sme-tests-")
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TMP, "test.db")
+os.environ["PDF_CACHE_DIR"] = os.path.join(_TMP, "pdf-cache")
+os.environ["PARSE_WORKERS"] = "0"
+
+for name in (
+    "OPENAI_API_KEY", "ASYNC_DATABASE_URL", "LEDGER_STORE_DIR",
+    "ANALYSIS_CACHE_SIZE", "ANALYSIS_CACHE_DB", "REPORT_CACHE_DB",
+):
+    os.environ.pop(name, None)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    import app
+
+    with TestClient(app.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def ledger():
+    """
+    A fixed synthetic ledger of 2,000 rows; copy it before normalising.
+    """
+    from perf.ledgers import synthetic_ledger
+
+    return synthetic_ledger(2000, seed=7)
+
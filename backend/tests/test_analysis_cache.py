@@ -0,0 +1,69 @@
+import json
+
+import analysis_cache
+import app
+import tax
+from analysis_cache import analysis_cache as cache, upload_key
+from perf.ledgers import ledger_bytes
+
+
+def without_ids(result):
+    return {
+        k: v for k, v in result.items()
+        if k not in ("id", "ledger_digest", "report_en", "report_hi")
+    }
+
+
+def analyze(client, content, industry="Retail"):
+    response = client.post(
+        "/analyze",
+        files={"file": ("ledger.csv", content)},
+        data={"business_name": "Cached Traders", "industry": industry}
+    )
+    assert response.status_code == 200, response.text
+    return without_ids(response.json())
+
+
+def test_repeated_upload_is_served_from_cache(client, monkeypatch):
+    content = ledger_bytes("csv", 1200, seed=11)
+
+    misses = cache.stats()["misses"]
+    first = analyze(client, content)
+    assert cache.stats()["misses"] == misses + 1
+
+    # a hit never reaches the parsers
+    async def no_parsing(*args, **kwargs):
+        raise AssertionError("cache hit parsed the upload again")
+
+    monkeypatch.setattr(app, "_aggregate", no_parsing)
+
+    hits = cache.stats()["hits"]
+    assert analyze(client, content) == first
+    assert cache.stats()["hits"] == hits + 1
+
+    # the assessment and benchmark are recomputed for the new industry
+    other = analyze(client, content, industry="Services")
+    assert other["industry"] == "Services"
+    assert other["metrics"] == first["metrics"]
+    assert other["forecast"] == first["forecast"]
+
+
+def test_cache_key_covers_rule_files(tmp_path, monkeypatch):
+    key = upload_key("abc")
+
+    with open(tax.TAX_RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)
+
+    path = tmp_path / "tax_rules.json"
+    path.write_text(json.dumps(rules, indent=4), encoding="utf-8")
+
+    monkeypatch.setattr(tax, "TAX_RULES_PATH", str(path))
+    monkeypatch.setattr(analysis_cache, "_fingerprint", None)
+
+    assert upload_key("abc") != key
+    assert upload_key("abc").endswith(":abc")
+
+
+def test_uploads_without_digest_are_not_cached():
+    analysis_cache.set_sections(None, {"metrics": {}})
+    assert analysis_cache.get_sections(None) is None
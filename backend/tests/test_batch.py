@@ -0,0 +1,155 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+import app
+from pdf_report import REPORT_PENDING
+
+
+# /analyze fields a batch result line does not carry
+SINGLE_ONLY = ("id", "ledger_digest", "report_en", "report_hi")
+
+
+def batch_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def post_batch(client, files, **data):
+    response = client.post(
+        "/analyze/batch",
+        files={"files": ("batch.zip", batch_zip(files))},
+        data={"industry": "Retail", **data}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def ledger_csv(revenue, expense):
+    return f"amount,type\n{revenue},revenue\n{expense},expense\n"
+
+
+def test_batch_streams_results_and_stores_them(client):
+    lines = post_batch(client, {
+        "alpha.csv": ledger_csv(1000, 300),
+        "beta.csv": ledger_csv(500, 900),
+        "broken.csv": "foo,bar\n1,2\n",
+        "notes.txt": "not a ledger",
+        "manifest.csv": "filename,business_name,industry\nalpha.csv,Alpha Traders,Services\n",
+    })
+
+    results = {line["file"]: line for line in lines if line["type"] == "result"}
+    summary = lines[-1]
+
+    assert set(results) == {"alpha.csv", "beta.csv", "broken.csv"}
+
+    alpha = results["alpha.csv"]
+    assert (alpha["status"], alpha["business_name"], alpha["industry"]) == ("ok", "Alpha Traders", "Services")
+    assert alpha["metrics"]["profit"] == 700.0
+    assert "report_en" not in alpha
+
+    assert results["beta.csv"]["business_name"] == "beta"
+    assert results["beta.csv"]["credit_score"] == 50
+    assert results["broken.csv"]["status"] == "error"
+
+    assert summary["type"] == "summary"
+    assert (summary["total"], summary["stored"], summary["failed"]) == (3, 2, 1)
+
+    for entry in summary["ids"]:
+        stored = client.get(f"/analysis/{entry['id']}").json()
+        assert stored["metrics"] == results[entry["file"]]["metrics"]
+
+
+def test_pdf_of_batch_result_without_ai_report(client):
+    pdfplumber = pytest.importorskip("pdfplumber")
+
+    lines = post_batch(client, {"gamma.csv": ledger_csv(800, 200)})
+    analysis_id = lines[-1]["ids"][0]["id"]
+
+    response = client.get(f"/report/pdf/{analysis_id}")
+    assert response.status_code == 200
+
+    with pdfplumber.open(io.BytesIO(response.content)) as pdf:
+        text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+    assert "None" not in text
+    assert " ".join(REPORT_PENDING.split()[:4]) in " ".join(text.split())
+
+
+def test_failed_store_ends_with_error_summary(client, monkeypatch):
+
+    async def store_analyses(db, rows):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(app, "store_analyses", store_analyses)
+
+    lines = post_batch(client, {"delta.csv": ledger_csv(100, 50)})
+
+    assert lines[0]["status"] == "ok"
+    assert lines[-1]["type"] == "summary"
+    assert lines[-1]["stored"] == 0
+    assert lines[-1]["ids"] == []
+    assert "database is locked" in lines[-1]["error"]
+
+
+def test_batch_matches_single_uploads_and_jurisdictions(client, tmp_path, monkeypatch):
+    import tax
+
+    with open(tax.TAX_RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)
+    rules["jurisdictions"]["XX"] = {
+        "financial_year_start_month": 1,
+        "years": {"default": {
+            "gst_registration_turnover": 100,
+            "high_revenue_review": 100,
+            "high_margin_percent": 10
+        }}
+    }
+    path = tmp_path / "tax_rules.json"
+    path.write_text(json.dumps(rules), encoding="utf-8")
+
+    monkeypatch.setattr(tax, "TAX_RULES_PATH", str(path))
+    monkeypatch.setattr(tax, "_config", None)
+
+    files = {
+        "epsilon.csv": ledger_csv(1000, 300),
+        "zeta.csv": ledger_csv(1000, 300),
+        "eta.csv": ledger_csv(2000, 2500),
+        "theta.csv": ledger_csv(700, 100),
+        "manifest.csv": (
+            "filename,business_name,industry,jurisdiction\n"
+            "zeta.csv,Zeta,Retail,XX\n"
+            "theta.csv,Theta,Retail,ZZ\n"
+        ),
+    }
+    results = {
+        line["file"]: line for line in post_batch(client, files) if line["type"] == "result"
+    }
+
+    # scored as a portfolio, each business gets what /analyze gives it alone
+    for name in ("epsilon.csv", "eta.csv"):
+        single = client.post(
+            "/analyze",
+            files={"file": (name, files[name])},
+            data={"business_name": results[name]["business_name"], "industry": "Retail"}
+        ).json()
+
+        batch = results[name]
+        assert {k: batch[k] for k in single if k not in SINGLE_ONLY} == {
+            k: v for k, v in single.items() if k not in SINGLE_ONLY
+        }
+
+    zeta = results["zeta.csv"]["tax_compliance"]
+    assert zeta["jurisdiction"] == "XX"
+    assert {"high_revenue", "high_margin", "gst_registration"} <= {f["rule"] for f in zeta["findings"]}
+    assert results["epsilon.csv"]["tax_compliance"]["jurisdiction"] == "IN"
+
+    assert results["theta.csv"]["status"] == "error"
+    assert "ZZ" in results["theta.csv"]["error"]
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import benchmark
+from benchmark import compare_with_benchmark, get_registry, percentile_rank, refresh_from_history
+from models import AnalysisResult, Base
+
+
+@pytest.fixture
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(benchmark, "_registry", None)
+    monkeypatch.setattr(benchmark, "_registry_mtime", None)
+    monkeypatch.setattr(benchmark, "_registry_checked", None)
+    monkeypatch.setattr(benchmark, "_history", None)
+
+
+def metrics(revenue, margin, receivable=50.0, payable=100.0):
+    return {
+        "revenue": revenue,
+        "expenses": revenue * (1 - margin / 100),
+        "profit_margin": margin,
+        "receivable": receivable,
+        "payable": payable,
+    }
+
+
+def test_industry_aliases_resolve_case_insensitively(fresh_registry):
+    registry = get_registry()
+
+    assert registry.resolve("  KIRANA ") == registry.resolve("retail") == "retail"
+    assert registry.resolve("IT   services") == "services"
+    assert registry.resolve("space mining") is None
+
+    result = compare_with_benchmark(metrics(1000.0, 12.0), "Kirana")
+    assert (result["enabled"], result["industry"], result["size_band"]) == (True, "Retail", "micro")
+
+    assert compare_with_benchmark(metrics(1000.0, 12.0), "space mining")["enabled"] is False
+
+
+def test_percentile_rank_interpolates_between_knots():
+    knots = np.array([2.0, 6.0, 12.0, 18.0, 25.0])
+
+    ranks = percentile_rank(knots, [-5, 2, 4, 12, 15, 25, 40])
+
+    assert ranks.tolist() == [10.0, 10.0, 17.5, 50.0, 62.5, 90.0, 90.0]
+
+    # repeated knots do not divide by zero
+    assert percentile_rank(np.array([1.0, 1.0, 1.0, 2.0, 3.0]), [1.0]).tolist() == [50.0]
+
+
+def test_refresh_from_history_reaches_every_worker(tmp_path, monkeypatch, fresh_registry):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add_all(
+        AnalysisResult(industry="kirana", **metrics(1000.0 + i, float(i)))
+        for i in range(40)
+    )
+    db.add(AnalysisResult(industry="Agriculture", **metrics(1000.0, 5.0)))
+    db.commit()
+
+    history_path = tmp_path / "history.csv"
+    monkeypatch.setattr(benchmark, "BENCHMARKS_HISTORY_PATH", str(history_path))
+    monkeypatch.setattr(benchmark, "BENCHMARKS_CHECK_SECONDS", 0)
+
+    # another worker's registry, loaded before the refresh
+    stale = get_registry()
+    assert stale.distribution("retail", "micro", "profit_margin")[2] == 12
+
+    result = refresh_from_history(db, min_samples=30)
+
+    # only Retail has enough samples: three metrics for its micro band and "all"
+    assert result == {"rows_read": 41, "last_id": 41, "distributions": 6}
+    assert history_path.exists()
+
+    refreshed = get_registry()
+    assert refreshed.distribution("retail", "micro", "profit_margin")[2] == pytest.approx(19.5)
+    assert refreshed.distribution("agriculture", "all", "profit_margin").tolist() == \
+        stale.distribution("agriculture", "all", "profit_margin").tolist()
+
+    # a worker still holding the old registry reloads it from the file
+    monkeypatch.setattr(benchmark, "_registry", stale)
+    monkeypatch.setattr(benchmark, "_registry_mtime", None)
+    assert get_registry() is not stale
+    assert get_registry().distribution("retail", "micro", "profit_margin")[2] == pytest.approx(19.5)
+
+    # a second refresh only reads new rows
+    assert refresh_from_history(db, min_samples=30)["rows_read"] == 0
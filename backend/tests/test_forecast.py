@@ -0,0 +1,45 @@
+import pandas as pd
+
+from forecast import forecast_revenue
+
+
+def monthly_ledger(amounts, months=12):
+    """
+    The same {type: amount} rows in each of `months` months from January 2024.
+    """
+    rows = []
+    for month in pd.period_range("2024-01", periods=months, freq="M"):
+        date = month.to_timestamp().strftime("%Y-%m-10")
+        rows += [(amount, type_, date) for type_, amount in amounts.items()]
+
+    return pd.DataFrame(rows, columns=["amount", "type", "date"])
+
+
+def test_cash_flow_counts_receivables_and_payables_once():
+    df = monthly_ledger({"revenue": 1000, "expense": 400, "receivable": 300, "payable": 100})
+
+    result = forecast_revenue(df)
+    cash_flow = result["cash_flow"]
+
+    # outstanding balances are settled in the opening position...
+    assert cash_flow["opening_position"] == 12 * (1000 + 300 - 400 - 100)
+
+    # ...and the monthly flows are revenue less expenses only
+    for i, point in enumerate(cash_flow["months"]):
+        revenue = result["by_type"]["revenue"]["forecast"][i]["amount"]
+        expense = result["by_type"]["expense"]["forecast"][i]["amount"]
+        assert point["net_flow"] == round(revenue - expense, 2)
+
+    assert [p["position"] for p in cash_flow["months"]] == [10200.0, 10800.0, 11400.0]
+    assert cash_flow["runway_months"] is None
+
+
+def test_runway_ignores_forecast_receivables():
+    # without the receivable forecast the business burns 200 a month
+    df = monthly_ledger({"revenue": 500, "expense": 700, "receivable": 400})
+
+    cash_flow = forecast_revenue(df)["cash_flow"]
+
+    assert cash_flow["opening_position"] == 12 * (500 + 400 - 700)
+    assert [p["net_flow"] for p in cash_flow["months"]] == [-200.0] * 3
+    assert cash_flow["runway_months"] == round(2400 / 200, 1)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecast import forecast_revenue
+from forecast_models import (
+    backtest_and_forecast, holt_winters, linear_trend, moving_average
+)
+
+
+def trending_seasonal(months):
+    t = np.arange(months)
+    return 1000 + 50 * t + 300 * np.sin(2 * np.pi * t / 12)
+
+
+def test_holt_winters_fits_trend_and_season_exactly():
+    y = trending_seasonal(42)
+
+    one_step, forecast = holt_winters(y[None, :36], 6)
+
+    assert np.isnan(one_step[0, :12]).all()
+    assert one_step[0, 12:] == pytest.approx(y[12:36])
+    assert forecast[0] == pytest.approx(y[36:])
+
+
+def test_holt_winters_needs_two_seasons():
+    assert holt_winters(np.ones((1, 23)), 3) is None
+
+
+def test_holt_winters_wins_on_trending_seasonal_revenue():
+    months = pd.period_range("2022-01", periods=36, freq="M")
+    df = pd.DataFrame({
+        "amount": trending_seasonal(36),
+        "type": "revenue",
+        "date": months.to_timestamp().strftime("%Y-%m-10"),
+    })
+
+    result = forecast_revenue(df)
+
+    assert result["model"] == "holt_winters"
+    assert result["backtest_mae"]["holt_winters"] == 0
+    assert [p["forecast_revenue"] for p in result["forecast"]] == [
+        round(v, 2) for v in trending_seasonal(39)[36:]
+    ]
+
+
+def test_linear_trend_and_moving_average():
+    y = np.array([[10.0, 20.0, 30.0, 40.0, 50.0]])
+
+    one_step, forecast = linear_trend(y, 2)
+    assert np.isnan(one_step[0, :2]).all()
+    assert one_step[0, 2:] == pytest.approx([30, 40, 50])
+    assert forecast[0] == pytest.approx([60, 70])
+
+    one_step, forecast = moving_average(y, 2)
+    assert one_step[0, 1:] == pytest.approx([10, 15, 20, 30])
+    assert forecast[0] == pytest.approx([40, 40])
+
+
+def test_models_are_picked_per_series():
+    flat = np.full(36, 500.0)
+    line = 100 + 10 * np.arange(36, dtype=float)
+
+    result = backtest_and_forecast(np.stack([flat, line, trending_seasonal(36)]), 3)
+
+    assert result["model"] == ["moving_average", "linear_trend", "holt_winters"]
+    assert result["forecast"][1] == pytest.approx([460, 470, 480])
+    assert set(result["mae"]) == {"moving_average", "exponential_smoothing", "linear_trend", "holt_winters"}
+
+
+def test_short_history_falls_back_to_moving_average():
+    result = backtest_and_forecast(np.array([100.0, 200.0]), 3)
+
+    assert result["model"] == ["moving_average"]
+    assert result["mae"] == {}
+    assert np.isnan(result["lower"]).all()
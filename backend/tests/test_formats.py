@@ -0,0 +1,65 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from pyarrow import feather  # noqa: E402
+
+
+def without_ids(result):
+    return {
+        k: v for k, v in result.items()
+        if k not in ("id", "ledger_digest", "report_en", "report_hi")
+    }
+
+
+@pytest.fixture(scope="module")
+def typed_ledger():
+    """
+    A ledger with native dtypes: datetimes, float amounts with a gap,
+    mixed-case headers and types, and a column the analytics never read.
+    """
+    rng = np.random.default_rng(0)
+    n = 300
+
+    df = pd.DataFrame({
+        "Amount": rng.integers(100, 10000, n).astype(float),
+        "Type": rng.choice(["Revenue", "expense", "receivable", "PAYABLE", "junk"], n),
+        "date": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "Description": rng.choice(["Shop rent", "fuel", "salary", None], n),
+        "extra": 1,
+    })
+    df.loc[5, "Amount"] = np.nan
+
+    return df
+
+
+def analyze(client, filename, content):
+    response = client.post(
+        "/analyze",
+        files={"file": (filename, content)},
+        data={"business_name": "Columnar Traders", "industry": "Retail"}
+    )
+    assert response.status_code == 200, response.text
+    return without_ids(response.json())
+
+
+def test_parquet_and_arrow_match_csv(client, typed_ledger):
+    csv = io.BytesIO()
+    typed_ledger.assign(date=typed_ledger["date"].dt.strftime("%Y-%m-%d")).to_csv(csv, index=False)
+
+    parquet = io.BytesIO()
+    typed_ledger.to_parquet(parquet)
+
+    arrow = io.BytesIO()
+    feather.write_feather(typed_ledger, arrow)
+
+    expected = analyze(client, "ledger.csv", csv.getvalue())
+
+    assert expected["data_quality"]["rows"] == len(typed_ledger)
+    assert analyze(client, "ledger.parquet", parquet.getvalue()) == expected
+    assert analyze(client, "ledger.arrow", arrow.getvalue()) == expected
+
@@ -0,0 +1,78 @@
+import re
+
+import instrumentation
+from instrumentation import LATENCY_BUCKETS, count, observe, render_metrics
+from perf.ledgers import ledger_bytes
+
+LABEL = r'[a-z_]+="(?:[^"\\]|\\.)*"'
+SAMPLE = re.compile(rf"^[a-z_]+(\{{{LABEL}(,{LABEL})*\}})? [0-9.e+-]+$")
+
+LEDGER_STAGES = ("validate", "aggregate", "tax_scan", "forecast_monthly", "bookkeeping_categories")
+
+
+def analyze(client, seed):
+    return client.post(
+        "/analyze",
+        files={"file": ("ledger.csv", ledger_bytes("csv", 300, seed=seed))},
+        data={"business_name": "Timed Traders", "industry": "Retail"}
+    )
+
+
+def test_histograms_and_counters_render_as_prometheus_text():
+    labels = (("stage", 'test "quoted"\nstage'),)
+    observe("sme_stage_duration_seconds", labels, 0.003)
+    observe("sme_stage_duration_seconds", labels, 0.3)
+    observe("sme_stage_duration_seconds", labels, 1000)
+    count("sme_rows_processed_total", (("stage", "test"),), 7)
+
+    lines = render_metrics({"sme_test_gauge": 2}).splitlines()
+
+    label = 'stage="test \\"quoted\\"\\nstage"'
+    buckets = [line for line in lines if line.startswith(f"sme_stage_duration_seconds_bucket{{{label},")]
+
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[0].endswith(' 1')                        # le="0.005"
+    assert buckets[LATENCY_BUCKETS.index(0.5)].endswith(" 2")
+    assert buckets[-1] == f'sme_stage_duration_seconds_bucket{{{label},le="+Inf"}} 3'
+    assert f"sme_stage_duration_seconds_count{{{label}}} 3" in lines
+    assert f"sme_stage_duration_seconds_sum{{{label}}} 1000.303" in lines
+
+    assert "# TYPE sme_stage_duration_seconds histogram" in lines
+    assert "# TYPE sme_rows_processed_total counter" in lines
+    assert "# TYPE sme_test_gauge gauge" in lines
+    assert "sme_test_gauge 2" in lines
+
+
+def test_metrics_endpoint_reports_pipeline_stages(client):
+    assert analyze(client, seed=23).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    lines = response.text.splitlines()
+    for line in lines:
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE.match(line), line
+
+    for name in LEDGER_STAGES:
+        assert any(
+            line.startswith(f'sme_stage_duration_seconds_count{{stage="{name}"}}') for line in lines
+        ), name
+
+    assert any(line.startswith('sme_http_request_duration_seconds_count{method="POST",route="/analyze"') for line in lines)
+    assert any(line.startswith("sme_analysis_cache_misses ") for line in lines)
+
+
+def test_server_timing_header(client, monkeypatch):
+    assert "server-timing" not in analyze(client, seed=29).headers
+
+    monkeypatch.setattr(instrumentation, "SERVER_TIMING", True)
+    response = analyze(client, seed=31)
+
+    timings = dict(
+        (part.split(";dur=")[0], float(part.split(";dur=")[1]))
+        for part in response.headers["server-timing"].split(", ")
+    )
+
+    assert set(LEDGER_STAGES) <= set(timings)
+    assert timings["total"] >= timings["read"] >= timings["aggregate"] >= timings["tax_scan"]
@@ -0,0 +1,65 @@
+import time
+
+import app
+from jobs import JobQueue
+
+
+def submit(client, content, filename="ledger.csv"):
+    return client.post(
+        "/analyze/jobs",
+        files={"file": (filename, content)},
+        data={"business_name": "Queued Traders", "industry": "Retail"}
+    )
+
+
+def wait_for(client, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_is_polled_until_done(client):
+    response = submit(client, "amount,type\n1000,revenue\n400,expense\n")
+    assert response.status_code == 202
+
+    job_id = response.json()["job_id"]
+    assert response.json()["status_url"] == f"/jobs/{job_id}"
+
+    job = wait_for(client, job_id)
+
+    assert job["status"] == "done"
+    assert job["result"]["metrics"]["profit"] == 600.0
+    assert job["started_at"] >= job["submitted_at"]
+
+    stored = client.get(f"/analysis/{job['analysis_id']}").json()
+    assert stored["metrics"] == job["result"]["metrics"]
+
+
+def test_failed_job_keeps_the_error(client):
+    job = wait_for(client, submit(client, "value,kind\n1,revenue\n").json()["job_id"])
+
+    assert (job["status"], job["status_code"]) == ("failed", 400)
+    assert "amount" in job["error"]
+    assert "result" not in job
+
+
+def test_full_queue_answers_503(client, monkeypatch):
+    # no workers, so the one queued job stays queued
+    monkeypatch.setattr(app, "job_queue", JobQueue(workers=0, max_pending=1))
+
+    assert submit(client, "amount,type\n1,revenue\n").status_code == 202
+
+    response = submit(client, "amount,type\n2,revenue\n")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+
+def test_unknown_job_and_format(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
+    assert submit(client, b"data", filename="ledger.txt").status_code == 400
@@ -0,0 +1,183 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import llm
+from report_cache import ReportCache
+
+INPUTS = {
+    "business_name": "Stub Traders",
+    "industry": "Retail",
+    "metrics": {"revenue": 1000.0},
+    "risks": [],
+    "credit_score": 100,
+}
+
+
+def event(type_, delta=None):
+    return SimpleNamespace(type=type_, delta=delta)
+
+
+class StubStream:
+
+    def __init__(self, events):
+        self.events = events
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        for item in self.events:
+            self.events = self.events[1:]
+            if callable(item):
+                await item()
+                continue
+            return item
+        raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+
+class StubClient:
+    """
+    Stands in for AsyncOpenAI: streamed calls return `stream`, the others
+    are answered by `translate(prompt)`.
+    """
+
+    def __init__(self, stream, translate=None):
+        self.stream = stream
+        self.translate = translate or (lambda prompt: "हिंदी")
+        self.translated = []
+        self.responses = SimpleNamespace(create=self.create)
+
+    async def create(self, model, input, stream=False):
+        if stream:
+            return self.stream
+
+        self.translated.append(input)
+        text = self.translate(input)
+        if asyncio.iscoroutine(text):
+            text = await text
+        return SimpleNamespace(status="completed", output_text=text)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    cache = ReportCache(db_path=None)
+    monkeypatch.setattr(llm, "report_cache", cache)
+    monkeypatch.setattr(llm, "_semaphores", {})
+
+    def install(client):
+        monkeypatch.setattr(llm, "get_async_client", lambda: client)
+        return cache
+
+    return install
+
+
+def completed(*deltas):
+    return [event("response.output_text.delta", d) for d in deltas] + [event("response.completed")]
+
+
+def test_translation_overlaps_the_report_stream(stub, monkeypatch):
+    monkeypatch.setattr(llm, "TRANSLATION_SEGMENT_CHARS", 10)
+    started = asyncio.Event()
+
+    async def translate(prompt):
+        started.set()
+        return "अनुवाद"
+
+    async def first_translation_started():
+        # the report only continues once its first paragraphs are in translation
+        await asyncio.wait_for(started.wait(), timeout=2)
+
+    stream = StubStream(
+        completed("First paragraph.\n\n", "Second one.")[:2]
+        + [first_translation_started]
+        + completed("Third paragraph.")
+    )
+    client = StubClient(stream, translate)
+    cache = stub(client)
+
+    english, hindi = asyncio.run(llm.generate_reports(**INPUTS))
+
+    assert english == "First paragraph.\n\nSecond one.Third paragraph."
+    assert hindi == "अनुवाद\n\nअनुवाद"
+    assert len(client.translated) == 2
+    assert stream.closed
+
+    # the same inputs are answered from the cache
+    client.stream = None
+    assert asyncio.run(llm.generate_reports(**INPUTS)) == (english, hindi)
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.parametrize("events", [
+    completed("Half a report")[:-1],
+    completed("Half a report")[:-1] + [event("response.incomplete")],
+    completed("Half a report")[:-1] + [event("response.failed")],
+    [event("error")],
+    completed(),
+])
+def test_unfinished_reports_raise_and_are_not_cached(stub, events):
+    cache = stub(StubClient(StubStream(events)))
+
+    with pytest.raises(llm.ReportFailed):
+        asyncio.run(llm.generate_reports(**INPUTS))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_empty_translation_is_not_cached(stub):
+    cache = stub(StubClient(StubStream(completed("Report")), lambda prompt: "  "))
+
+    with pytest.raises(llm.ReportFailed):
+        asyncio.run(llm.generate_reports(**INPUTS))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_pipeline_timeout_closes_the_stream(stub, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_PIPELINE_TIMEOUT", 0.05)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    stream = StubStream(completed("Slow report")[:1] + [hang])
+    stub(StubClient(stream))
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(llm.generate_reports(**INPUTS))
+
+    assert stream.closed
+
+
+def test_cancel_stops_pending_translations(stub, monkeypatch):
+    monkeypatch.setattr(llm, "TRANSLATION_SEGMENT_CHARS", 1)
+    translating = asyncio.Event()
+    cancelled = []
+
+    async def translate(prompt):
+        translating.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(prompt)
+            raise
+
+    stream = StubStream(completed("Paragraph.\n\n", "More")[:2] + completed("text"))
+    stub(StubClient(stream, translate))
+
+    async def run():
+        task = asyncio.create_task(llm.generate_reports(**INPUTS))
+        await asyncio.wait_for(translating.wait(), timeout=2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert cancelled
+    assert stream.closed
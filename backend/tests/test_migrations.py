@@ -0,0 +1,102 @@
+import json
+
+from sqlalchemy import create_engine, event, inspect, text
+
+import migrations
+from models import METRIC_COLUMNS
+
+# analysis_results as created before the scalar metric columns
+OLD_SCHEMA = (
+    "CREATE TABLE analysis_results ("
+    "id INTEGER PRIMARY KEY, business_name VARCHAR, industry VARCHAR, "
+    "metrics JSON, risks JSON, credit_score INTEGER, ai_report VARCHAR)"
+)
+
+
+def metrics_for(i):
+    return {
+        "revenue": 100.0 * i,
+        "expenses": 40.0 * i,
+        "profit": 60.0 * i,
+        "profit_margin": 60.0,
+        "receivable": float(i % 7),
+        "payable": 5.0,
+    }
+
+
+def old_database(tmp_path, rows):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+
+    with engine.begin() as conn:
+        conn.execute(text(OLD_SCHEMA))
+        conn.execute(
+            text("INSERT INTO analysis_results (id, business_name, metrics) VALUES (:id, :name, :metrics)"),
+            [
+                {"id": i, "name": f"Business {i}", "metrics": json.dumps(metrics)}
+                for i, metrics in enumerate(rows, start=1)
+            ]
+        )
+
+    return engine
+
+
+def test_backfill_copies_metrics_into_columns(tmp_path):
+    # more rows than one backfill batch, and one stored without metrics
+    rows = [metrics_for(i) for i in range(1, migrations.BACKFILL_BATCH * 2 + 2)] + [{}]
+    engine = old_database(tmp_path, rows)
+
+    assert migrations.migrate(engine) == len(rows)
+
+    columns = {c["name"] for c in inspect(engine).get_columns("analysis_results")}
+    assert set(METRIC_COLUMNS) <= columns
+
+    with engine.connect() as conn:
+        stored = conn.execute(
+            text(f"SELECT id, {', '.join(METRIC_COLUMNS)} FROM analysis_results ORDER BY id")
+        ).all()
+
+    for row in stored[:-1]:
+        assert dict(zip(METRIC_COLUMNS, row[1:])) == metrics_for(row[0])
+
+    assert all(value is None for value in stored[-1][1:])
+
+
+def test_migration_runs_once(tmp_path, monkeypatch):
+    engine = old_database(tmp_path, [metrics_for(1), {}])
+
+    assert migrations.migrate(engine) == 2
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version FROM schema_version")).scalar() == migrations.SCHEMA_VERSION
+
+    # the row without revenue is not scanned again on the next startup
+    def fail(*args, **kwargs):
+        raise AssertionError("backfill ran again")
+
+    monkeypatch.setattr(migrations, "backfill_metric_columns", fail)
+    assert migrations.migrate(engine) == 0
+
+
+def test_postgres_migration_holds_advisory_lock(tmp_path, monkeypatch):
+    engine = old_database(tmp_path, [metrics_for(1)])
+    statements = []
+
+    # stand in for the Postgres function, and record what runs after it
+    @event.listens_for(engine, "connect")
+    def advisory_lock(dbapi_connection, record):
+        dbapi_connection.create_function(
+            "pg_advisory_xact_lock", 1, lambda key: statements.append(("lock", key))
+        )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[0].upper())
+
+    engine.dispose()
+    monkeypatch.setattr(engine.dialect, "name", "postgresql")
+
+    assert migrations.migrate(engine) == 1
+
+    assert statements[0] == "SELECT"
+    assert statements[1] == ("lock", migrations.MIGRATION_LOCK_KEY)
+    assert "ALTER" in statements
@@ -0,0 +1,66 @@
+import asyncio
+import io
+import os
+import tempfile
+
+import pytest
+
+import parsers
+from parsers import DocumentTooLarge, parse_document, read_docx_to_dataframe, read_pdf_to_dataframe
+from perf.ledgers import ledger_bytes
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("docx")
+
+
+@pytest.fixture(scope="module")
+def pdf_ledger():
+    return ledger_bytes("pdf", 400, seed=13)
+
+
+@pytest.fixture
+def process_pool(tmp_path, monkeypatch):
+    """
+    Parse on a real two-worker pool (the suite runs with PARSE_WORKERS=0),
+    with temporary files in tmp_path.
+    """
+    monkeypatch.setattr(parsers, "PARSE_WORKERS", 2)
+    monkeypatch.setattr(parsers, "_pool", None)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    yield tmp_path
+
+    if parsers._pool is not None:
+        parsers._pool.shutdown()
+
+
+def test_pool_parses_pdf_like_one_process(process_pool, pdf_ledger):
+    assert parsers.pdf_page_count(io.BytesIO(pdf_ledger)) > 2
+
+    df = asyncio.run(parse_document("ledger.pdf", pdf_ledger))
+
+    assert df.equals(read_pdf_to_dataframe(pdf_ledger))
+    assert len(df) == 400
+
+    # the temporary copy the workers read is gone once they are done; the
+    # removal runs in a pool callback, which shutdown() waits for
+    parsers._pool.shutdown()
+    assert os.listdir(process_pool) == []
+
+
+def test_pool_parses_docx(process_pool):
+    content = ledger_bytes("docx", 50, seed=17)
+
+    df = asyncio.run(parse_document("ledger.docx", content))
+
+    assert df.equals(read_docx_to_dataframe(content))
+
+
+def test_page_limit_is_checked_before_parsing(process_pool, pdf_ledger, monkeypatch):
+    monkeypatch.setattr(parsers, "PDF_MAX_PAGES", 1)
+
+    with pytest.raises(DocumentTooLarge):
+        asyncio.run(parse_document("ledger.pdf", pdf_ledger))
+
+    assert parsers._pool is None
+    assert os.listdir(process_pool) == []
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import pdf_cache
+from app import matches_etag
+
+pytest.importorskip("reportlab")
+
+
+@pytest.fixture
+def analysis_id(client):
+    response = client.post(
+        "/analyze",
+        files={"file": ("ledger.csv", "amount,type\n1000,revenue\n400,expense\n")},
+        data={"business_name": "Cached Traders", "industry": "Retail"}
+    )
+    return response.json()["id"]
+
+
+def test_if_none_match_forms():
+    etag = '"abc"'
+
+    assert matches_etag('"abc"', etag)
+    assert matches_etag('W/"abc"', etag)
+    assert matches_etag('"old", "abc"', etag)
+    assert matches_etag("*", etag)
+    assert not matches_etag('"abcd"', etag)
+    assert not matches_etag(None, etag)
+
+
+def test_pdf_is_served_with_etag_and_revalidated(client, analysis_id):
+    response = client.get(f"/report/pdf/{analysis_id}")
+
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    etag = response.headers["etag"]
+    path = pdf_cache.cache_path(analysis_id, etag.strip('"'))
+    assert os.path.exists(path)
+
+    again = client.get(f"/report/pdf/{analysis_id}", headers={"If-None-Match": etag})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    # a second full download is the cached render
+    with open(path, "rb") as f:
+        assert client.get(f"/report/pdf/{analysis_id}").content == f.read()
+
+
+def test_etag_follows_renderer_version(client, analysis_id, monkeypatch):
+    etag = client.get(f"/report/pdf/{analysis_id}").headers["etag"]
+
+    monkeypatch.setattr(pdf_cache, "RENDERER_VERSION", pdf_cache.RENDERER_VERSION + "-next")
+
+    response = client.get(f"/report/pdf/{analysis_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_unknown_analysis_is_404(client):
+    assert client.get("/report/pdf/999999").status_code == 404
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+
+import report_cache
+from report_cache import ReportCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(report_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_key_is_canonical_over_inputs_and_model():
+    key = cache_key("report", "gpt-5", {"b": 1, "a": [1, 2]})
+
+    assert key == cache_key("report", "gpt-5", {"a": [1, 2], "b": 1})
+    assert key != cache_key("report", "gpt-4o", {"a": [1, 2], "b": 1})
+    assert key != cache_key("translation_hi", "gpt-5", {"a": [1, 2], "b": 1})
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ReportCache(ttl=60, db_path=None)
+    cache.set("k", "report")
+
+    clock[0] += 60
+    assert cache.get("k") == "report"
+
+    clock[0] += 1
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "persistent_hits": 0, "entries": 0}
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ReportCache(max_entries=2, db_path=None)
+    cache.set("a", "1")
+    cache.set("b", "2")
+
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+
+
+def test_sqlite_tier_is_shared_and_bounded(tmp_path, clock):
+    path = str(tmp_path / "reports.db")
+
+    writer = ReportCache(max_entries=1, ttl=60, db_path=path, max_db_entries=2)
+    for key in ("a", "b", "c"):
+        clock[0] += 1
+        writer.set(key, key.upper())
+
+    # a second worker on the same file, with an empty memory tier
+    reader = ReportCache(ttl=60, db_path=path)
+
+    assert reader.get("a") is None               # evicted: oldest access
+    assert reader.get("b") == "B"
+    assert reader.stats()["persistent_hits"] == 1
+
+    # served from memory the second time
+    assert reader.get("b") == "B"
+    assert reader.stats()["persistent_hits"] == 1
+
+    # expiry applies to the persistent tier and removes the row
+    clock[0] += 61
+    assert ReportCache(ttl=60, db_path=path).get("c") is None
+    assert writer._db.execute("SELECT key FROM report_cache").fetchall() == [("b",)]
@@ -0,0 +1,167 @@
+import itertools
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+import pipeline
+import rule_engine
+from analysis import analyze_financials, credit_inputs, metrics_from_summary
+from ingest import normalise_frame
+from rule_engine import assess, assess_portfolio
+
+
+def baseline_assessment(revenue, expenses, receivable, payable):
+    # analyze_financials and recommend_products before the rules moved to
+    # credit_rules.json: the score compares the exact margin, the products
+    # the rounded one from the metrics dict
+    profit = revenue - expenses
+
+    profit_margin = 0
+    if revenue != 0:
+        profit_margin = (profit / revenue) * 100
+
+    score = 100
+
+    if profit_margin < 10:
+        score -= 20
+    if payable > receivable:
+        score -= 15
+    if expenses > revenue:
+        score -= 30
+
+    risks = []
+
+    if profit < 0:
+        risks.append("Negative profit")
+    if payable > receivable:
+        risks.append("High outstanding payables")
+    if profit_margin < 10:
+        risks.append("Low profit margin")
+
+    products = []
+
+    if score >= 80 and round(profit_margin, 2) >= 20:
+        products.append("Working capital loan")
+    if receivable > payable:
+        products.append("Invoice discounting")
+    if score < 60:
+        products.append("Micro business loan")
+    if not products:
+        products.append("Basic current account + overdraft")
+
+    return score, risks, products
+
+
+def current_assessment(revenue, expenses, receivable, payable):
+    summary = {
+        "revenue": {"total": revenue},
+        "expense": {"total": expenses},
+        "receivable": {"total": receivable},
+        "payable": {"total": payable},
+    }
+    result = assess(credit_inputs(metrics_from_summary(summary)))
+
+    return result["credit_score"], result["risks"], result["recommended_products"], result
+
+
+# revenue 0, losses, margins on both sides of the 10 and 20 % bounds, and
+# margins that round to a bound: 9.995-9.999 % and 19.995-19.999 %
+GRID = list(itertools.product(
+    (0.0, 1000.0), (0.0, 800.0, 900.0, 1000.0, 1500.0), (0.0, 50.0), (0.0, 50.0, 60.0)
+)) + [
+    (100000.0, expenses, 0.0, 0.0)
+    for expenses in (90001.0, 90002.0, 90003.0, 90004.0, 90005.0, 80001.0, 80003.0, 80005.0)
+]
+
+
+@pytest.mark.parametrize("revenue, expenses, receivable, payable", GRID)
+def test_rules_reproduce_baseline_thresholds(revenue, expenses, receivable, payable):
+    expected = baseline_assessment(revenue, expenses, receivable, payable)
+
+    score, risks, products, result = current_assessment(revenue, expenses, receivable, payable)
+
+    assert (score, risks, products) == expected
+    assert score == 100 + sum(e["score"] for e in result["score_explanations"])
+
+
+def test_portfolio_matches_one_business_at_a_time():
+    inputs = [
+        credit_inputs(metrics_from_summary({
+            "revenue": {"total": revenue},
+            "expense": {"total": expenses},
+            "receivable": {"total": receivable},
+            "payable": {"total": payable},
+        }))
+        for revenue, expenses, receivable, payable in GRID
+    ]
+
+    portfolio = assess_portfolio(pd.DataFrame(inputs))
+
+    assert len(portfolio) == len(GRID)
+    for i, metrics in enumerate(inputs):
+        assert {k: v for k, v in portfolio.iloc[i].items()} == assess(metrics)
+
+
+def test_batch_analytics_score_the_portfolio_at_once(monkeypatch):
+
+    def single(metrics):
+        raise AssertionError("batch scored one business per call")
+
+    monkeypatch.setattr(pipeline, "assess", single)
+
+    sections = []
+    for revenue, expenses in ((1000.0, 300.0), (500.0, 900.0)):
+        df = pd.DataFrame({"amount": [revenue, expenses], "type": ["revenue", "expense"]})
+        sections.append(pipeline.ledger_sections(pipeline.aggregate_chunks([df])))
+
+    results = pipeline.analytics_from_portfolio(sections, ["Retail", "Services"])
+
+    assert [r["credit_score"] for r in results] == [100, 50]
+    assert results[1]["risks"] == ["Negative profit", "Low profit margin"]
+
+
+def test_margin_just_below_ten_percent_is_low():
+    df = pd.DataFrame({"amount": [100000, 90004], "type": ["revenue", "expense"]})
+    normalise_frame(df)
+
+    metrics, risks, score = analyze_financials(df)
+
+    assert metrics["profit_margin"] == 10.0
+    assert (score, risks) == (80, ["Low profit margin"])
+
+
+def test_ledger_assessment_matches_baseline(ledger):
+    df = ledger.copy()
+    normalise_frame(df)
+
+    metrics, risks, score = analyze_financials(df)
+
+    expected = baseline_assessment(
+        metrics["revenue"], metrics["expenses"], metrics["receivable"], metrics["payable"]
+    )
+    assert (score, risks) == expected[:2]
+
+
+def test_engine_survives_missing_rule_file(tmp_path, monkeypatch):
+    path = tmp_path / "credit_rules.json"
+    shutil.copy(rule_engine.CREDIT_RULES_PATH, path)
+
+    monkeypatch.setattr(rule_engine, "CREDIT_RULES_PATH", str(path))
+    monkeypatch.setattr(rule_engine, "CREDIT_RULES_CHECK_SECONDS", 0)
+    monkeypatch.setattr(rule_engine, "_engine", None)
+    monkeypatch.setattr(rule_engine, "_engine_mtime", None)
+    monkeypatch.setattr(rule_engine, "_engine_checked", None)
+
+    engine = rule_engine.get_engine()
+
+    os.remove(path)
+    assert rule_engine.get_engine() is engine
+
+    # a changed file is picked up on the next check
+    path.write_text('{"base_score": 50, "rules": [], "products": []}')
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert rule_engine.get_engine() is not engine
+    assert rule_engine.get_engine().base_score == 50
@@ -0,0 +1,125 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import tax
+from ingest import aggregate_chunks, iter_upload_chunks, normalise_frame
+from pipeline import ledger_sections
+from tax import check_tax_compliance, check_tax_compliance_batch
+
+RULES = {
+    "default_jurisdiction": "IN",
+    "jurisdictions": {
+        "IN": {
+            "financial_year_start_month": 4,
+            "years": {
+                "default": {
+                    "gst_registration_turnover": 4000000,
+                    "high_revenue_review": 1000000,
+                    "high_margin_percent": 60
+                },
+                "2024-25": {"gst_registration_turnover": 2000000}
+            }
+        },
+        "XX": {
+            "financial_year_start_month": 1,
+            "years": {
+                "default": {
+                    "gst_registration_turnover": 100000,
+                    "high_revenue_review": 50000,
+                    "high_margin_percent": 90
+                }
+            }
+        }
+    }
+}
+
+
+@pytest.fixture
+def tax_rules(tmp_path, monkeypatch):
+    path = tmp_path / "tax_rules.json"
+    path.write_text(json.dumps(RULES), encoding="utf-8")
+
+    monkeypatch.setattr(tax, "TAX_RULES_PATH", str(path))
+    monkeypatch.setattr(tax, "_config", None)
+
+
+def ledger(revenue, date):
+    df = pd.DataFrame({
+        "amount": [revenue, revenue * 0.5],
+        "type": ["revenue", "expense"],
+        "date": [date, date]
+    })
+    normalise_frame(df)
+    return df
+
+
+def rules_fired(result):
+    return [finding["rule"] for finding in result["findings"]]
+
+
+def test_thresholds_follow_jurisdiction_and_financial_year(tax_rules):
+    # 3,000,000 is over the 2024-25 GST threshold but not the default one
+    march = check_tax_compliance(ledger(3000000, "2024-03-31"))
+    april = check_tax_compliance(ledger(3000000, "2024-04-01"))
+
+    assert (march["jurisdiction"], march["financial_year"]) == ("IN", "2023-24")
+    assert (april["jurisdiction"], april["financial_year"]) == ("IN", "2024-25")
+    assert "gst_registration" not in rules_fired(march)
+    assert "gst_registration" in rules_fired(april)
+
+    other = check_tax_compliance(ledger(60000, "2024-04-01"), jurisdiction="XX")
+    assert other["financial_year"] == "2024"
+    assert {"high_revenue", "expense_invoices"} <= set(rules_fired(other))
+    assert "gst_registration" not in rules_fired(other)
+
+    with pytest.raises(ValueError):
+        check_tax_compliance(ledger(1000, "2024-04-01"), jurisdiction="ZZ")
+
+
+def test_batch_resolves_thresholds_per_business(tax_rules):
+    ledgers = [
+        ledger(3000000, "2024-03-31"),
+        ledger(3000000, "2024-04-01"),
+        ledger(60000, "2024-04-01"),
+        ledger(60000, "2024-04-01"),
+    ]
+    jurisdictions = [None, "IN", "XX", None]
+
+    inputs = [
+        ledger_sections(aggregate_chunks([df]))["tax_inputs"] for df in ledgers
+    ]
+
+    results = check_tax_compliance_batch(inputs, jurisdictions)
+
+    assert results == [
+        check_tax_compliance(df, jurisdiction=j) for df, j in zip(ledgers, jurisdictions)
+    ]
+    assert [r["financial_year"] for r in results] == ["2023-24", "2024-25", "2024", "2024-25"]
+
+
+def test_findings_point_at_upload_rows(monkeypatch):
+    monkeypatch.setattr(tax, "MAX_FINDING_ROWS", 3)
+
+    rows = ["amount,type"]
+    for i in range(40):
+        if i % 7 == 3:
+            rows.append(f"-{i},expense")
+        elif i % 11 == 5:
+            rows.append(f"{i},gift")
+        else:
+            rows.append(f"{i},revenue")
+    content = ("\n".join(rows) + "\n").encode()
+
+    aggregates = aggregate_chunks(iter_upload_chunks("ledger.csv", io.BytesIO(content), chunk_rows=6))
+    findings = {
+        f["rule"]: f for f in ledger_sections(aggregates)["tax_compliance"]["findings"]
+    }
+
+    # row indices count across chunks and stop at MAX_FINDING_ROWS
+    assert findings["negative_values"]["rows"] == [3, 10, 17]
+    assert findings["negative_values"]["row_count"] == 6
+    assert findings["unrecognised_type"]["rows"] == [5, 16, 27]
+    assert findings["unrecognised_type"]["row_count"] == 3
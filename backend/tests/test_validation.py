@@ -0,0 +1,69 @@
+import pandas as pd
+
+import validation
+from ingest import normalise_frame
+from validation import DataQualityReport, parse_amounts, parse_dates
+
+
+def test_amount_formats_are_normalised():
+    raw = pd.Series(["1,00,000", "100,000", "(500)", "₹ 2,500/-", "Rs. 75", "$10", "12.5", "abc", "", None])
+    report = DataQualityReport()
+
+    values = parse_amounts(raw, report)
+
+    assert values.tolist()[:7] == [100000.0, 100000.0, -500.0, 2500.0, 75.0, 10.0, 12.5]
+    assert values.iloc[7:].isna().all()
+    assert dict(report.counts) == {
+        "thousands_separator": 3,
+        "bracketed_negative": 1,
+        "currency_symbol": 3,
+        "non_numeric_amount": 1,
+        "missing_amount": 2,
+    }
+
+
+def test_counts_and_samples_per_reason(monkeypatch):
+    monkeypatch.setattr(validation, "SAMPLE_ROWS", 2)
+
+    df = pd.DataFrame({
+        "Amount": ["100", "x", "y", "(20)", "z", "", "300"],
+        "Type": ["Revenue", "expense", "refund", "payable", "revenue", "expense", "gift"],
+        "date": ["2024-01-05", "2024-01-06", "soon", "2024-01-08", "", "never", "2024-01-11"],
+    })
+    report = DataQualityReport()
+    report.advance(100)
+
+    normalise_frame(df, report)
+    result = report.as_dict()
+
+    assert result["rows"] == 107
+    assert result["rejected"] == {
+        "non_numeric_amount": 3,
+        "missing_amount": 1,
+        "unknown_type": 2,
+        "unparseable_date": 2,
+    }
+    assert result["normalised"] == {"bracketed_negative": 1}
+
+    # at most SAMPLE_ROWS per reason, numbered from the start of the upload
+    assert result["samples"]["non_numeric_amount"] == [
+        {"row": 101, "value": "x"}, {"row": 102, "value": "y"}
+    ]
+    assert result["samples"]["unknown_type"] == [
+        {"row": 102, "value": "refund"}, {"row": 106, "value": "gift"}
+    ]
+    assert result["samples"]["unparseable_date"] == [
+        {"row": 102, "value": "soon"}, {"row": 105, "value": "never"}
+    ]
+
+
+def test_date_format_follows_the_first_chunk():
+    report = DataQualityReport()
+
+    first = parse_dates(pd.Series([None, "2024-02-01", "2024-03-01"]), report)
+    second = parse_dates(pd.Series(["2024-04-01", "01/05/2024"]), report)
+
+    assert report.date_format == "%Y-%m-%d"
+    assert first.dt.month.tolist()[1:] == [2, 3]
+    assert second.isna().tolist() == [False, True]
+    assert report.counts["unparseable_date"] == 1
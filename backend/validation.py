@@ -0,0 +1,182 @@
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
+from pandas.tseries.api import guess_datetime_format
+
+from ledger import KNOWN_TYPES
+
+# example rows kept per reason
+SAMPLE_ROWS = int(os.getenv("DATA_QUALITY_SAMPLE_ROWS", "5"))
+
+CURRENCY_PATTERN = r"₹|\bRs\.?|\bINR\b|[$€£]"
+
+# any digit grouping, Indian ("1,00,000") or western ("100,000")
+SEPARATOR_PATTERN = r"(?<=\d),(?=\d)"
+
+# what is stripped before the second parse: currency markers, grouping
+# commas, whitespace and the "/-" suffix of Indian invoices
+CLEAN_PATTERN = CURRENCY_PATTERN + r"|" + SEPARATOR_PATTERN + r"|\s+|/-$"
+
+# strings pandas skips when it picks the value to infer a date format from
+NAT_STRINGS = {"NaT", "nat", "NAT", "nan", "NaN", "NAN"}
+
+REJECTED = ("non_numeric_amount", "missing_amount", "unknown_type", "unparseable_date")
+NORMALISED = ("currency_symbol", "thousands_separator", "bracketed_negative")
+
+
+class DataQualityReport:
+    """
+    Counts and example rows per validation reason, fed one frame or one
+    chunk at a time. Row numbers are positions in the upload.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.counts = Counter()
+        self.samples = {}
+
+        # date format of the whole upload, inferred from its first date so
+        # every chunk is parsed the same way (None: value by value)
+        self.date_format = None
+        self.date_format_inferred = False
+
+    def record(self, reason, positions, values):
+
+        if len(positions) == 0:
+            return
+
+        self.counts[reason] += len(positions)
+
+        samples = self.samples.setdefault(reason, [])
+        room = max(SAMPLE_ROWS - len(samples), 0)
+        for position, value in zip(positions[:room], values):
+            samples.append({"row": self.rows + int(position), "value": str(value)})
+
+    def advance(self, rows):
+        self.rows += rows
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "rejected": {r: self.counts[r] for r in REJECTED if self.counts[r]},
+            "normalised": {r: self.counts[r] for r in NORMALISED if self.counts[r]},
+            "samples": self.samples
+        }
+
+
+def parse_amounts(raw, report=None):
+    """
+    Numeric amounts from a raw column. Values plain to_numeric can read
+    are taken as is; only the rest go through the string clean-up
+    (currency symbols, digit grouping, "(500)" negatives), so clean
+    numeric columns cost one pass.
+    """
+    if is_numeric_dtype(raw):
+        if report is not None:
+            missing = np.flatnonzero(raw.isna().to_numpy())
+            report.record("missing_amount", missing, [""] * len(missing))
+        return raw
+
+    values = pd.to_numeric(raw, errors="coerce")
+    failed = values.isna().to_numpy()
+
+    if not failed.any():
+        return values
+
+    positions = np.flatnonzero(failed)
+    original = raw.iloc[positions]
+    text = original.astype(str).str.strip().where(original.notna(), "")
+
+    blank = (text == "").to_numpy()
+
+    bracketed = text.str.match(r"^\(.*\)$").to_numpy()
+    cleaned = text.str.replace(CLEAN_PATTERN, "", regex=True).str.strip("()")
+    parsed = pd.to_numeric(cleaned, errors="coerce").to_numpy()
+    parsed = np.where(bracketed, -parsed, parsed)
+
+    values.iloc[positions] = parsed
+
+    if report is not None:
+        ok = ~np.isnan(parsed)
+        currency = text.str.contains(CURRENCY_PATTERN, regex=True).to_numpy()
+        separator = text.str.contains(SEPARATOR_PATTERN, regex=True).to_numpy()
+
+        for reason, mask in (
+            ("missing_amount", blank),
+            ("non_numeric_amount", ~ok & ~blank),
+            ("currency_symbol", ok & currency),
+            ("thousands_separator", ok & separator),
+            ("bracketed_negative", ok & bracketed),
+        ):
+            report.record(reason, positions[mask], text.to_numpy()[mask])
+
+    return values
+
+
+def check_types(types, report=None):
+    """
+    Record rows whose (normalised) type is not one the analytics use.
+    They stay in the ledger and are ignored by the type masks.
+    """
+    if report is None:
+        return
+
+    unknown = np.flatnonzero(~types.isin(KNOWN_TYPES).to_numpy())
+    report.record("unknown_type", unknown, types.iloc[unknown].to_numpy())
+
+
+def first_date_value(raw):
+    """
+    (found, value) for the first non-missing date, the one pandas infers
+    the format from.
+    """
+    for value in raw.to_numpy(dtype=object):
+        if isinstance(value, str):
+            if value and value not in NAT_STRINGS:
+                return True, value
+        elif not pd.isna(value):
+            return True, value
+
+    return False, None
+
+
+def infer_date_format(raw, report):
+    """
+    The upload's date format: inferred from the first chunk with a date
+    and kept on the report, as pandas would infer it for the whole column.
+    """
+    if not report.date_format_inferred:
+        found, value = first_date_value(raw)
+
+        if found:
+            report.date_format = guess_datetime_format(value) if isinstance(value, str) else None
+            report.date_format_inferred = True
+
+    return report.date_format
+
+
+def parse_dates(raw, report=None):
+    """
+    Datetimes from a raw column; unparseable values become NaT. With a
+    report, every chunk is parsed in the format of the upload's first date.
+    """
+    if is_datetime64_any_dtype(raw):
+        return raw
+
+    date_format = None if report is None else infer_date_format(raw, report)
+
+    dates = pd.to_datetime(raw, format=date_format, errors="coerce")
+
+    if report is not None:
+        bad = dates.isna().to_numpy() & raw.notna().to_numpy()
+        positions = np.flatnonzero(bad)
+        values = raw.iloc[positions].astype(str)
+
+        # blank cells are missing, not malformed
+        keep = (values.str.strip() != "").to_numpy()
+        report.record("unparseable_date", positions[keep], values.to_numpy()[keep])
+
+    return dates